@@ -4,14 +4,16 @@ Handles admin statistics, user management, and system analytics.
 """
 
 from datetime import datetime, timedelta
-from typing import Optional, List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from typing import Dict, Optional, List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import case, desc, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 
-from app.database import get_db, User, Upload, Result, UserRole
+from app.database import get_db, get_async_db, User, Upload, Result, Finding, UserRole
 from app.api.auth import require_admin
+from app.services import job_queue, ml_service, report_service, export_service, stats_service, user_cache, password_service, storage_service
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
@@ -26,6 +28,7 @@ class AdminStats(BaseModel):
     completed_scans: int
     normal_count: int
     abnormal_count: int
+    condition_counts: Dict[str, int] = {}  # Findings with probability >= 0.5, by condition
 
 
 class UserListItem(BaseModel):
@@ -33,7 +36,7 @@ class UserListItem(BaseModel):
     email: str
     full_name: Optional[str]
     role: str
-    is_active: str
+    is_active: bool
     created_at: datetime
     scan_count: int
     last_active: Optional[datetime]
@@ -55,6 +58,16 @@ class ScanListItem(BaseModel):
         from_attributes = True
 
 
+class FindingListItem(BaseModel):
+    upload_id: str
+    user_email: str
+    file_name: str
+    label: str
+    probability: float
+    classification: str
+    created_at: datetime
+
+
 class ActivityItem(BaseModel):
     id: str
     action: str
@@ -63,64 +76,92 @@ class ActivityItem(BaseModel):
     type: str
 
 
+class QueueStats(BaseModel):
+    running: bool
+    workers: int
+    queue_depth: int
+    max_queue_size: int
+    active_jobs: int
+    oldest_job_age_seconds: float
+    longest_running_seconds: float
+    processed: int
+    failed: int
+
+
 # ============================================================================
 # Admin Statistics Endpoints
 # ============================================================================
 
 @router.get("/stats", response_model=AdminStats)
-async def get_admin_stats(
+def get_admin_stats(
     admin: User = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """Get comprehensive admin statistics"""
     today = datetime.utcnow().date()
-    today_start = datetime.combine(today, datetime.min.time())
-    
-    # User stats
-    total_users = db.query(User).count()
-    active_users = db.query(User).filter(User.is_active == "true").count()
     
-    # Scan stats
-    total_scans = db.query(Upload).count()
-    today_scans = db.query(Upload).filter(Upload.created_at >= today_start).count()
-    pending_scans = db.query(Upload).filter(Upload.status.in_(["uploaded", "processing"])).count()
-    completed_scans = db.query(Upload).filter(Upload.status == "done").count()
+    # User counts come from the (small) users table
+    total_users, active_users = db.query(
+        func.count(User.id),
+        func.count(case((User.is_active.is_(True), 1)))
+    ).one()
     
-    # Result stats
-    normal_count = db.query(Result).filter(
-        Result.overall_classification.contains("Normal")
-    ).count()
-    abnormal_count = db.query(Result).filter(
-        ~Result.overall_classification.contains("Normal")
-    ).count()
+    # Scan counts come from the rollup counters
+    counts = stats_service.get_counts(db, "global")
+    today_counts = stats_service.get_counts(db, "day", today.isoformat())
     
     return AdminStats(
         total_users=total_users,
         active_users=active_users,
-        total_scans=total_scans,
-        today_scans=today_scans,
-        pending_scans=pending_scans,
-        completed_scans=completed_scans,
-        normal_count=normal_count,
-        abnormal_count=abnormal_count
+        total_scans=counts.get("total", 0),
+        today_scans=today_counts.get("total", 0),
+        pending_scans=counts.get("pending", 0),
+        completed_scans=counts.get("done", 0),
+        normal_count=counts.get("normal", 0),
+        abnormal_count=counts.get("abnormal", 0),
+        condition_counts={
+            name.split(":", 1)[1]: value
+            for name, value in counts.items()
+            if name.startswith("condition:") and value
+        }
     )
 
 
+@router.post("/stats/rebuild")
+def rebuild_stats(
+    admin: User = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Recompute the statistics counters from the uploads and results tables.
+    A plain def so the full-table rebuild runs in the threadpool, not on
+    the event loop.
+    """
+    count = stats_service.rebuild(db)
+    return {"message": "Statistics counters rebuilt", "counters": count}
+
+
 @router.get("/users", response_model=List[UserListItem])
-async def get_all_users(
+def get_all_users(
     admin: User = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """Get all users with their scan counts"""
-    users = db.query(User).all()
+    # Scan count and latest upload per user in one grouped subquery
+    upload_stats = db.query(
+        Upload.user_id.label("user_id"),
+        func.count(Upload.id).label("scan_count"),
+        func.max(Upload.created_at).label("last_upload_at")
+    ).group_by(Upload.user_id).subquery()
+    
+    rows = db.query(
+        User,
+        upload_stats.c.scan_count,
+        upload_stats.c.last_upload_at
+    ).outerjoin(upload_stats, upload_stats.c.user_id == User.id).all()
     
     result = []
-    for user in users:
-        scan_count = db.query(Upload).filter(Upload.user_id == user.id).count()
-        last_upload = db.query(Upload).filter(
-            Upload.user_id == user.id
-        ).order_by(desc(Upload.created_at)).first()
-        
+    for user, scan_count, last_upload_at in rows:
         result.append(UserListItem(
             id=user.id,
             email=user.email,
@@ -128,26 +169,29 @@ async def get_all_users(
             role=user.role.value if hasattr(user.role, 'value') else str(user.role),
             is_active=user.is_active,
             created_at=user.created_at,
-            scan_count=scan_count,
-            last_active=last_upload.created_at if last_upload else user.created_at
+            scan_count=scan_count or 0,
+            last_active=last_upload_at or user.created_at
         ))
     
     return result
 
 
 @router.get("/scans", response_model=List[ScanListItem])
-async def get_all_scans(
+def get_all_scans(
     admin: User = Depends(require_admin),
     db: Session = Depends(get_db),
     limit: int = 50
 ):
     """Get recent scans across all users"""
-    uploads = db.query(Upload).order_by(desc(Upload.created_at)).limit(limit).all()
+    uploads = db.query(Upload).options(
+        joinedload(Upload.user),
+        joinedload(Upload.result)
+    ).order_by(desc(Upload.created_at)).limit(limit).all()
     
     result = []
     for upload in uploads:
-        user = db.query(User).filter(User.id == upload.user_id).first()
-        scan_result = db.query(Result).filter(Result.upload_id == upload.id).first()
+        user = upload.user
+        scan_result = upload.result
         
         result.append(ScanListItem(
             id=upload.id,
@@ -162,8 +206,42 @@ async def get_all_scans(
     return result
 
 
+@router.get("/findings", response_model=List[FindingListItem])
+def get_findings(
+    label: str,
+    admin: User = Depends(require_admin),
+    db: Session = Depends(get_db),
+    min_probability: float = Query(0.5, ge=0, le=1),
+    limit: int = Query(50, ge=1, le=500)
+):
+    """Get scans with a condition at or above a probability, most likely first"""
+    rows = db.query(Finding, Result, Upload, User).join(
+        Result, Finding.result_id == Result.id
+    ).join(
+        Upload, Result.upload_id == Upload.id
+    ).join(
+        User, Upload.user_id == User.id
+    ).filter(
+        Finding.label == label,
+        Finding.probability >= min_probability
+    ).order_by(desc(Finding.probability)).limit(limit).all()
+    
+    return [
+        FindingListItem(
+            upload_id=upload.id,
+            user_email=user.email,
+            file_name=upload.file_name,
+            label=finding.label,
+            probability=finding.probability,
+            classification=result.overall_classification,
+            created_at=upload.created_at
+        )
+        for finding, result, upload, user in rows
+    ]
+
+
 @router.get("/activity", response_model=List[ActivityItem])
-async def get_recent_activity(
+def get_recent_activity(
     admin: User = Depends(require_admin),
     db: Session = Depends(get_db),
     limit: int = 20
@@ -172,9 +250,11 @@ async def get_recent_activity(
     activities = []
     
     # Recent uploads
-    recent_uploads = db.query(Upload).order_by(desc(Upload.created_at)).limit(limit).all()
+    recent_uploads = db.query(Upload).options(
+        joinedload(Upload.user)
+    ).order_by(desc(Upload.created_at)).limit(limit).all()
     for upload in recent_uploads:
-        user = db.query(User).filter(User.id == upload.user_id).first()
+        user = upload.user
         activities.append(ActivityItem(
             id=upload.id,
             action=f"Uploaded {upload.file_name}",
@@ -200,37 +280,77 @@ async def get_recent_activity(
 
 
 @router.get("/analytics/weekly")
-async def get_weekly_analytics(
+def get_weekly_analytics(
     admin: User = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """Get weekly scan analytics"""
     today = datetime.utcnow().date()
-    week_ago = today - timedelta(days=7)
+    days = [today - timedelta(days=i) for i in range(7)]
+    
+    # Scans per upload day from the rollup counters
+    counts = stats_service.get_daily_counts(db, days)
     
     daily_stats = []
-    for i in range(7):
-        day = today - timedelta(days=i)
-        day_start = datetime.combine(day, datetime.min.time())
-        day_end = datetime.combine(day, datetime.max.time())
-        
-        count = db.query(Upload).filter(
-            Upload.created_at >= day_start,
-            Upload.created_at <= day_end
-        ).count()
-        
+    for day in days:
         daily_stats.append({
             "date": day.strftime("%Y-%m-%d"),
             "day": day.strftime("%a"),
-            "scans": count
+            "scans": counts.get(day.isoformat(), 0)
         })
     
     daily_stats.reverse()
     return {"weekly_data": daily_stats}
 
 
+@router.get("/queue", response_model=QueueStats)
+async def get_queue_stats(
+    admin: User = Depends(require_admin)
+):
+    """Get background analysis queue depth and job age"""
+    return QueueStats(**job_queue.get_stats())
+
+
+@router.get("/inference")
+async def get_inference_stats(
+    admin: User = Depends(require_admin)
+):
+    """Get inference batch size and queue wait histograms"""
+    return ml_service.get_inference_stats()
+
+
+@router.get("/reports")
+async def get_report_stats(
+    admin: User = Depends(require_admin)
+):
+    """Get the report heatmap profile with build time and size histograms"""
+    return report_service.get_stats()
+
+
+@router.get("/auth")
+async def get_auth_stats(
+    admin: User = Depends(require_admin)
+):
+    """Get password hashing pool load and token cache hit rates"""
+    return {
+        "password_hashing": password_service.get_stats(),
+        "token_cache": user_cache.get_stats(),
+    }
+
+
+@router.get("/export")
+async def export_results(
+    format: str = Query("zip", pattern="^(zip|ndjson|csv)$", description="zip, ndjson or csv"),
+    manifest: str = Query("ndjson", pattern="^(ndjson|csv)$", description="Manifest format inside a ZIP"),
+    user_id: Optional[str] = Query(None, description="Limit the export to one user"),
+    admin: User = Depends(require_admin)
+):
+    """Stream an export of every result in the clinic (or one user's)"""
+    return export_service.stream_export(user_id, format, manifest_format=manifest)
+
+
 @router.patch("/users/{user_id}/status")
-async def toggle_user_status(
+def toggle_user_status(
     user_id: str,
     admin: User = Depends(require_admin),
     db: Session = Depends(get_db)
@@ -243,15 +363,17 @@ async def toggle_user_status(
     if user.id == admin.id:
         raise HTTPException(status_code=400, detail="Cannot modify your own status")
     
-    user.is_active = "false" if user.is_active == "true" else "true"
+    user.is_active = not user.is_active
     db.commit()
     db.refresh(user)
+    user_cache.invalidate_user(user.id)
     
-    return {"message": f"User status changed to {user.is_active}", "is_active": user.is_active}
+    state = "active" if user.is_active else "inactive"
+    return {"message": f"User status changed to {state}", "is_active": user.is_active}
 
 
 @router.patch("/users/{user_id}/role")
-async def update_user_role(
+def update_user_role(
     user_id: str,
     role: str,
     admin: User = Depends(require_admin),
@@ -268,6 +390,7 @@ async def update_user_role(
     user.role = UserRole.ADMIN if role == "admin" else UserRole.DOCTOR
     db.commit()
     db.refresh(user)
+    user_cache.invalidate_user(user.id)
     
     return {"message": f"User role updated to {role}"}
 
@@ -276,23 +399,37 @@ async def update_user_role(
 async def delete_user(
     user_id: str,
     admin: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a user and their data"""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
     if user.id == admin.id:
         raise HTTPException(status_code=400, detail="Cannot delete yourself")
     
-    # Delete user's uploads and results
-    uploads = db.query(Upload).filter(Upload.user_id == user_id).all()
-    for upload in uploads:
-        db.query(Result).filter(Result.upload_id == upload.id).delete()
-    db.query(Upload).filter(Upload.user_id == user_id).delete()
+    def delete_rows(session):
+        # Stored files are released once the rows are gone
+        file_paths = storage_service.get_user_file_paths(session, user_id)
+        
+        # Delete user's uploads and results
+        stats_service.record_user_deleted(session, user_id)
+        result_ids = session.query(Result.id).join(Upload, Result.upload_id == Upload.id).filter(Upload.user_id == user_id)
+        session.query(Finding).filter(Finding.result_id.in_(result_ids.scalar_subquery())).delete(synchronize_session=False)
+        uploads = session.query(Upload).filter(Upload.user_id == user_id).all()
+        for upload in uploads:
+            session.query(Result).filter(Result.upload_id == upload.id).delete()
+        session.query(Upload).filter(Upload.user_id == user_id).delete()
+        
+        session.delete(user)
+        return file_paths
     
-    db.delete(user)
-    db.commit()
+    file_paths = await db.run_sync(delete_rows)
+    await db.commit()
+    user_cache.invalidate_user(user_id)
+    
+    for file_path in file_paths:
+        await storage_service.delete_file(file_path)
     
     return {"message": "User deleted successfully"}
@@ -4,25 +4,25 @@ Handles user registration, login, and token management.
 """
 
 from datetime import datetime, timedelta
-from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr, Field
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 
 from app.config import get_settings
-from app.database import get_db, User, UserRole
+from app.database import get_db, get_async_db, AsyncSessionLocal, User, UserRole
+from app.services import stats_service, user_cache, password_service, storage_service
 
 settings = get_settings()
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
-
 # OAuth2 scheme for token authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login", auto_error=False)
 
 
 # Pydantic Schemas
@@ -39,7 +39,7 @@ class UserResponse(BaseModel):
     full_name: Optional[str]
     role: UserRole
     created_at: datetime
-    is_active: str
+    is_active: bool
 
     class Config:
         from_attributes = True
@@ -58,12 +58,13 @@ class TokenData(BaseModel):
 
 
 # Helper Functions
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Returns (valid, new_hash); new_hash replaces a hash made with old Argon2 parameters."""
+    return await password_service.verify(plain_password, hashed_password)
 
 
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+async def get_password_hash(password: str) -> str:
+    return await password_service.hash(password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -73,16 +74,30 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
+async def _authenticate_token(token: Optional[str]) -> User:
+    """
+    Decode a JWT and load its active user, raising 401/403 otherwise.
+    
+    Verified tokens are served from user_cache without touching the
+    database. Otherwise the user is read in a session of its own that is
+    closed before the endpoint runs, so long-lived responses (event
+    streams, downloads) do not hold a pooled connection. The returned User
+    is not attached to any session; its columns can be read but
+    relationships are not loaded.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     
+    if not token:
+        raise credentials_exception
+    
+    cached = user_cache.get(token)
+    if cached is not None:
+        return User(**cached)
+    
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         user_id: str = payload.get("sub")
@@ -91,50 +106,69 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
     
-    user = db.query(User).filter(User.id == user_id).first()
+    async with AsyncSessionLocal() as db:
+        user = await db.get(User, user_id)
     if user is None:
         raise credentials_exception
-    if user.is_active != "true":
+    if not user.is_active:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User account is deactivated")
     
+    user_cache.put(token, user, expires_at=payload.get("exp"))
     return user
 
 
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
+    return await _authenticate_token(token)
+
+
+async def get_current_user_from_query(
+    bearer_token: Optional[str] = Depends(optional_oauth2_scheme),
+    token: Optional[str] = Query(None, description="JWT for clients that cannot set headers (EventSource)")
+) -> User:
+    """Like get_current_user, but also accepts the token as a ?token= query parameter."""
+    return await _authenticate_token(bearer_token or token)
+
+
 # API Endpoints
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    existing_user = await db.scalar(select(User.id).where(User.email == user_data.email))
     if existing_user:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
     
     new_user = User(
         email=user_data.email,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=await get_password_hash(user_data.password),
         full_name=user_data.full_name,
         role=user_data.role,
-        is_active="true"
+        is_active=True
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
     return new_user
 
 
 @router.post("/login", response_model=Token)
-async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == form_data.username).first()
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    user = await db.scalar(select(User).where(User.email == form_data.username))
     
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    valid, new_hash = await verify_password(form_data.password, user.hashed_password) if user else (False, None)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    if user.is_active != "true":
+    if not user.is_active:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User account is deactivated")
     
+    # Upgrade hashes made with older Argon2 parameters
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+    
     access_token = create_access_token(data={"sub": user.id, "email": user.email})
     
     return Token(
@@ -170,7 +204,7 @@ def require_admin(current_user: User = Depends(get_current_user)):
 
 
 @router.get("/users", response_model=list[UserResponse])
-async def get_all_users(
+def get_all_users(
     admin: User = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
@@ -180,7 +214,7 @@ async def get_all_users(
 
 
 @router.patch("/users/{user_id}/role")
-async def update_user_role(
+def update_user_role(
     user_id: str,
     role: UserRole,
     admin: User = Depends(require_admin),
@@ -194,6 +228,7 @@ async def update_user_role(
     user.role = role
     db.commit()
     db.refresh(user)
+    user_cache.invalidate_user(user.id)
     return {"message": f"User role updated to {role.value}", "user": UserResponse.model_validate(user)}
 
 
@@ -201,23 +236,35 @@ async def update_user_role(
 async def delete_user(
     user_id: str,
     admin: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a user (Admin only)"""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
     if user.id == admin.id:
         raise HTTPException(status_code=400, detail="Cannot delete yourself")
     
-    db.delete(user)
-    db.commit()
+    def delete_rows(session):
+        # Stored files are released once the rows are gone
+        file_paths = storage_service.get_user_file_paths(session, user.id)
+        
+        stats_service.record_user_deleted(session, user.id)
+        session.delete(user)
+        return file_paths
+    
+    file_paths = await db.run_sync(delete_rows)
+    await db.commit()
+    user_cache.invalidate_user(user_id)
+    
+    for file_path in file_paths:
+        await storage_service.delete_file(file_path)
     return {"message": "User deleted successfully"}
 
 
 @router.post("/make-admin/{email}")
-async def make_first_admin(email: str, db: Session = Depends(get_db)):
+def make_first_admin(email: str, db: Session = Depends(get_db)):
     """
     Make a user admin by email.
     Only works if there are no admins in the system (for initial setup).
@@ -237,5 +284,6 @@ async def make_first_admin(email: str, db: Session = Depends(get_db)):
     user.role = UserRole.ADMIN
     db.commit()
     db.refresh(user)
+    user_cache.invalidate_user(user.id)
     return {"message": f"{email} is now an admin!", "user": UserResponse.model_validate(user)}
 
@@ -3,17 +3,29 @@ History API endpoints for SPINEVISION-AI.
 Provides access to user's upload and analysis history.
 """
 
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+import base64
+import json
+import time
+from collections import OrderedDict
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime
 
-from app.database import get_db, User, Upload, Result
+from app.database import get_async_db, User, Upload
 from app.api.auth import get_current_user
-from app.services import storage_service
+from app.config import get_settings
+from app.services import storage_service, export_service, stats_service
 
 router = APIRouter(prefix="/history", tags=["History"])
+settings = get_settings()
+
+# Totals for ?count=cached, keyed by (user_id, status_filter)
+_TOTAL_CACHE_MAX_ENTRIES = 1024
+_total_cache: "OrderedDict[Tuple[str, Optional[str]], Tuple[float, int]]" = OrderedDict()
 
 
 class HistoryItem(BaseModel):
@@ -26,15 +38,23 @@ class HistoryItem(BaseModel):
     confidence_score: Optional[float] = None
     heatmap_url: Optional[str] = None
     report_url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    heatmap_thumbnail_url: Optional[str] = None
 
 
 class HistoryResponse(BaseModel):
-    """Schema for history response with pagination."""
+    """
+    Schema for history response with pagination.
+    
+    total/total_pages are None with ?count=none. next_cursor is set when
+    more items follow and can be passed back as ?cursor= for the next page.
+    """
     items: List[HistoryItem]
-    total: int
+    total: Optional[int]
     page: int
     page_size: int
-    total_pages: int
+    total_pages: Optional[int]
+    next_cursor: Optional[str] = None
 
 
 class StatisticsResponse(BaseModel):
@@ -45,34 +65,96 @@ class StatisticsResponse(BaseModel):
     pending_count: int
 
 
+def _encode_cursor(upload: Upload) -> str:
+    """Opaque cursor pointing just after an upload in newest-first order."""
+    raw = json.dumps([upload.created_at.isoformat(), upload.id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, upload_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), str(upload_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+async def _count_uploads(db: AsyncSession, filters: list) -> int:
+    return await db.scalar(select(func.count()).select_from(Upload).where(*filters))
+
+
+async def _cached_total(db: AsyncSession, filters: list, key: Tuple[str, Optional[str]]) -> int:
+    """Count matching uploads, reusing a recent count for the same user and filter."""
+    now = time.monotonic()
+    cached = _total_cache.get(key)
+    if cached and cached[0] > now:
+        return cached[1]
+    
+    total = await _count_uploads(db, filters)
+    _total_cache[key] = (now + settings.HISTORY_COUNT_CACHE_SECONDS, total)
+    _total_cache.move_to_end(key)
+    while len(_total_cache) > _TOTAL_CACHE_MAX_ENTRIES:
+        _total_cache.popitem(last=False)
+    return total
+
+
 @router.get("", response_model=HistoryResponse)
 async def get_history(
-    page: int = Query(1, ge=1, description="Page number"),
+    page: int = Query(1, ge=1, description="Page number (ignored when a cursor is given)"),
     page_size: int = Query(10, ge=1, le=50, description="Items per page"),
     status_filter: Optional[str] = Query(None, description="Filter by status"),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    count: str = Query("exact", pattern="^(exact|cached|none)$", description="How to compute total: exact, cached or none"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Get the upload history for the current user.
     
-    - Supports pagination
+    - Supports page-number pagination and cursor (keyset) pagination;
+      cursors stay fast on deep pages as they never skip rows
     - Optional filtering by status
+    - total can be exact, cached for HISTORY_COUNT_CACHE_SECONDS, or skipped
     - Returns most recent uploads first
     """
-    # Base query
-    query = db.query(Upload).filter(Upload.user_id == current_user.id)
+    # Base filters
+    filters = [Upload.user_id == current_user.id]
     
     # Apply status filter if provided
     if status_filter:
-        query = query.filter(Upload.status == status_filter)
+        filters.append(Upload.status == status_filter)
     
     # Get total count
-    total = query.count()
+    if count == "exact":
+        total = await _count_uploads(db, filters)
+    elif count == "cached":
+        total = await _cached_total(db, filters, (current_user.id, status_filter))
+    else:
+        total = None
+    
+    # Newest first; id breaks ties between uploads with the same timestamp
+    query = select(Upload).where(*filters).order_by(Upload.created_at.desc(), Upload.id.desc())
     
-    # Apply pagination
-    offset = (page - 1) * page_size
-    uploads = query.order_by(Upload.created_at.desc()).offset(offset).limit(page_size).all()
+    # Apply pagination, fetching one extra row to know whether more follow
+    if cursor:
+        cursor_created_at, cursor_id = _decode_cursor(cursor)
+        query = query.where(or_(
+            Upload.created_at < cursor_created_at,
+            and_(Upload.created_at == cursor_created_at, Upload.id < cursor_id)
+        ))
+    else:
+        query = query.offset((page - 1) * page_size)
+    query = query.options(joinedload(Upload.result)).limit(page_size + 1)
+    uploads = (await db.execute(query)).scalars().all()
+    
+    next_cursor = None
+    if len(uploads) > page_size:
+        uploads = uploads[:page_size]
+        next_cursor = _encode_cursor(uploads[-1])
     
     # Build response items
     items = []
@@ -85,46 +167,41 @@ async def get_history(
             status=upload.status.value,
             uploaded_at=upload.created_at,
             overall_classification=result.overall_classification if result else None,
-            confidence_score=float(result.confidence_score) if result and result.confidence_score else None,
+            confidence_score=result.confidence_score if result else None,
             heatmap_url=storage_service.get_file_url(result.heatmap_path) if result and result.heatmap_path else None,
-            report_url=storage_service.get_file_url(result.report_path) if result and result.report_path else None
+            report_url=storage_service.get_file_url(result.report_path) if result and result.report_path else None,
+            thumbnail_url=storage_service.get_file_url(result.thumbnail_path) if result and result.thumbnail_path else None,
+            heatmap_thumbnail_url=(
+                storage_service.get_file_url(result.heatmap_thumbnail_path)
+                if result and result.heatmap_thumbnail_path else None
+            )
         ))
     
-    total_pages = (total + page_size - 1) // page_size
+    total_pages = (total + page_size - 1) // page_size if total is not None else None
     
     return HistoryResponse(
         items=items,
         total=total,
         page=page,
         page_size=page_size,
-        total_pages=total_pages
+        total_pages=total_pages,
+        next_cursor=next_cursor
     )
 
 
 @router.get("/statistics", response_model=StatisticsResponse)
 async def get_statistics(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Get statistics about the user's uploads and results.
     """
-    # Get all uploads for user
-    uploads = db.query(Upload).filter(Upload.user_id == current_user.id).all()
-    
-    total_uploads = len(uploads)
-    normal_count = 0
-    abnormal_count = 0
-    pending_count = 0
-    
-    for upload in uploads:
-        if upload.status.value in ['uploaded', 'processing']:
-            pending_count += 1
-        elif upload.result:
-            if 'Normal' in upload.result.overall_classification:
-                normal_count += 1
-            else:
-                abnormal_count += 1
+    counts = await db.run_sync(stats_service.get_counts, "user", current_user.id)
+    total_uploads = counts.get("total", 0)
+    normal_count = counts.get("normal", 0)
+    abnormal_count = counts.get("abnormal", 0)
+    pending_count = counts.get("pending", 0)
     
     return StatisticsResponse(
         total_uploads=total_uploads,
@@ -134,35 +211,58 @@ async def get_statistics(
     )
 
 
+@router.get("/export")
+async def export_history(
+    format: str = Query("zip", pattern="^(zip|ndjson|csv)$", description="zip, ndjson or csv"),
+    manifest: str = Query("ndjson", pattern="^(ndjson|csv)$", description="Manifest format inside a ZIP"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Export all of the current user's results.
+    
+    - zip: manifest plus every PDF report and heatmap
+    - ndjson / csv: manifest of result rows only
+    
+    The response is streamed, so exports of any size use constant memory.
+    """
+    return export_service.stream_export(current_user.id, format, manifest_format=manifest)
+
+
 @router.delete("/{upload_id}")
 async def delete_upload(
     upload_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Delete an upload and its associated results.
     """
-    upload = db.query(Upload).filter(
+    upload = await db.scalar(select(Upload).options(joinedload(Upload.result)).where(
         Upload.id == upload_id,
         Upload.user_id == current_user.id
-    ).first()
+    ))
     
     if not upload:
         return {"error": "Upload not found"}
     
-    # Delete associated files
-    if upload.file_path:
-        storage_service.delete_file(upload.file_path)
-    
+    # Collect associated files
+    file_paths = [upload.file_path]
     if upload.result:
-        if upload.result.heatmap_path:
-            storage_service.delete_file(upload.result.heatmap_path)
-        if upload.result.report_path:
-            storage_service.delete_file(upload.result.report_path)
+        file_paths += [
+            upload.result.heatmap_path,
+            upload.result.thumbnail_path,
+            upload.result.heatmap_thumbnail_path,
+            upload.result.report_path
+        ]
     
     # Delete from database (cascades to result)
-    db.delete(upload)
-    db.commit()
+    await db.run_sync(stats_service.record_upload_deleted, upload)
+    await db.delete(upload)
+    await db.commit()
+    
+    # After the commit, so files shared with other uploads of the same
+    # image are only removed once their last row is gone
+    for file_path in filter(None, file_paths):
+        await storage_service.delete_file(file_path)
     
     return {"message": "Upload deleted successfully", "upload_id": upload_id}
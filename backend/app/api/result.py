@@ -4,16 +4,15 @@ Provides access to AI analysis results.
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime
-from pathlib import Path
 
-from app.database import get_db, User, Upload, Result
+from app.database import get_async_db, User, Upload, Result
 from app.api.auth import get_current_user
-from app.services import storage_service
+from app.services import storage_service, report_service
 
 router = APIRouter(prefix="/result", tags=["Results"])
 
@@ -47,10 +46,23 @@ class ResultDetailResponse(BaseModel):
     upload_info: dict
 
 
+def _report_input(result: Result) -> dict:
+    """Rebuild the analysis result dictionary the report is rendered from."""
+    return {
+        "id": result.id,
+        "overall": result.overall_classification,
+        "model_version": result.model_version,
+        "predictions": result.predictions or [],
+        "confidence_score": result.confidence_score or 0.0,
+        "heatmap_path": result.heatmap_path or "",
+        "processed_at": result.processed_at.isoformat() if result.processed_at else None,
+    }
+
+
 @router.get("/{upload_id}", response_model=ResultDetailResponse)
 async def get_result(
     upload_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -64,10 +76,10 @@ async def get_result(
     - Downloadable report URL
     """
     # Get upload and verify ownership
-    upload = db.query(Upload).filter(
+    upload = await db.scalar(select(Upload).where(
         Upload.id == upload_id,
         Upload.user_id == current_user.id
-    ).first()
+    ))
     
     if not upload:
         raise HTTPException(
@@ -76,7 +88,7 @@ async def get_result(
         )
     
     # Get associated result
-    result = db.query(Result).filter(Result.upload_id == upload_id).first()
+    result = await db.scalar(select(Result).where(Result.upload_id == upload_id))
     
     if not result:
         raise HTTPException(
@@ -90,7 +102,7 @@ async def get_result(
             upload_id=result.upload_id,
             model_version=result.model_version,
             overall_classification=result.overall_classification,
-            confidence_score=float(result.confidence_score) if result.confidence_score else None,
+            confidence_score=result.confidence_score,
             predictions=result.predictions,
             heatmap_url=storage_service.get_file_url(result.heatmap_path) if result.heatmap_path else None,
             report_url=storage_service.get_file_url(result.report_path) if result.report_path else None,
@@ -107,30 +119,29 @@ async def get_result(
 @router.get("/{upload_id}/heatmap")
 async def get_heatmap(
     upload_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Download the heatmap visualization image."""
     # Verify upload ownership
-    upload = db.query(Upload).filter(
+    upload = await db.scalar(select(Upload).where(
         Upload.id == upload_id,
         Upload.user_id == current_user.id
-    ).first()
+    ))
     
     if not upload:
         raise HTTPException(status_code=404, detail="Upload not found")
     
-    result = db.query(Result).filter(Result.upload_id == upload_id).first()
+    result = await db.scalar(select(Result).where(Result.upload_id == upload_id))
     
     if not result or not result.heatmap_path:
         raise HTTPException(status_code=404, detail="Heatmap not found")
     
-    heatmap_path = Path(result.heatmap_path)
-    if not heatmap_path.exists():
+    if not await storage_service.file_exists(result.heatmap_path):
         raise HTTPException(status_code=404, detail="Heatmap file not found")
     
-    return FileResponse(
-        path=str(heatmap_path),
+    return storage_service.file_response(
+        result.heatmap_path,
         media_type="image/png",
         filename=f"heatmap_{upload_id}.png"
     )
@@ -139,30 +150,45 @@ async def get_heatmap(
 @router.get("/{upload_id}/report")
 async def get_report(
     upload_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Download the PDF diagnostic report."""
     # Verify upload ownership
-    upload = db.query(Upload).filter(
+    upload = await db.scalar(select(Upload).where(
         Upload.id == upload_id,
         Upload.user_id == current_user.id
-    ).first()
+    ))
     
     if not upload:
         raise HTTPException(status_code=404, detail="Upload not found")
     
-    result = db.query(Result).filter(Result.upload_id == upload_id).first()
+    result = await db.scalar(select(Result).where(Result.upload_id == upload_id))
     
-    if not result or not result.report_path:
+    if not result:
         raise HTTPException(status_code=404, detail="Report not found")
     
-    report_path = Path(result.report_path)
-    if not report_path.exists():
-        raise HTTPException(status_code=404, detail="Report file not found")
+    report_path = result.report_path
+    if not report_path or not await storage_service.file_exists(report_path):
+        # Built on first download (LAZY_REPORTS) or after the file was removed
+        try:
+            report_path = await report_service.get_or_generate_report(
+                _report_input(result),
+                upload_id,
+                {"doctor_name": current_user.full_name}
+            )
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Report generation failed: {str(e)}"
+            )
+        
+        if result.report_path != report_path:
+            result.report_path = report_path
+            await db.commit()
     
-    return FileResponse(
-        path=str(report_path),
+    return storage_service.file_response(
+        report_path,
         media_type="application/pdf",
         filename=f"SPINEVISION_Report_{upload_id}.pdf"
     )
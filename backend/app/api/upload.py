@@ -3,16 +3,22 @@ Upload API endpoints for SPINEVISION-AI.
 Handles X-ray image uploads and triggers AI processing.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from sqlalchemy.orm import Session
-from pydantic import BaseModel
-from typing import Optional
-from datetime import datetime
+import asyncio
+import json
+import uuid
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Request, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime, timedelta
 
 from app.config import get_settings
-from app.database import get_db, User, Upload, Result, UploadStatus
-from app.api.auth import get_current_user
-from app.services import storage_service, ml_service, report_service
+from app.database import get_async_db, User, Upload, UploadSession, UploadStatus
+from app.api.auth import get_current_user, get_current_user_from_query
+from app.services import storage_service, job_queue, event_bus, stats_service
 
 settings = get_settings()
 router = APIRouter(prefix="/upload", tags=["Upload"])
@@ -41,13 +47,133 @@ class UploadWithResultResponse(BaseModel):
     predictions: Optional[list] = None
     heatmap_url: Optional[str] = None
     report_url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    heatmap_thumbnail_url: Optional[str] = None
     processed_at: Optional[datetime] = None
 
 
-@router.post("", response_model=UploadWithResultResponse)
+class BatchUploadResponse(BaseModel):
+    """Schema for batch upload status."""
+    batch_id: str
+    total: int
+    completed: int
+    failed: int
+    pending: int
+    uploads: List[UploadWithResultResponse]
+
+
+class UploadSessionCreate(BaseModel):
+    """Schema for starting a resumable upload."""
+    file_name: str
+    file_size: int = Field(..., gt=0, description="Total file size in bytes")
+    content_type: Optional[str] = None
+
+
+class UploadSessionResponse(BaseModel):
+    """Schema for resumable upload session state."""
+    session_id: str
+    file_name: str
+    file_size: int
+    received: int
+    chunk_size: int
+    created_at: datetime
+
+
+async def _create_and_enqueue_uploads(
+    db: AsyncSession,
+    user_id: str,
+    file_infos: List[dict],
+    batch_id: Optional[str] = None
+) -> List[Upload]:
+    """
+    Create Upload rows for stored files in one transaction and queue them
+    for analysis as a single job.
+    
+    Raises:
+        HTTPException 503: If the analysis queue is full; the rows and files
+            are removed so the client can simply retry
+    """
+    uploads = [
+        Upload(
+            user_id=user_id,
+            file_name=file_info["file_name"],
+            file_path=file_info["file_path"],
+            file_type=file_info["file_type"],
+            file_size=file_info["file_size"],
+            content_hash=file_info["content_hash"],
+            batch_id=batch_id,
+            status=UploadStatus.UPLOADED,
+            result=None  # Known to be empty; avoids a lazy load in _upload_response
+        )
+        for file_info in file_infos
+    ]
+    
+    def record(session, record_change):
+        for upload in uploads:
+            record_change(session, upload)
+    
+    try:
+        db.add_all(uploads)
+        await db.flush()
+        await db.run_sync(record, stats_service.record_upload_created)
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        for file_info in file_infos:
+            await storage_service.discard_upload(file_info["file_path"])
+        raise
+    
+    # The committed rows now hold the blob references
+    for file_info in file_infos:
+        await storage_service.release_pending(file_info["file_path"])
+    
+    try:
+        job_queue.enqueue_many([upload.id for upload in uploads])
+    except (asyncio.QueueFull, RuntimeError):
+        await db.run_sync(record, stats_service.record_upload_deleted)
+        for upload in uploads:
+            await db.delete(upload)
+        await db.commit()
+        for upload in uploads:
+            await storage_service.delete_file(upload.file_path)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Analysis queue is full. Please try again shortly."
+        )
+    
+    for upload in uploads:
+        event_bus.publish_stage(user_id, upload.id, "uploaded")
+    
+    return uploads
+
+
+def _upload_response(upload: Upload) -> UploadWithResultResponse:
+    """Build the status/result response for an upload."""
+    result = upload.result
+    
+    return UploadWithResultResponse(
+        upload_id=upload.id,
+        file_name=upload.file_name,
+        status=upload.status.value,
+        overall_classification=result.overall_classification if result else None,
+        confidence_score=result.confidence_score if result else None,
+        model_version=result.model_version if result else None,
+        predictions=result.predictions if result else None,
+        heatmap_url=storage_service.get_file_url(result.heatmap_path) if result and result.heatmap_path else None,
+        report_url=storage_service.get_file_url(result.report_path) if result and result.report_path else None,
+        thumbnail_url=storage_service.get_file_url(result.thumbnail_path) if result and result.thumbnail_path else None,
+        heatmap_thumbnail_url=(
+            storage_service.get_file_url(result.heatmap_thumbnail_path)
+            if result and result.heatmap_thumbnail_path else None
+        ),
+        processed_at=result.processed_at if result else None
+    )
+
+
+@router.post("", response_model=UploadWithResultResponse, status_code=status.HTTP_202_ACCEPTED)
 async def upload_xray(
     file: UploadFile = File(..., description="X-ray image file (PNG, JPG, DICOM)"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -55,89 +181,311 @@ async def upload_xray(
     
     - Accepts PNG, JPG, JPEG, and DICOM files
     - Maximum file size: 50MB
-    - Triggers automatic AI processing
-    - Returns analysis results with heatmap and report
+    - Queues the image for background AI processing
+    - Returns immediately with status "uploaded"; poll GET /upload/{upload_id}
+      for the analysis results, heatmap and report
     """
     # Save file to storage
-    file_info = await storage_service.save_upload(file, current_user.id)
+    file_info = await storage_service.save_upload(file)
     
-    # Create upload record
-    upload = Upload(
-        user_id=current_user.id,
-        file_name=file_info["file_name"],
-        file_path=file_info["file_path"],
-        file_type=file_info["file_type"],
-        file_size=file_info["file_size"],
-        status=UploadStatus.PROCESSING
-    )
+    upload = (await _create_and_enqueue_uploads(db, current_user.id, [file_info]))[0]
     
-    db.add(upload)
-    db.commit()
-    db.refresh(upload)
+    return _upload_response(upload)
+
+
+@router.post("/batch", response_model=BatchUploadResponse, status_code=status.HTTP_202_ACCEPTED)
+async def upload_xray_batch(
+    files: List[UploadFile] = File(..., description="X-ray views of one study (PNG, JPG, DICOM)"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Upload several X-ray images (e.g. AP, lateral, flexion/extension views)
+    in one request.
     
-    try:
-        # Run AI analysis
-        analysis_result = await ml_service.analyze_xray(
-            file_info["file_path"],
-            upload.id
+    - All Upload rows are created in a single transaction
+    - The images are analyzed together so inference can be batched
+    - Poll GET /upload/batch/{batch_id} for per-file progress
+    """
+    if len(files) > settings.MAX_BATCH_FILES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A batch may contain at most {settings.MAX_BATCH_FILES} files"
         )
-        
-        # Generate PDF report
-        report_path = await report_service.generate_report(
-            analysis_result,
-            upload.id,
-            {"doctor_name": current_user.full_name}
+    
+    # Save every file first so a bad file rejects the whole batch
+    file_infos = []
+    try:
+        for file in files:
+            file_infos.append(await storage_service.save_upload(file))
+    except Exception as e:
+        # Whatever failed, release the files already stored
+        for file_info in file_infos:
+            await storage_service.discard_upload(file_info["file_path"])
+        if isinstance(e, HTTPException):
+            raise HTTPException(
+                status_code=e.status_code,
+                detail=f"{files[len(file_infos)].filename}: {e.detail}"
+            )
+        raise
+    
+    batch_id = str(uuid.uuid4())
+    uploads = await _create_and_enqueue_uploads(db, current_user.id, file_infos, batch_id)
+    
+    return BatchUploadResponse(
+        batch_id=batch_id,
+        total=len(uploads),
+        completed=0,
+        failed=0,
+        pending=len(uploads),
+        uploads=[_upload_response(upload) for upload in uploads]
+    )
+
+
+@router.get("/batch/{batch_id}", response_model=BatchUploadResponse)
+async def get_batch_status(
+    batch_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get per-file progress and results for a batch upload."""
+    uploads = (await db.execute(
+        select(Upload).options(joinedload(Upload.result)).where(
+            Upload.batch_id == batch_id,
+            Upload.user_id == current_user.id
+        ).order_by(Upload.created_at)
+    )).scalars().all()
+    
+    if not uploads:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Batch not found"
         )
-        
-        # Create result record
-        result = Result(
-            upload_id=upload.id,
-            model_version=analysis_result["model_version"],
-            overall_classification=analysis_result["overall"],
-            predictions=analysis_result["predictions"],
-            confidence_score=str(analysis_result["confidence_score"]),
-            heatmap_path=analysis_result.get("heatmap_path", ""),
-            report_path=report_path
+    
+    completed = sum(1 for upload in uploads if upload.status == UploadStatus.DONE)
+    failed = sum(1 for upload in uploads if upload.status == UploadStatus.FAILED)
+    
+    return BatchUploadResponse(
+        batch_id=batch_id,
+        total=len(uploads),
+        completed=completed,
+        failed=failed,
+        pending=len(uploads) - completed - failed,
+        uploads=[_upload_response(upload) for upload in uploads]
+    )
+
+
+# ============================================================================
+# Resumable Uploads
+# ============================================================================
+
+async def _get_session(db: AsyncSession, session_id: str, user_id: str) -> UploadSession:
+    session = await db.scalar(select(UploadSession).where(
+        UploadSession.id == session_id,
+        UploadSession.user_id == user_id
+    ))
+    
+    if not session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload session not found"
         )
-        
-        db.add(result)
-        upload.status = UploadStatus.DONE
-        db.commit()
-        db.refresh(result)
-        
-        return UploadWithResultResponse(
-            upload_id=upload.id,
-            file_name=upload.file_name,
-            status=upload.status.value,
-            overall_classification=result.overall_classification,
-            confidence_score=float(result.confidence_score) if result.confidence_score else None,
-            model_version=result.model_version,
-            predictions=result.predictions,
-            heatmap_url=storage_service.get_file_url(result.heatmap_path) if result.heatmap_path else None,
-            report_url=storage_service.get_file_url(result.report_path) if result.report_path else None,
-            processed_at=result.processed_at
+    
+    # Sessions started before chunks were stored through the backend have
+    # no received offset; their data stayed on one instance's disk
+    expired = session.created_at < datetime.utcnow() - timedelta(hours=settings.RESUMABLE_SESSION_TTL_HOURS)
+    if expired or session.received is None:
+        await storage_service.discard_partial_upload(db, session.id)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload session expired"
         )
-        
-    except Exception as e:
-        upload.status = UploadStatus.FAILED
-        db.commit()
+    return session
+
+
+def _session_response(session: UploadSession, received: Optional[int] = None) -> UploadSessionResponse:
+    return UploadSessionResponse(
+        session_id=session.id,
+        file_name=session.file_name,
+        file_size=session.file_size,
+        received=session.received if received is None else received,
+        chunk_size=settings.RESUMABLE_CHUNK_SIZE,
+        created_at=session.created_at
+    )
+
+
+@router.post("/sessions", response_model=UploadSessionResponse, status_code=status.HTTP_201_CREATED)
+async def create_upload_session(
+    session_data: UploadSessionCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Start a resumable upload for a large file.
+    
+    Send the file with PUT /upload/sessions/{session_id}?offset=N in any
+    number of chunks, then call POST /upload/sessions/{session_id}/complete.
+    After a dropped connection, GET the session to find where to resume.
+    Sessions not completed within RESUMABLE_SESSION_TTL_HOURS are discarded.
+    """
+    is_valid, error_msg = storage_service.validate_file_info(
+        session_data.file_name, session_data.content_type
+    )
+    if not is_valid:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error_msg)
+    
+    if session_data.file_size > settings.MAX_FILE_SIZE:
+        raise storage_service.file_too_large_error()
+    
+    # Abandoned sessions are swept as new ones start
+    await storage_service.expire_partial_uploads()
+    
+    session = UploadSession(
+        user_id=current_user.id,
+        file_name=session_data.file_name,
+        file_type=session_data.content_type,
+        file_size=session_data.file_size,
+        received=0
+    )
+    db.add(session)
+    await db.commit()
+    
+    return _session_response(session)
+
+
+@router.get("/sessions/{session_id}", response_model=UploadSessionResponse)
+async def get_upload_session(
+    session_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get a resumable upload's received offset."""
+    session = await _get_session(db, session_id, current_user.id)
+    return _session_response(session)
+
+
+@router.put("/sessions/{session_id}", response_model=UploadSessionResponse)
+async def upload_session_chunk(
+    session_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0, description="Byte offset of this chunk"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Append a chunk (raw request body) at the given offset.
+    
+    Returns 409 with the expected offset in the message if the offset does
+    not match the bytes already received.
+    """
+    session = await _get_session(db, session_id, current_user.id)
+    # Return the connection to the pool while the chunk streams in
+    await db.close()
+    
+    received = await storage_service.append_chunk(session, offset, request.stream())
+    
+    return _session_response(session, received)
+
+
+@router.post("/sessions/{session_id}/complete", response_model=UploadWithResultResponse, status_code=status.HTTP_202_ACCEPTED)
+async def complete_upload_session(
+    session_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Finalize a resumable upload and queue it for AI analysis."""
+    session = await _get_session(db, session_id, current_user.id)
+    
+    file_info = await storage_service.finalize_partial_upload(session)
+    
+    # Only one of concurrent completions (on any instance) records the upload
+    if not await storage_service.discard_partial_upload(db, session.id):
+        await storage_service.discard_upload(file_info["file_path"])
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"AI processing failed: {str(e)}"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload session not found"
         )
+    
+    upload = (await _create_and_enqueue_uploads(db, current_user.id, [file_info]))[0]
+    
+    return _upload_response(upload)
+
+
+@router.delete("/sessions/{session_id}")
+async def abort_upload_session(
+    session_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Abort a resumable upload and discard the received data."""
+    session = await _get_session(db, session_id, current_user.id)
+    
+    await storage_service.discard_partial_upload(db, session.id)
+    
+    return {"message": "Upload session aborted", "session_id": session_id}
+
+
+# ============================================================================
+# Progress Events
+# ============================================================================
+
+# Interval between keep-alive comments on idle event streams
+EVENT_STREAM_KEEPALIVE_SECONDS = 15
+
+
+@router.get("/events")
+async def stream_upload_events(
+    request: Request,
+    upload_id: Optional[str] = Query(None, description="Only stream events for this upload"),
+    current_user: User = Depends(get_current_user_from_query)
+):
+    """
+    Server-sent event stream of processing progress for the user's uploads.
+    
+    Each `upload` event carries JSON with upload_id, status
+    (uploaded/processing/done/failed), stage (preprocess, inference,
+    heatmap, report) and progress percentage. Events are pushed from the
+    pipeline in-process, so an open stream costs no database queries.
+    
+    EventSource clients can pass the JWT as ?token=.
+    """
+    user_id = current_user.id
+    queue = event_bus.subscribe(user_id)
+    
+    async def event_stream():
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), EVENT_STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                
+                if upload_id and event["upload_id"] != upload_id:
+                    continue
+                yield f"event: upload\ndata: {json.dumps(event)}\n\n"
+        finally:
+            event_bus.unsubscribe(user_id, queue)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.get("/{upload_id}", response_model=UploadWithResultResponse)
 async def get_upload_status(
     upload_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get the status and results of a specific upload."""
-    upload = db.query(Upload).filter(
+    upload = await db.scalar(select(Upload).options(joinedload(Upload.result)).where(
         Upload.id == upload_id,
         Upload.user_id == current_user.id
-    ).first()
+    ))
     
     if not upload:
         raise HTTPException(
@@ -145,17 +493,4 @@ async def get_upload_status(
             detail="Upload not found"
         )
     
-    result = upload.result
-    
-    return UploadWithResultResponse(
-        upload_id=upload.id,
-        file_name=upload.file_name,
-        status=upload.status.value,
-        overall_classification=result.overall_classification if result else None,
-        confidence_score=float(result.confidence_score) if result and result.confidence_score else None,
-        model_version=result.model_version if result else None,
-        predictions=result.predictions if result else None,
-        heatmap_url=storage_service.get_file_url(result.heatmap_path) if result and result.heatmap_path else None,
-        report_url=storage_service.get_file_url(result.report_path) if result and result.report_path else None,
-        processed_at=result.processed_at if result else None
-    )
+    return _upload_response(upload)
@@ -3,18 +3,30 @@ Database package initialization.
 Exports commonly used database components.
 """
 
-from app.database.db import Base, engine, SessionLocal, get_db, init_db
-from app.database.models import User, Upload, Result, UserRole, UploadStatus
+from app.database.db import (
+    Base, engine, async_engine, SessionLocal, AsyncSessionLocal, get_db, get_async_db, init_db
+)
+from app.database.models import (
+    User, Upload, Result, Finding, UploadSession, UploadChunk, StatCounter, BlobClaim, UserRole, UploadStatus
+)
 
 __all__ = [
     "Base",
     "engine", 
+    "async_engine",
     "SessionLocal",
+    "AsyncSessionLocal",
     "get_db",
+    "get_async_db",
     "init_db",
     "User",
     "Upload",
     "Result",
+    "Finding",
+    "UploadSession",
+    "UploadChunk",
+    "StatCounter",
+    "BlobClaim",
     "UserRole",
     "UploadStatus",
 ]
@@ -1,9 +1,16 @@
 """
 Database connection and session management for SPINEVISION-AI.
 Uses SQLAlchemy ORM with support for both SQLite and PostgreSQL.
+
+Two engines share DATABASE_URL: a synchronous one for background jobs,
+scripts and admin endpoints, and an async one (aiosqlite / asyncpg) for
+the request hot paths, so their queries do not block the event loop.
 """
 
-from sqlalchemy import create_engine
+from sqlalchemy import MetaData, String, create_engine, inspect, insert, make_url, select, text
+from sqlalchemy.engine import URL
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.schema import CreateTable
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import get_settings
@@ -11,28 +18,77 @@ from app.config import get_settings
 # Get settings
 settings = get_settings()
 
+# Async drivers used for each database backend
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def _async_url(url: URL) -> URL:
+    """Same database as url, through the backend's async driver."""
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        return url
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+
+def _pool_options(url: URL) -> dict:
+    """Pool settings; in-memory SQLite keeps SQLAlchemy's single-connection pool."""
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+database_url = make_url(settings.DATABASE_URL)
+
 # Create database engine
 # check_same_thread is only needed for SQLite
 connect_args = {}
-if settings.DATABASE_URL.startswith("sqlite"):
+if database_url.get_backend_name() == "sqlite":
     connect_args["check_same_thread"] = False
 
 engine = create_engine(
-    settings.DATABASE_URL,
+    database_url,
     connect_args=connect_args,
-    echo=settings.DEBUG  # Log SQL queries in debug mode
+    echo=settings.DEBUG,  # Log SQL queries in debug mode
+    **_pool_options(database_url)
+)
+
+async_engine = create_async_engine(
+    _async_url(database_url),
+    echo=settings.DEBUG,
+    **_pool_options(database_url)
 )
 
-# Create session factory
+# Create session factories
 SessionLocal = sessionmaker(
     autocommit=False,
     autoflush=False,
     bind=engine
 )
 
+# Objects stay readable after commit; lazy loads are not available on
+# async sessions, so load relationships eagerly or use run_sync()
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # Base class for all models
 Base = declarative_base()
 
+# Results read per round trip while backfilling findings
+FINDINGS_BACKFILL_BATCH = 1000
+
 
 def get_db():
     """
@@ -51,6 +107,19 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """
+    Dependency providing an AsyncSession for async endpoints.
+    
+    Usage in FastAPI:
+        @app.get("/items")
+        async def get_items(db: AsyncSession = Depends(get_async_db)):
+            items = (await db.execute(select(Item))).scalars().all()
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def init_db():
     """
     Initialize the database by creating all tables.
@@ -60,4 +129,136 @@ def init_db():
     from app.database import models  # noqa: F401
     
     Base.metadata.create_all(bind=engine)
+    _upgrade_existing_tables()
+    _backfill_findings()
     print("✓ Database tables created successfully")
+
+
+def _upgrade_existing_tables():
+    """
+    Bring tables created by an older version up to date with the models.
+    
+    create_all() only creates missing tables, so new (nullable) columns
+    and indexes added to existing models are applied here, and columns
+    that used to be stored as strings are converted to their typed form.
+    """
+    inspector = inspect(engine)
+    
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            
+            existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing_columns:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    conn.execute(text(
+                        f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"
+                    ))
+                    print(f"✓ Added column {table.name}.{column.name}")
+            
+            string_columns = {
+                column["name"] for column in inspector.get_columns(table.name)
+                if isinstance(column["type"], String)
+            }
+            retyped = [
+                column for column in table.columns
+                if column.name in string_columns and _python_type(column) in (bool, int, float)
+            ]
+            if retyped:
+                _convert_columns(conn, table, retyped)
+            
+            for index in table.indexes:
+                index.create(bind=conn, checkfirst=True)
+
+
+def _python_type(column):
+    try:
+        return column.type.python_type
+    except NotImplementedError:
+        return None
+
+
+def _conversion_expression(column) -> str:
+    """SQL turning a legacy string value of the column into its typed value."""
+    if _python_type(column) is bool:
+        return f"lower({column.name}) IN ('true', '1', 't', 'yes')"
+    column_type = column.type.compile(dialect=engine.dialect)
+    return f"CAST(NULLIF({column.name}, '') AS {column_type})"
+
+
+def _convert_columns(conn, table, columns):
+    """
+    Convert string columns of an existing table to the model's types.
+    
+    PostgreSQL alters the columns in place. SQLite cannot change a column
+    type, so the table is rebuilt: a copy is created with the new types,
+    the rows are copied across, and the copy replaces the original.
+    """
+    dialect = engine.dialect.name
+    names = ", ".join(column.name for column in columns)
+    
+    if dialect == "postgresql":
+        for column in columns:
+            column_type = column.type.compile(dialect=engine.dialect)
+            conn.execute(text(
+                f"ALTER TABLE {table.name} ALTER COLUMN {column.name} "
+                f"TYPE {column_type} USING {_conversion_expression(column)}"
+            ))
+    elif dialect == "sqlite":
+        # Copy with the referenced tables so its foreign keys resolve
+        metadata = MetaData()
+        for other in Base.metadata.sorted_tables:
+            if other is not table:
+                other.to_metadata(metadata)
+        new_table = table.to_metadata(metadata, name=f"_new_{table.name}")
+        
+        retyped = {column.name for column in columns}
+        select_list = ", ".join(
+            _conversion_expression(column) if column.name in retyped else column.name
+            for column in table.columns
+        )
+        column_list = ", ".join(column.name for column in table.columns)
+        
+        conn.execute(CreateTable(new_table))
+        conn.execute(text(
+            f"INSERT INTO {new_table.name} ({column_list}) SELECT {select_list} FROM {table.name}"
+        ))
+        conn.execute(text(f"DROP TABLE {table.name}"))
+        conn.execute(text(f"ALTER TABLE {new_table.name} RENAME TO {table.name}"))
+    else:
+        print(f"⚠ Columns {table.name}({names}) are stored as strings; convert them manually")
+        return
+    
+    print(f"✓ Converted column types of {table.name}({names})")
+
+
+def _backfill_findings():
+    """
+    Fill the findings table from Result.predictions for results stored
+    before findings existed. Runs only while the table is empty.
+    """
+    from app.database.models import Finding, Result
+    
+    with engine.begin() as conn:
+        if conn.execute(select(Finding.result_id).limit(1)).first() is not None:
+            return
+        if conn.execute(select(Result.id).limit(1)).first() is None:
+            return
+        
+        count = 0
+        rows = conn.execution_options(yield_per=FINDINGS_BACKFILL_BATCH).execute(
+            select(Result.id, Result.predictions)
+        )
+        for batch in rows.partitions():
+            findings = [
+                {"result_id": result_id, "label": finding.label, "probability": finding.probability}
+                for result_id, predictions in batch
+                for finding in Finding.from_predictions(predictions)
+            ]
+            if findings:
+                conn.execute(insert(Finding), findings)
+                count += len(findings)
+    
+    print(f"✓ Backfilled {count} findings")
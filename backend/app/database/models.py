@@ -7,9 +7,10 @@ import uuid
 from datetime import datetime
 from sqlalchemy import (
     Column, String, DateTime, ForeignKey, 
-    Enum, Text, JSON
+    Enum, Text, JSON, Integer, BigInteger, Boolean, Float, Index
 )
 from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
 from app.database.db import Base
 import enum
@@ -59,10 +60,11 @@ class User(Base):
         nullable=False
     )
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    is_active = Column(String(5), default="true", nullable=False)
+    is_active = Column(Boolean, default=True, nullable=False)
     
     # Relationship to uploads
     uploads = relationship("Upload", back_populates="user", cascade="all, delete-orphan")
+    upload_sessions = relationship("UploadSession", cascade="all, delete-orphan")
     
     def __repr__(self):
         return f"<User(id={self.id}, email={self.email}, role={self.role})>"
@@ -76,20 +78,30 @@ class Upload(Base):
         id: Unique identifier (UUID)
         user_id: Foreign key to User
         file_name: Original filename
-        file_path: Path to stored file
+        file_path: Storage key of the stored file (shared blob)
         file_type: MIME type of the file
         file_size: Size in bytes
+        content_hash: SHA-256 hex digest of the file contents
+        batch_id: Shared ID of uploads submitted together via /upload/batch
         status: Processing status
         created_at: Upload timestamp
     """
     __tablename__ = "uploads"
+    __table_args__ = (
+        # Per-user history, newest first
+        Index("ix_uploads_user_id_created_at", "user_id", "created_at"),
+        # Admin listings and counts by status
+        Index("ix_uploads_status_created_at", "status", "created_at"),
+    )
     
     id = Column(String(36), primary_key=True, default=generate_uuid)
     user_id = Column(String(36), ForeignKey("users.id"), nullable=False)
     file_name = Column(String(255), nullable=False)
     file_path = Column(String(500), nullable=False)
     file_type = Column(String(50), nullable=True)
-    file_size = Column(String(20), nullable=True)  # Stored as string for compatibility
+    file_size = Column(BigInteger, nullable=True)
+    content_hash = Column(String(64), nullable=True, index=True)
+    batch_id = Column(String(36), nullable=True, index=True)
     status = Column(
         Enum(UploadStatus), 
         default=UploadStatus.UPLOADED, 
@@ -115,8 +127,11 @@ class Result(Base):
         model_version: Version of the ML model used
         overall_classification: Overall diagnosis (Normal/Abnormal)
         predictions: JSON array of prediction results
-        heatmap_path: Path to generated heatmap image
-        report_path: Path to generated PDF report
+        confidence_score: Overall confidence (0-1)
+        heatmap_path: Storage key of the generated heatmap image
+        thumbnail_path: Storage key of the preview of the original image
+        heatmap_thumbnail_path: Storage key of the preview of the heatmap
+        report_path: Storage key of the generated PDF report
         processed_at: Timestamp when processing completed
     """
     __tablename__ = "results"
@@ -126,13 +141,169 @@ class Result(Base):
     model_version = Column(String(50), nullable=False)
     overall_classification = Column(String(50), nullable=False)  # Normal / Abnormal
     predictions = Column(JSON, nullable=False)  # Array of {label, probability}
-    confidence_score = Column(String(10), nullable=True)  # Overall confidence
+    confidence_score = Column(Float, nullable=True)  # Overall confidence
     heatmap_path = Column(String(500), nullable=True)
+    thumbnail_path = Column(String(500), nullable=True)
+    heatmap_thumbnail_path = Column(String(500), nullable=True)
     report_path = Column(String(500), nullable=True)
     processed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     
-    # Relationship
+    # Relationships
     upload = relationship("Upload", back_populates="result")
+    findings = relationship("Finding", back_populates="result", cascade="all, delete-orphan")
+    
+    @hybrid_property
+    def is_normal(self):
+        """
+        Whether the overall classification is Normal.
+        Usable in queries too, e.g. func.count(case((Result.is_normal, 1))).
+        """
+        return self.overall_classification.startswith("Normal")
     
     def __repr__(self):
         return f"<Result(id={self.id}, classification={self.overall_classification})>"
+
+
+class Finding(Base):
+    """
+    One condition probability of a result, normalized out of
+    Result.predictions so cohort queries (e.g. every scan with
+    Spondylolisthesis above 0.5) can run in the database.
+    
+    Attributes:
+        result_id: Foreign key to Result
+        label: Condition name
+        probability: Predicted probability (0-1)
+    """
+    __tablename__ = "findings"
+    __table_args__ = (
+        Index("ix_findings_label_probability", "label", "probability"),
+    )
+    
+    result_id = Column(String(36), ForeignKey("results.id"), primary_key=True)
+    label = Column(String(100), primary_key=True)
+    probability = Column(Float, nullable=False)
+    
+    # Relationship
+    result = relationship("Result", back_populates="findings")
+    
+    @classmethod
+    def from_predictions(cls, predictions: list) -> list:
+        """Build Finding rows from a predictions list ({label, probability, ...})."""
+        probabilities = {}
+        for prediction in predictions or []:
+            if prediction.get("label") is not None and prediction.get("probability") is not None:
+                probabilities[prediction["label"]] = float(prediction["probability"])
+        return [cls(label=label, probability=p) for label, p in probabilities.items()]
+    
+    def __repr__(self):
+        return f"<Finding(result_id={self.result_id}, label={self.label}, probability={self.probability})>"
+
+
+class UploadSession(Base):
+    """
+    Resumable upload session for large files sent in chunks.
+    
+    The chunks received so far are stored through the storage backend
+    (UploadChunk), so any API instance can accept the next chunk or
+    complete the upload. received only advances with a conditional
+    update from the offset a chunk was written at, which serialises
+    chunk writes across instances.
+    
+    Attributes:
+        id: Unique identifier (UUID)
+        user_id: Foreign key to User
+        file_name: Original filename
+        file_type: MIME type of the file
+        file_size: Declared total size in bytes
+        received: Bytes received so far
+        created_at: Session creation timestamp
+    """
+    __tablename__ = "upload_sessions"
+    
+    id = Column(String(36), primary_key=True, default=generate_uuid)
+    user_id = Column(String(36), ForeignKey("users.id"), nullable=False, index=True)
+    file_name = Column(String(255), nullable=False)
+    file_type = Column(String(50), nullable=True)
+    file_size = Column(BigInteger, nullable=False)
+    received = Column(BigInteger, default=0, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    # Relationship
+    chunks = relationship(
+        "UploadChunk",
+        cascade="all, delete-orphan",
+        order_by="UploadChunk.offset"
+    )
+    
+    def __repr__(self):
+        return f"<UploadSession(id={self.id}, file_name={self.file_name})>"
+
+
+class UploadChunk(Base):
+    """
+    One chunk of a resumable upload, kept by the storage backend until the
+    session is completed or discarded.
+    
+    Attributes:
+        session_id: Foreign key to UploadSession
+        offset: Byte offset of the chunk in the file
+        size: Chunk length in bytes
+        key: Storage key of the chunk's data
+    """
+    __tablename__ = "upload_chunks"
+    
+    session_id = Column(String(36), ForeignKey("upload_sessions.id"), primary_key=True)
+    offset = Column(BigInteger, primary_key=True)
+    size = Column(BigInteger, nullable=False)
+    key = Column(String(500), nullable=False)
+    
+    def __repr__(self):
+        return f"<UploadChunk(session_id={self.session_id}, offset={self.offset}, size={self.size})>"
+
+
+class StatCounter(Base):
+    """
+    Rollup counter maintained alongside Upload/Result changes so that
+    dashboards read a handful of rows instead of scanning uploads.
+    
+    Attributes:
+        scope: "global", "user" or "day"
+        key: "all", the user ID, or the upload date (YYYY-MM-DD, UTC)
+        name: Counter name (total, pending, done, failed, normal, abnormal,
+            or condition:<label> for findings with probability >= 0.5)
+        value: Current count
+    """
+    __tablename__ = "stat_counters"
+    
+    scope = Column(String(10), primary_key=True)
+    key = Column(String(36), primary_key=True)
+    name = Column(String(100), primary_key=True)
+    value = Column(BigInteger, default=0, nullable=False)
+    
+    def __repr__(self):
+        return f"<StatCounter({self.scope}/{self.key}/{self.name}={self.value})>"
+
+
+class BlobClaim(Base):
+    """
+    Uploads in flight that rely on a stored blob before their Upload row
+    is committed. Shared by every API instance, so a blob another
+    instance is about to reference is never deleted.
+    
+    The row is also the lock serialising claims and deletes of a blob:
+    StorageService updates it first in both, so they never interleave.
+    
+    Attributes:
+        key: Storage key of the blob
+        claims: Uploads of this blob not yet committed
+        updated_at: Last claim or release
+    """
+    __tablename__ = "blob_claims"
+    
+    key = Column(String(500), primary_key=True)
+    claims = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f"<BlobClaim({self.key}, claims={self.claims})>"
@@ -20,9 +20,10 @@ import os
 # (Removed bcrypt patch as we use Argon2 now)
 
 from app.config import get_settings, ensure_storage_directories
-from app.database import init_db
+from app.database import init_db, async_engine
 from app.api import auth_router, upload_router, result_router, history_router
 from app.api.admin import router as admin_router
+from app.services import job_queue, pipeline_service, ml_service, report_service, stats_service, password_service, storage_service, storage_backend
 
 settings = get_settings()
 
@@ -34,9 +35,23 @@ async def lifespan(app: FastAPI):
     print("=" * 50)
     ensure_storage_directories()
     init_db()
+    stats_service.initialize()
+    ml_service.start()
+    report_service.start()
+    password_service.start()
+    await job_queue.start(pipeline_service.process_upload)
+    pipeline_service.recover_pending()
+    expired = await storage_service.expire_partial_uploads()
+    if expired:
+        print(f"✓ Discarded {expired} expired upload session(s)")
     print("\n✅ Backend ready!")
     yield
     print("\n🛑 SPINEVISION-AI Backend Shutting down...")
+    await job_queue.stop()
+    ml_service.shutdown()
+    report_service.shutdown()
+    password_service.shutdown()
+    await async_engine.dispose()
 
 
 # Create FastAPI application
@@ -119,10 +134,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Mount static files for storage access
-import os
-os.makedirs("storage", exist_ok=True)
-app.mount("/storage", StaticFiles(directory="storage"), name="storage")
+# Mount static files for storage access; remote backends serve presigned URLs instead
+if storage_backend.name == "local":
+    os.makedirs("storage", exist_ok=True)
+    app.mount("/storage", StaticFiles(directory="storage"), name="storage")
 
 # Include API routers
 app.include_router(auth_router)
@@ -3,15 +3,42 @@ Services package initialization.
 Exports service instances for use throughout the application.
 """
 
+from app.services.storage_backends import storage_backend, StorageBackend
 from app.services.storage_service import storage_service, StorageService
 from app.services.ml_service import ml_service, MLService
 from app.services.report_service import report_service, ReportService
+from app.services.job_queue import job_queue, JobQueue
+from app.services.result_cache import result_cache, ResultCache
+from app.services.user_cache import user_cache, UserCache
+from app.services.password_service import password_service, PasswordService
+from app.services.event_bus import event_bus, EventBus
+from app.services.stats_service import stats_service, StatsService
+from app.services.pipeline_service import pipeline_service, PipelineService
+from app.services.export_service import export_service, ExportService
 
 __all__ = [
+    "storage_backend",
+    "StorageBackend",
     "storage_service",
     "StorageService",
     "ml_service", 
     "MLService",
     "report_service",
     "ReportService",
+    "job_queue",
+    "JobQueue",
+    "result_cache",
+    "ResultCache",
+    "user_cache",
+    "UserCache",
+    "password_service",
+    "PasswordService",
+    "event_bus",
+    "EventBus",
+    "stats_service",
+    "StatsService",
+    "pipeline_service",
+    "PipelineService",
+    "export_service",
+    "ExportService",
 ]
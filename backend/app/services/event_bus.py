@@ -0,0 +1,100 @@
+"""
+Event Bus for SPINEVISION-AI.
+In-process publish/subscribe of upload status events, used to push
+processing progress to clients without polling the database.
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, Optional, Set
+
+# Progress percentage reported for each pipeline stage
+STAGE_PROGRESS = {
+    "uploaded": 0,
+    "processing": 5,
+    "preprocess": 10,
+    "inference": 40,
+    "heatmap": 70,
+    "report": 85,
+    "done": 100,
+    "failed": 100,
+}
+
+# Events buffered per subscriber before new ones are dropped
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class EventBus:
+    """
+    Per-user fan-out of upload events to subscriber queues.
+
+    Publishing never blocks: a subscriber that falls behind by more than
+    SUBSCRIBER_QUEUE_SIZE events misses the newest ones rather than
+    stalling the pipeline. Idle subscribers cost one queue each.
+
+    Usage:
+        queue = event_bus.subscribe(user_id)
+        event_bus.publish_stage(user_id, upload_id, "inference")
+        event = await queue.get()
+        event_bus.unsubscribe(user_id, queue)
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+    def subscribe(self, user_id: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.setdefault(user_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: str, queue: asyncio.Queue):
+        queues = self._subscribers.get(user_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[user_id]
+
+    def publish(self, user_id: str, event: Dict[str, Any]):
+        """Deliver an event to every subscriber of the user."""
+        for queue in self._subscribers.get(user_id, ()):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                pass
+
+    def publish_stage(
+        self,
+        user_id: str,
+        upload_id: str,
+        stage: str,
+        error: Optional[str] = None
+    ):
+        """
+        Publish a pipeline stage transition for an upload.
+
+        Args:
+            stage: uploaded, processing, preprocess, inference, heatmap,
+                report, done or failed
+        """
+        if user_id not in self._subscribers:
+            return
+
+        event = {
+            "upload_id": upload_id,
+            "status": stage if stage in ("uploaded", "done", "failed") else "processing",
+            "stage": stage,
+            "progress": STAGE_PROGRESS.get(stage, 0),
+            "timestamp": datetime.utcnow().isoformat(),
+        }
+        if error:
+            event["error"] = error
+        self.publish(user_id, event)
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+
+# Create singleton instance
+event_bus = EventBus()
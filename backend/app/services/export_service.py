@@ -0,0 +1,290 @@
+"""
+Export Service for SPINEVISION-AI.
+Streams analysis results as NDJSON/CSV manifests or as a ZIP archive of
+reports and heatmaps, without loading the whole result set into memory.
+"""
+
+import csv
+import io
+import json
+import tempfile
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Generator, Iterator, Optional
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, or_
+
+from app.database import SessionLocal, Upload, Result
+from app.services.storage_service import storage_service
+
+# Rows read per keyset page; each page uses its own short-lived session
+EXPORT_PAGE_SIZE = 500
+
+# Report and heatmap files are copied into the archive in chunks of this size
+EXPORT_CHUNK_SIZE = 1024 * 1024
+
+# A ZIP's manifest is kept in memory up to this size, then spilled to disk
+EXPORT_MANIFEST_SPOOL_SIZE = 4 * 1024 * 1024
+
+EXPORT_MEDIA_TYPES = {
+    "zip": "application/zip",
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+MANIFEST_FIELDS = [
+    "result_id",
+    "upload_id",
+    "user_id",
+    "file_name",
+    "uploaded_at",
+    "processed_at",
+    "model_version",
+    "overall_classification",
+    "confidence_score",
+    "predictions",
+    "heatmap_file",
+    "report_file",
+]
+
+
+class _StreamBuffer(io.RawIOBase):
+    """
+    Write-only, non-seekable sink for zipfile.
+
+    zipfile falls back to data descriptors when it cannot seek, so every
+    entry can be written in one pass. Written bytes are collected until
+    the generator drains them with take().
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        # zipfile records entry offsets with tell(); seek() stays unsupported
+        return self._position
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class ExportService:
+    """
+    Streams Result rows for one user or the whole clinic.
+
+    The response body is produced after the request's session has been
+    closed, so exports read their rows themselves: in keyset pages of
+    EXPORT_PAGE_SIZE, each in its own session that is closed before the
+    page is streamed. Memory stays flat regardless of how many results
+    exist, and no read transaction stays open while a slow client
+    downloads (on SQLite that would hold up other writers). Only results
+    processed before the export started are included.
+
+    Usage:
+        return export_service.stream_export(user_id, "zip", manifest_format="csv")
+        return export_service.stream_export(None, "ndjson")  # whole clinic
+    """
+
+    def stream_export(
+        self,
+        user_id: Optional[str],
+        export_format: str = "zip",
+        manifest_format: str = "ndjson"
+    ) -> StreamingResponse:
+        """
+        Build the streaming download response for an export.
+
+        Args:
+            user_id: Owner whose results are exported, or None for all users
+            export_format: zip, ndjson or csv
+            manifest_format: ndjson or csv, for the manifest inside a ZIP
+        """
+        if export_format == "zip":
+            body = self.iter_zip(user_id, manifest_format)
+        elif export_format == "csv":
+            body = self.iter_csv(user_id)
+        else:
+            body = self.iter_ndjson(user_id)
+
+        filename = f"spinevision_export_{datetime.utcnow():%Y%m%d_%H%M%S}.{export_format}"
+        return StreamingResponse(
+            body,
+            media_type=EXPORT_MEDIA_TYPES[export_format],
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+        )
+
+    def _iter_results(self, user_id: Optional[str], until: datetime) -> Iterator[tuple]:
+        """Yield (Result, Upload) pairs oldest first, one keyset page at a time."""
+        after = None
+        while True:
+            db = SessionLocal()
+            try:
+                query = db.query(Result, Upload).join(Upload, Result.upload_id == Upload.id).filter(
+                    Result.processed_at <= until
+                )
+                if user_id:
+                    query = query.filter(Upload.user_id == user_id)
+                if after:
+                    # processed_at is not unique; id breaks ties
+                    query = query.filter(or_(
+                        Result.processed_at > after[0],
+                        and_(Result.processed_at == after[0], Result.id > after[1])
+                    ))
+                page = query.order_by(Result.processed_at, Result.id).limit(EXPORT_PAGE_SIZE).all()
+            finally:
+                # Detaches the rows; their loaded columns stay readable
+                db.close()
+
+            yield from page
+            if len(page) < EXPORT_PAGE_SIZE:
+                return
+            last_result = page[-1][0]
+            after = (last_result.processed_at, last_result.id)
+
+    def _manifest_row(
+        self,
+        result: Result,
+        upload: Upload,
+        heatmap_file: Optional[str] = None,
+        report_file: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Manifest entry for a result.
+
+        heatmap_file/report_file are the paths of the files inside a ZIP
+        archive, or None when they were not included.
+        """
+        return {
+            "result_id": result.id,
+            "upload_id": upload.id,
+            "user_id": upload.user_id,
+            "file_name": upload.file_name,
+            "uploaded_at": upload.created_at.isoformat() if upload.created_at else None,
+            "processed_at": result.processed_at.isoformat() if result.processed_at else None,
+            "model_version": result.model_version,
+            "overall_classification": result.overall_classification,
+            "confidence_score": result.confidence_score,
+            "predictions": result.predictions or [],
+            "heatmap_file": heatmap_file,
+            "report_file": report_file,
+        }
+
+    @staticmethod
+    def _ndjson_line(row: Dict[str, Any]) -> str:
+        return json.dumps(row) + "\n"
+
+    @staticmethod
+    def _csv_header() -> str:
+        return ",".join(MANIFEST_FIELDS) + "\r\n"
+
+    @staticmethod
+    def _csv_line(row: Dict[str, Any]) -> str:
+        buffer = io.StringIO()
+        csv.DictWriter(buffer, fieldnames=MANIFEST_FIELDS).writerow(
+            {**row, "predictions": json.dumps(row["predictions"])}
+        )
+        return buffer.getvalue()
+
+    def iter_ndjson(self, user_id: Optional[str] = None) -> Iterator[bytes]:
+        """Stream the manifest as newline-delimited JSON, one result per line."""
+        for result, upload in self._iter_results(user_id, datetime.utcnow()):
+            yield self._ndjson_line(self._manifest_row(result, upload)).encode()
+
+    def iter_csv(self, user_id: Optional[str] = None) -> Iterator[bytes]:
+        """Stream the manifest as CSV; predictions are JSON-encoded."""
+        yield self._csv_header().encode()
+        for result, upload in self._iter_results(user_id, datetime.utcnow()):
+            yield self._csv_line(self._manifest_row(result, upload)).encode()
+
+    def iter_zip(self, user_id: Optional[str] = None, manifest_format: str = "ndjson") -> Iterator[bytes]:
+        """
+        Stream a ZIP archive with the reports and heatmaps and a manifest.
+
+        Layout:
+            reports/<upload_id>.pdf
+            heatmaps/<upload_id>.png
+            manifest.ndjson (or manifest.csv)
+
+        Results are read in a single pass, stopping at results processed
+        before the export started. Each file is opened once as it is copied
+        into the archive, and the manifest records whether that succeeded,
+        so it is written last. Reports not yet built (LAZY_REPORTS) and
+        files missing from storage are listed as null.
+        """
+        for chunk in self._zip_chunks(user_id, manifest_format):
+            if chunk:
+                yield chunk
+
+    def _zip_chunks(self, user_id: Optional[str], manifest_format: str) -> Iterator[bytes]:
+        """Archive bytes as they are produced; chunks may be empty."""
+        until = datetime.utcnow()
+        sink = _StreamBuffer()
+
+        # PDFs and PNGs are already compressed; only the manifest is deflated
+        with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED, allowZip64=True) as archive, \
+                tempfile.SpooledTemporaryFile(max_size=EXPORT_MANIFEST_SPOOL_SIZE) as manifest_lines:
+            if manifest_format == "csv":
+                manifest_lines.write(self._csv_header().encode())
+
+            for result, upload in self._iter_results(user_id, until):
+                report_file = heatmap_file = None
+                if result.report_path:
+                    name = f"reports/{upload.id}.pdf"
+                    if (yield from self._write_file(archive, sink, result.report_path, name)):
+                        report_file = name
+                if result.heatmap_path:
+                    name = f"heatmaps/{upload.id}{Path(result.heatmap_path).suffix}"
+                    if (yield from self._write_file(archive, sink, result.heatmap_path, name)):
+                        heatmap_file = name
+
+                row = self._manifest_row(result, upload, heatmap_file=heatmap_file, report_file=report_file)
+                line = self._csv_line(row) if manifest_format == "csv" else self._ndjson_line(row)
+                manifest_lines.write(line.encode())
+
+            manifest_info = zipfile.ZipInfo(f"manifest.{manifest_format}", date_time=until.timetuple()[:6])
+            manifest_info.compress_type = zipfile.ZIP_DEFLATED
+            manifest_lines.seek(0)
+            with archive.open(manifest_info, mode="w", force_zip64=True) as manifest:
+                while chunk := manifest_lines.read(EXPORT_CHUNK_SIZE):
+                    manifest.write(chunk)
+                    yield sink.take()
+            yield sink.take()
+
+        yield sink.take()
+
+    def _write_file(
+        self,
+        archive: zipfile.ZipFile,
+        sink: _StreamBuffer,
+        source: str,
+        name: str
+    ) -> Generator[bytes, None, bool]:
+        """Copy a file into the archive chunk by chunk; returns False if it does not exist."""
+        try:
+            source_file = storage_service.open_file(source)
+        except OSError:
+            return False
+
+        with source_file, archive.open(name, mode="w", force_zip64=True) as entry:
+            while chunk := source_file.read(EXPORT_CHUNK_SIZE):
+                entry.write(chunk)
+                yield sink.take()
+        yield sink.take()
+        return True
+
+
+# Create singleton instance
+export_service = ExportService()
@@ -0,0 +1,181 @@
+"""
+Job Queue for SPINEVISION-AI.
+In-process background queue that drives the upload -> analysis -> report
+pipeline outside of the HTTP request.
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from app.config import get_settings
+
+settings = get_settings()
+
+
+class Job:
+    """
+    Represents a queued processing job.
+
+    A job holds one upload, or several uploads from a batch request that
+    are processed concurrently so their inference calls can be batched.
+    """
+
+    def __init__(self, upload_ids: List[str]):
+        self.upload_ids = upload_ids
+        self.enqueued_at = time.monotonic()
+        self.started_at: Optional[float] = None
+
+
+class JobQueue:
+    """
+    Bounded asyncio queue with a fixed pool of worker tasks.
+
+    Uploads are tracked by ID; enqueueing an upload that is already pending
+    or running is a no-op so retries and startup recovery are safe.
+
+    Usage:
+        await job_queue.start(handler)
+        job_queue.enqueue(upload_id)
+        job_queue.enqueue_many(upload_ids)
+        stats = job_queue.get_stats()
+    """
+
+    def __init__(self, concurrency: int, max_size: int):
+        self.concurrency = max(1, concurrency)
+        self.max_size = max_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._handler: Optional[Callable[[str], Awaitable[None]]] = None
+        self._pending: Dict[str, Job] = {}
+        self._active: Dict[str, Job] = {}
+        self._processed = 0
+        self._failed = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    async def start(self, handler: Callable[[str], Awaitable[None]]):
+        """Start the worker tasks. The handler is awaited once per job."""
+        if self.running:
+            return
+
+        self._handler = handler
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._workers = [
+            asyncio.create_task(self._worker(i), name=f"job-worker-{i}")
+            for i in range(self.concurrency)
+        ]
+        print(f"✓ Job queue started ({self.concurrency} workers)")
+
+    async def stop(self):
+        """Cancel the workers. Jobs still queued are dropped and recovered on next start."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+
+        self._workers = []
+        self._queue = None
+        self._pending.clear()
+        self._active.clear()
+
+    def enqueue(self, upload_id: str) -> bool:
+        """
+        Add an upload to the queue.
+
+        Returns:
+            True if queued, False if it was already pending or running
+
+        Raises:
+            asyncio.QueueFull: If the queue is at JOB_QUEUE_MAX_SIZE
+            RuntimeError: If the queue has not been started
+        """
+        return self.enqueue_many([upload_id]) == 1
+
+    def enqueue_many(self, upload_ids: List[str]) -> int:
+        """
+        Add several uploads as a single job; the handler runs for all of
+        them concurrently on one worker.
+
+        Returns:
+            Number of uploads queued (those already pending or running are skipped)
+
+        Raises:
+            asyncio.QueueFull: If the queue is at JOB_QUEUE_MAX_SIZE
+            RuntimeError: If the queue has not been started
+        """
+        if self._queue is None:
+            raise RuntimeError("Job queue is not running")
+
+        new_ids = [
+            upload_id for upload_id in dict.fromkeys(upload_ids)
+            if upload_id not in self._pending and upload_id not in self._active
+        ]
+        if not new_ids:
+            return 0
+
+        job = Job(new_ids)
+        self._queue.put_nowait(job)
+        for upload_id in new_ids:
+            self._pending[upload_id] = job
+        return len(new_ids)
+
+    async def _worker(self, worker_id: int):
+        """Pull jobs off the queue and run the handler until cancelled."""
+        while True:
+            job = await self._queue.get()
+            job.started_at = time.monotonic()
+            for upload_id in job.upload_ids:
+                self._pending.pop(upload_id, None)
+                self._active[upload_id] = job
+
+            try:
+                outcomes = await asyncio.gather(
+                    *(self._handler(upload_id) for upload_id in job.upload_ids),
+                    return_exceptions=True
+                )
+                for upload_id, outcome in zip(job.upload_ids, outcomes):
+                    if isinstance(outcome, asyncio.CancelledError):
+                        raise outcome
+                    if isinstance(outcome, Exception):
+                        self._failed += 1
+                        print(f"Job {upload_id} failed on worker {worker_id}: {outcome}")
+                    else:
+                        self._processed += 1
+            finally:
+                for upload_id in job.upload_ids:
+                    self._active.pop(upload_id, None)
+                self._queue.task_done()
+
+    def get_stats(self) -> dict:
+        """
+        Snapshot of queue depth and job age.
+
+        Returns:
+            Dictionary with queue depth, active jobs, ages in seconds
+            and lifetime processed/failed counters
+        """
+        now = time.monotonic()
+        # Dicts preserve insertion order, so the first pending job is the oldest
+        oldest_pending = next(iter(self._pending.values()), None)
+        oldest_active = min(
+            (job.started_at for job in self._active.values()),
+            default=None
+        )
+
+        return {
+            "running": self.running,
+            "workers": self.concurrency,
+            "queue_depth": len(self._pending),
+            "max_queue_size": self.max_size,
+            "active_jobs": len(self._active),
+            "oldest_job_age_seconds": round(now - oldest_pending.enqueued_at, 3) if oldest_pending else 0.0,
+            "longest_running_seconds": round(now - oldest_active, 3) if oldest_active else 0.0,
+            "processed": self._processed,
+            "failed": self._failed,
+        }
+
+
+# Create singleton instance
+job_queue = JobQueue(settings.WORKER_CONCURRENCY, settings.JOB_QUEUE_MAX_SIZE)
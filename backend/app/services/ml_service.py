@@ -11,15 +11,21 @@ Author: SPINEVISION-AI Team
 Version: 0.1 (Dummy Implementation)
 """
 
+import asyncio
+import multiprocessing
+import os
 import random
 import io
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Callable, Optional, Tuple, Union
 from datetime import datetime
-from PIL import Image, ImageDraw, ImageFilter
+from PIL import Image, features
 import numpy as np
 
 from app.config import get_settings
+from app.services.storage_service import storage_service
 
 settings = get_settings()
 
@@ -73,6 +79,231 @@ SPINE_CONDITIONS = [
 ]
 
 
+# Image pipeline parameters
+MODEL_INPUT_SIZE = 224
+HEATMAP_SIZE = 512
+HEATMAP_BLUR_RADIUS = 15
+HEATMAP_MAX_ALPHA = 80 / 255
+
+# Preview derivatives for history and dashboard lists; JPEG when Pillow lacks WebP
+THUMBNAIL_FORMAT = "webp" if settings.THUMBNAIL_FORMAT == "webp" and features.check("webp") else "jpeg"
+
+
+def _build_heatmap_lut() -> np.ndarray:
+    """
+    Build the 256-entry RGBA colormap used by the heatmap renderer.
+    
+    The colours of the original ellipse renderer: low activations are a
+    transparent orange, high activations red at HEATMAP_MAX_ALPHA
+    opacity. RGB is 0-255, alpha 0-1, all float32 so blending needs no
+    further conversion.
+    """
+    t = np.linspace(0.0, 1.0, 256, dtype=np.float32)
+    lut = np.empty((256, 4), dtype=np.float32)
+    lut[:, 0] = 255.0
+    lut[:, 1] = 100.0 * (1.0 - t)
+    lut[:, 2] = 0.0
+    lut[:, 3] = HEATMAP_MAX_ALPHA * t
+    return lut
+
+
+def _build_blur_matrix() -> np.ndarray:
+    """
+    Build the HEATMAP_SIZE x HEATMAP_SIZE matrix of a 1-D Gaussian blur
+    with standard deviation HEATMAP_BLUR_RADIUS (as PIL's GaussianBlur).
+    
+    Rows are normalised so edges are not darkened; blurring a map is two
+    matrix products, B @ map @ B.T.
+    """
+    coords = np.arange(HEATMAP_SIZE, dtype=np.float32)
+    offsets = (coords[:, None] - coords[None, :]) / HEATMAP_BLUR_RADIUS
+    # Cut off at 4 sigma; the far tail would only add denormals, which
+    # slow the matrix products down several times
+    weights = np.where(np.abs(offsets) <= 4.0, np.exp(-0.5 * offsets * offsets), 0.0)
+    return (weights / weights.sum(axis=1, keepdims=True)).astype(np.float32)
+
+
+def _build_heatmap_blend_table(lut: np.ndarray) -> np.ndarray:
+    """
+    Precompute the blended RGB of every (activation level, base gray)
+    pair, so rendering a heatmap is a single table lookup per pixel.
+    Row level * 256 + gray holds the colour for that pair.
+    """
+    alpha = lut[:, None, 3:4]
+    gray = np.arange(256, dtype=np.float32)[None, :, None]
+    blended = gray * (1.0 - alpha) + lut[:, None, :3] * alpha
+    return blended.astype(np.uint8).reshape(256 * 256, 3)
+
+
+HEATMAP_LUT = _build_heatmap_lut()
+HEATMAP_BLEND_TABLE = _build_heatmap_blend_table(HEATMAP_LUT)
+HEATMAP_BLUR_MATRIX = _build_blur_matrix()
+
+
+class DecodedImage:
+    """
+    An uploaded X-ray decoded once and shared by every pipeline stage.
+    
+    Attributes:
+        source_size: (width, height) of the original file
+        display: uint8 grayscale array at HEATMAP_SIZE x HEATMAP_SIZE
+        model_input: float32 grayscale array in [0, 1] at MODEL_INPUT_SIZE
+        thumbnail: Encoded preview of the original (THUMBNAIL_FORMAT)
+        heatmap_png: Rendered heatmap, set by analyze_xray
+    """
+    
+    def __init__(
+        self,
+        source_size: tuple,
+        display: np.ndarray,
+        model_input: np.ndarray,
+        thumbnail: Optional[bytes] = None
+    ):
+        self.source_size = source_size
+        self.display = display
+        self.model_input = model_input
+        self.thumbnail = thumbnail
+        self.heatmap_png: Optional[bytes] = None
+
+
+class Histogram:
+    """Simple bucketed (non-cumulative) histogram for size and latency metrics."""
+    
+    def __init__(self, buckets: List[float]):
+        self.buckets = sorted(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+    
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.count += 1
+        self.sum += value
+    
+    def snapshot(self) -> Dict[str, Any]:
+        labels = [f"<={bound:g}" for bound in self.buckets] + ["+Inf"]
+        return {
+            "buckets": dict(zip(labels, self.counts)),
+            "count": self.count,
+            "sum": round(self.sum, 3),
+            "mean": round(self.sum / self.count, 3) if self.count else 0.0,
+        }
+
+
+class _InferenceRequest:
+    """A single model input waiting to be batched."""
+    
+    def __init__(self, model_input: np.ndarray, future: asyncio.Future):
+        self.model_input = model_input
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+
+
+class BatchInferenceEngine:
+    """
+    Dynamic micro-batching for model inference.
+    
+    Concurrent predict() calls are collected until max_batch_size inputs
+    are queued or max_wait_ms has passed since the first one arrived, then
+    stacked into one (N, H, W) array and run through a single forward pass
+    in a worker thread. Results are scattered back to the awaiting callers.
+    
+    Usage:
+        engine = BatchInferenceEngine(forward_fn, max_batch_size=8, max_wait_ms=10)
+        predictions = await engine.predict(model_input)
+    """
+    
+    def __init__(
+        self,
+        forward: Callable[[np.ndarray], List[Any]],
+        max_batch_size: int,
+        max_wait_ms: float
+    ):
+        self.forward = forward
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.batch_size_histogram = Histogram(
+            [2 ** i for i in range(self.max_batch_size.bit_length())]
+        )
+        self.queue_wait_histogram = Histogram([1, 2, 5, 10, 25, 50, 100, 250, 500, 1000])
+    
+    def _ensure_running(self):
+        """Start the batching task on the current event loop if needed."""
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+    
+    def stop(self):
+        """Cancel the batching task and fail any requests still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        while self._queue is not None and not self._queue.empty():
+            request = self._queue.get_nowait()
+            if not request.future.done():
+                request.future.cancel()
+    
+    async def predict(self, model_input: np.ndarray) -> Any:
+        """Queue a single preprocessed input and wait for its result."""
+        self._ensure_running()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(_InferenceRequest(model_input, future))
+        return await future
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            
+            await self._dispatch(batch)
+    
+    async def _dispatch(self, batch: List[_InferenceRequest]):
+        """Run one forward pass for the batch and resolve each caller's future."""
+        now = time.perf_counter()
+        for request in batch:
+            self.queue_wait_histogram.observe((now - request.enqueued_at) * 1000)
+        self.batch_size_histogram.observe(len(batch))
+        
+        try:
+            inputs = np.stack([request.model_input for request in batch])
+            outputs = await asyncio.to_thread(self.forward, inputs)
+        except Exception as e:
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
+            return
+        
+        for request, output in zip(batch, outputs):
+            if not request.future.done():
+                request.future.set_result(output)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "batch_size": self.batch_size_histogram.snapshot(),
+            "queue_wait_ms": self.queue_wait_histogram.snapshot(),
+        }
+
+
 class MLService:
     """
     Machine Learning Service for spine X-ray analysis.
@@ -81,16 +312,33 @@ class MLService:
     The current implementation uses dummy predictions,but is designed to be
     easily replaced with a real deep learning model.
     
+    CPU-bound stages (image decoding, preprocessing, heatmap rendering) run
+    in a dedicated process pool so they never block the event loop.
+    
     Usage:
         ml_service = MLService()
-        result = await ml_service.analyze_xray(image_path, upload_id)
+        image = await ml_service.decode_image(await storage_service.get_image_source(upload.file_path))
+        result = await ml_service.analyze_xray(image, upload_id)
     """
     
     def __init__(self):
-        """Initialize the ML service."""
+        """
+        Initialize the ML service.
+        
+        The model is not loaded here: the API process loads it in start(),
+        where BatchInferenceEngine runs the forward pass. Pool workers only
+        decode and render images and never load it, so importing this
+        module (as spawned workers do) stays cheap and the model is held
+        in memory once.
+        """
         self.model_version = settings.MODEL_VERSION
         self.model_loaded = False
-        self._load_model()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.inference_engine = BatchInferenceEngine(
+            self._predict_batch,
+            settings.INFERENCE_MAX_BATCH_SIZE,
+            settings.INFERENCE_MAX_WAIT_MS
+        )
     
     def _load_model(self):
         """
@@ -113,42 +361,74 @@ class MLService:
         self.model_loaded = True
         print(f"✓ ML Service initialized (Model Version: {self.model_version})")
     
-    def _preprocess_image(self, image_path: str) -> Optional[np.ndarray]:
+    def _decode_image(self, source: Union[str, bytes]) -> Optional[DecodedImage]:
         """
-        Preprocess the X-ray image for model input.
+        Decode an uploaded X-ray once and derive every array the pipeline needs.
         
-        In the real implementation, this would:
-        1. Load and resize the image
-        2. Normalize pixel values
-        3. Apply any required transformations
-        4. Convert to tensor format
+        JPEGs are decoded at reduced scale via draft mode when the source is
+        much larger than the display size. The preview thumbnail is encoded
+        from the same decoded image.
         
         Args:
-            image_path: Path to the X-ray image
+            source: Path to the X-ray image, or its contents
             
         Returns:
-            Preprocessed image array/tensor
+            DecodedImage, or None if the file cannot be decoded
         """
         try:
-            # Load image
-            image = Image.open(image_path)
+            image = Image.open(io.BytesIO(source) if isinstance(source, bytes) else source)
+            source_size = image.size
+            image.draft('L', (HEATMAP_SIZE, HEATMAP_SIZE))
             
             # Convert to grayscale if needed (X-rays are typically grayscale)
             if image.mode != 'L':
                 image = image.convert('L')
             
-            # Resize to standard size (e.g., 224x224 for many models)
-            image = image.resize((224, 224))
+            display = np.asarray(image.resize((HEATMAP_SIZE, HEATMAP_SIZE)))
+            model_input = self._preprocess_image(image)
+            thumbnail = self._encode_thumbnail(image)
             
-            # Convert to numpy array and normalize
-            image_array = np.array(image) / 255.0
-            
-            return image_array
+            return DecodedImage(source_size, display, model_input, thumbnail)
             
         except Exception as e:
-            print(f"Error preprocessing image: {e}")
+            print(f"Error decoding image: {e}")
             return None
     
+    @staticmethod
+    def _encode_thumbnail(image: Image.Image) -> bytes:
+        """
+        Encode a preview of an image, at most THUMBNAIL_SIZE on its longest
+        side with the aspect ratio kept.
+        """
+        thumbnail = image.copy()
+        thumbnail.thumbnail((settings.THUMBNAIL_SIZE, settings.THUMBNAIL_SIZE))
+        
+        buffer = io.BytesIO()
+        thumbnail.save(buffer, THUMBNAIL_FORMAT.upper(), quality=settings.THUMBNAIL_QUALITY)
+        return buffer.getvalue()
+    
+    def _preprocess_image(self, image: Image.Image) -> np.ndarray:
+        """
+        Preprocess the X-ray image for model input.
+        
+        In the real implementation, this would:
+        1. Resize the image
+        2. Normalize pixel values
+        3. Apply any required transformations
+        4. Convert to tensor format
+        
+        Args:
+            image: Decoded grayscale X-ray
+            
+        Returns:
+            Preprocessed image array/tensor
+        """
+        # Resize to standard size (e.g., 224x224 for many models)
+        image = image.resize((MODEL_INPUT_SIZE, MODEL_INPUT_SIZE))
+        
+        # Convert to numpy array and normalize
+        return np.asarray(image, dtype=np.float32) / 255.0
+    
     def _generate_dummy_predictions(self) -> List[Dict[str, Any]]:
         """
         Generate realistic-looking dummy predictions.
@@ -180,6 +460,21 @@ class MLService:
         
         return predictions
     
+    def _predict_batch(self, batch: np.ndarray) -> List[List[Dict[str, Any]]]:
+        """
+        Run one forward pass over a stacked batch of preprocessed images.
+        
+        Args:
+            batch: float32 array of shape (N, MODEL_INPUT_SIZE, MODEL_INPUT_SIZE)
+            
+        Returns:
+            One prediction list per image, in batch order
+        """
+        # TODO: Replace with actual model inference
+        # with torch.no_grad():
+        #     outputs = self.model(torch.from_numpy(batch).unsqueeze(1))
+        return [self._generate_dummy_predictions() for _ in range(len(batch))]
+    
     def _determine_overall_classification(self, predictions: List[Dict]) -> tuple:
         """
         Determine the overall classification based on predictions.
@@ -212,7 +507,93 @@ class MLService:
         
         return classification, round(confidence, 2)
     
-    def _generate_heatmap(self, image_path: str, upload_id: str) -> str:
+    def _generate_dummy_activation(self) -> np.ndarray:
+        """
+        Generate a simulated activation map with random regions of interest.
+        
+        Each region is an ellipse whose activation rises from 0 at its
+        centre to 1 at its rim, later regions covering earlier ones, then
+        the map is Gaussian-blurred: the profile the original renderer drew
+        with one PIL ellipse per 2 px step, evaluated as array expressions.
+        
+        Returns:
+            float32 array of shape (HEATMAP_SIZE, HEATMAP_SIZE) in [0, 1]
+        """
+        num_regions = random.randint(2, 4)
+        ring = np.zeros((HEATMAP_SIZE, HEATMAP_SIZE), dtype=np.float32)
+        top, left, bottom, right = HEATMAP_SIZE, HEATMAP_SIZE, 0, 0
+        
+        for _ in range(num_regions):
+            # Random ellipse position (focus on spine area - center of image)
+            center_x = random.randint(180, 332)  # Center third of image
+            center_y = random.randint(100, 412)
+            width = random.randint(40, 100)
+            height = random.randint(60, 120)
+            
+            # Elliptical radius over the region's bounding box; 1 on the rim.
+            # Later regions are drawn over earlier ones.
+            y0, y1 = center_y - height // 2, center_y + height // 2 + 1
+            x0, x1 = center_x - width // 2, center_x + width // 2 + 1
+            dy = (np.arange(y0, y1, dtype=np.float32) - center_y) / (height / 2)
+            dx = (np.arange(x0, x1, dtype=np.float32) - center_x) / (width / 2)
+            radius = np.sqrt(dy[:, None] ** 2 + dx[None, :] ** 2)
+            np.copyto(ring[y0:y1, x0:x1], radius, where=radius <= 1.0)
+            
+            top, left = min(top, y0), min(left, x0)
+            bottom, right = max(bottom, y1), max(right, x1)
+        
+        # Blur; only the rows and columns the regions cover contribute
+        return (
+            HEATMAP_BLUR_MATRIX[:, top:bottom]
+            @ ring[top:bottom, left:right]
+            @ HEATMAP_BLUR_MATRIX[:, left:right].T
+        )
+    
+    @staticmethod
+    def _normalize_activation(activation: np.ndarray) -> np.ndarray:
+        """
+        Scale an activation map (e.g., Grad-CAM output at any resolution)
+        to [0, 1] and resize it to HEATMAP_SIZE x HEATMAP_SIZE.
+        """
+        activation = np.asarray(activation, dtype=np.float32).squeeze()
+        if activation.ndim != 2:
+            raise ValueError(f"Activation map must be 2-D, got shape {activation.shape}")
+        
+        if activation.shape != (HEATMAP_SIZE, HEATMAP_SIZE):
+            activation = np.asarray(
+                Image.fromarray(activation, mode='F').resize(
+                    (HEATMAP_SIZE, HEATMAP_SIZE), Image.BILINEAR
+                ),
+                dtype=np.float32
+            )
+        
+        low, high = float(activation.min()), float(activation.max())
+        if high - low < 1e-8:
+            return np.zeros_like(activation)
+        return (activation - low) / (high - low)
+    
+    @staticmethod
+    def _render_heatmap(base: np.ndarray, activation: np.ndarray) -> np.ndarray:
+        """
+        Colorize an activation map and alpha-blend it over the base image.
+        
+        Args:
+            base: uint8 grayscale array of shape (HEATMAP_SIZE, HEATMAP_SIZE)
+            activation: float array in [0, 1] of the same shape
+            
+        Returns:
+            uint8 RGB array of the blended heatmap
+        """
+        indices = np.clip(activation * 255.0, 0, 255).astype(np.uint16)
+        indices <<= 8
+        indices |= base
+        return np.take(HEATMAP_BLEND_TABLE, indices, axis=0)
+    
+    def _generate_heatmap(
+        self,
+        display: np.ndarray,
+        activation_map: Optional[np.ndarray] = None
+    ) -> Tuple[bytes, bytes]:
         """
         Generate a visualization heatmap showing areas of interest.
         
@@ -221,119 +602,174 @@ class MLService:
         - SHAP values
         - Attention maps
         
-        For now, generates a simple overlay visualization.
+        Pass the model's activation map to render it directly; without one
+        a simulated map is generated.
         
         Args:
-            image_path: Path to the original X-ray image
-            upload_id: Upload ID for naming the output file
+            display: 512px grayscale display version of the X-ray
+            activation_map: Optional 2-D activation array at any resolution
             
         Returns:
-            Path to the generated heatmap image
+            (PNG-encoded heatmap image, thumbnail of it)
         """
-        try:
-            # Load original image
-            original = Image.open(image_path).convert('RGBA')
-            original = original.resize((512, 512))
-            
-            # Create a red-yellow gradient overlay
-            overlay = Image.new('RGBA', original.size, (0, 0, 0, 0))
-            draw = ImageDraw.Draw(overlay)
-            
-            # Generate random "regions of interest" to simulate model attention
-            num_regions = random.randint(2, 4)
-            for _ in range(num_regions):
-                # Random ellipse position (focus on spine area - center of image)
-                center_x = random.randint(180, 332)  # Center third of image
-                center_y = random.randint(100, 412)
-                width = random.randint(40, 100)
-                height = random.randint(60, 120)
-                
-                # Draw gradient ellipse
-                for i in range(width, 0, -2):
-                    # Fade from red to yellow to transparent
-                    alpha = int(80 * (i / width))
-                    red = 255
-                    green = int(100 * (1 - i / width))
-                    
-                    draw.ellipse(
-                        [
-                            center_x - i // 2,
-                            center_y - (height * i // width) // 2,
-                            center_x + i // 2,
-                            center_y + (height * i // width) // 2
-                        ],
-                        fill=(red, green, 0, alpha)
-                    )
-            
-            # Blur the overlay for smoother gradients
-            overlay = overlay.filter(ImageFilter.GaussianBlur(radius=15))
-            
-            # Composite the overlay onto the original
-            result = Image.alpha_composite(original, overlay)
-            result = result.convert('RGB')
-            
-            # Save the heatmap
-            heatmap_filename = f"heatmap_{upload_id}.png"
-            heatmap_path = settings.HEATMAP_DIR / heatmap_filename
-            result.save(heatmap_path, 'PNG')
-            
-            return str(heatmap_path)
-            
-        except Exception as e:
-            print(f"Error generating heatmap: {e}")
-            # Return empty string if heatmap generation fails
-            return ""
+        if activation_map is None:
+            activation = self._generate_dummy_activation()
+        else:
+            activation = self._normalize_activation(activation_map)
+        
+        result = Image.fromarray(self._render_heatmap(display, activation))
+        
+        buffer = io.BytesIO()
+        result.save(buffer, 'PNG')
+        return buffer.getvalue(), self._encode_thumbnail(result)
     
-    async def analyze_xray(self, image_path: str, upload_id: str) -> Dict[str, Any]:
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """
+        Return the image processing pool, creating it on first use.
+        
+        Uses the spawn start method so workers never inherit the event loop
+        or open database connections of the API process.
+        """
+        if self._executor is None:
+            max_workers = settings.ML_PROCESS_WORKERS or os.cpu_count() or 1
+            self._executor = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            print(f"✓ ML process pool started ({max_workers} workers)")
+        return self._executor
+    
+    def start(self):
+        """
+        Load the model and start the process pool.
+        Should be called during application startup.
+        """
+        if not self.model_loaded:
+            self._load_model()
+        self._get_executor()
+    
+    def shutdown(self):
+        """
+        Stop the inference engine and process pool.
+        Should be called during application shutdown.
+        """
+        self.inference_engine.stop()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+    
+    async def _run_in_pool(self, func, *args):
+        """Run a module-level worker function in the process pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), func, *args)
+    
+    def get_inference_stats(self) -> Dict[str, Any]:
+        """Batch size and queue wait histograms for tuning latency vs throughput."""
+        return self.inference_engine.get_stats()
+    
+    async def decode_image(self, source: Union[str, bytes]) -> Optional[DecodedImage]:
+        """
+        Decode an uploaded X-ray in the process pool.
+        
+        Args:
+            source: Local path of the image, or its contents (see
+                storage_service.get_image_source)
+        
+        Returns:
+            DecodedImage to pass to analyze_xray and generate_report,
+            or None if the file cannot be decoded
+        """
+        return await self._run_in_pool(_decode_in_worker, source)
+    
+    async def analyze_xray(
+        self,
+        image: Union[str, bytes, DecodedImage, None],
+        upload_id: str,
+        on_stage: Optional[Callable[[str], None]] = None
+    ) -> Dict[str, Any]:
         """
         Perform AI analysis on an X-ray image.
         
         This is the main entry point for the ML pipeline.
         
         Args:
-            image_path: Path to the uploaded X-ray image
+            image: DecodedImage from decode_image, or a path or contents to decode
             upload_id: Unique identifier for this upload
+            on_stage: Optional callback invoked with "inference" and
+                "heatmap" as each stage starts (for progress reporting)
             
         Returns:
             Dictionary containing:
             - overall: Overall classification
             - model_version: Version of the model used
             - predictions: List of detected conditions
-            - heatmap_path: Path to visualization
+            - heatmap_path: Storage key of the visualization
+            - thumbnail_path, heatmap_thumbnail_path: Storage keys of the
+              previews of the original and of the heatmap
             - confidence_score: Overall confidence
             - processed_at: Timestamp
+            
+            The rendered heatmap PNG is also kept on image.heatmap_png so
+            the report can embed it without re-reading it from storage.
         """
-        # Preprocess image (validates it can be loaded)
-        preprocessed = self._preprocess_image(image_path)
+        if not self.model_loaded:
+            self._load_model()
+        
+        if isinstance(image, (str, bytes)):
+            image = await self.decode_image(image)
         
-        if preprocessed is None:
+        if image is None:
             # Return error result if image can't be processed
             return {
                 "overall": "Error",
                 "model_version": self.model_version,
                 "predictions": [],
                 "heatmap_path": "",
+                "thumbnail_path": "",
+                "heatmap_thumbnail_path": "",
                 "confidence_score": 0.0,
                 "processed_at": datetime.utcnow().isoformat(),
                 "error": "Failed to process image"
             }
         
-        # Generate predictions (dummy for now)
-        # TODO: Replace with actual model inference
-        # predictions = self.model(preprocessed)
-        predictions = self._generate_dummy_predictions()
+        # Generate predictions; concurrent calls share one batched forward pass
+        if on_stage:
+            on_stage("inference")
+        predictions = await self.inference_engine.predict(image.model_input)
         
         # Determine overall classification
         classification, confidence = self._determine_overall_classification(predictions)
         
         # Generate heatmap visualization
-        heatmap_path = self._generate_heatmap(image_path, upload_id)
+        if on_stage:
+            on_stage("heatmap")
+        heatmap_path = heatmap_thumbnail_path = ""
+        try:
+            image.heatmap_png, heatmap_thumbnail = await self._run_in_pool(_heatmap_in_worker, image.display)
+            heatmap_path, heatmap_thumbnail_path = await asyncio.gather(
+                storage_service.save_heatmap(image.heatmap_png, upload_id),
+                storage_service.save_thumbnail(heatmap_thumbnail, f"heatmap_{upload_id}", THUMBNAIL_FORMAT)
+            )
+        except Exception as e:
+            print(f"Error generating heatmap: {e}")
+        
+        # Preview of the original, encoded when it was decoded
+        thumbnail_path = ""
+        if image.thumbnail:
+            try:
+                thumbnail_path = await storage_service.save_thumbnail(
+                    image.thumbnail, f"upload_{upload_id}", THUMBNAIL_FORMAT
+                )
+            except Exception as e:
+                print(f"Error saving thumbnail: {e}")
         
         return {
             "overall": classification,
             "model_version": self.model_version,
             "predictions": predictions,
             "heatmap_path": heatmap_path,
+            "thumbnail_path": thumbnail_path,
+            "heatmap_thumbnail_path": heatmap_thumbnail_path,
             "confidence_score": confidence,
             "processed_at": datetime.utcnow().isoformat(),
         }
@@ -343,6 +779,19 @@ class MLService:
 ml_service = MLService()
 
 
+# -----------------------------------------------------------------------------
+# Process pool entry points
+# Must be module-level functions so they can be pickled by the executor.
+# -----------------------------------------------------------------------------
+
+def _decode_in_worker(source: Union[str, bytes]) -> Optional[DecodedImage]:
+    return ml_service._decode_image(source)
+
+
+def _heatmap_in_worker(display: np.ndarray, activation_map: Optional[np.ndarray] = None) -> Tuple[bytes, bytes]:
+    return ml_service._generate_heatmap(display, activation_map)
+
+
 """
 =============================================================================
 INTEGRATION NOTES FOR REAL ML MODEL
@@ -370,7 +819,7 @@ To replace this dummy implementation with a real PyTorch model:
 
 4. UPDATE _preprocess_image():
    
-   def _preprocess_image(self, image_path: str):
+   def _preprocess_image(self, image: Image.Image):
        from torchvision import transforms
        
        transform = transforms.Compose([
@@ -379,21 +828,27 @@ To replace this dummy implementation with a real PyTorch model:
            transforms.Normalize(mean=[0.485], std=[0.229])
        ])
        
-       image = Image.open(image_path).convert('L')
-       return transform(image).unsqueeze(0).to(self.device)
+       # image is the grayscale PIL image decoded once in _decode_image.
+       # This runs in a pool worker, which has no model or device: return
+       # a CPU array and let _predict_batch move the batch to the device.
+       return transform(image).squeeze(0).numpy()
 
-5. UPDATE analyze_xray() TO USE REAL INFERENCE:
+5. UPDATE _predict_batch() TO USE REAL INFERENCE:
    
+   # batch is (N, 224, 224), already stacked by BatchInferenceEngine
    with torch.no_grad():
-       outputs = self.model(preprocessed)
-       probabilities = torch.softmax(outputs, dim=1)
-       predictions = self._format_predictions(probabilities)
+       inputs = torch.from_numpy(batch).unsqueeze(1).to(self.device)
+       probabilities = torch.sigmoid(self.model(inputs))
+       return [self._format_predictions(p) for p in probabilities]
 
 6. FOR GRAD-CAM HEATMAPS:
    pip install pytorch-grad-cam
    
    from pytorch_grad_cam import GradCAM
-   from pytorch_grad_cam.utils.image import show_cam_on_image
+   
+   Pass the resulting activation map (any resolution) to
+   _generate_heatmap(display, activation_map) - it is normalised and
+   rendered by the same vectorized path as the simulated map.
 
 =============================================================================
 """
@@ -0,0 +1,147 @@
+"""
+Password Service for SPINEVISION-AI.
+Argon2 hashing and verification off the event loop, with a bound on how
+many hashes may be in flight at once.
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from app.config import get_settings
+
+settings = get_settings()
+
+# Seconds clients are asked to wait when hashing is saturated
+PASSWORD_RETRY_AFTER_SECONDS = 1
+
+
+class PasswordService:
+    """
+    Runs Argon2 on a bounded thread pool.
+
+    argon2-cffi releases the GIL while hashing, so PASSWORD_HASH_WORKERS
+    hashes run in parallel without blocking other requests. Each running
+    hash holds PASSWORD_HASH_MEMORY_COST KiB. At most
+    PASSWORD_HASH_MAX_PENDING hashes may be running or queued; beyond
+    that, callers get 429 with Retry-After instead of waiting in an
+    unbounded queue.
+
+    Hashes made with other Argon2 parameters still verify, and
+    verify() returns a replacement hash for them so they are upgraded
+    on the next successful login.
+
+    Usage:
+        hashed = await password_service.hash(password)
+        valid, new_hash = await password_service.verify(password, user.hashed_password)
+    """
+
+    def __init__(self, time_cost: int, memory_cost: int, parallelism: int, workers: int, max_pending: int):
+        self.context = CryptContext(
+            schemes=["argon2"],
+            deprecated="auto",
+            argon2__time_cost=time_cost,
+            argon2__memory_cost=memory_cost,
+            argon2__parallelism=parallelism,
+        )
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max(max_pending, self.workers)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Return the hashing pool, creating it on first use."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers,
+                thread_name_prefix="argon2"
+            )
+            print(f"✓ Password hashing pool started ({self.workers} workers)")
+        return self._executor
+
+    def start(self):
+        """
+        Start the hashing pool.
+        Should be called during application startup.
+        """
+        self._get_executor()
+
+    def shutdown(self):
+        """
+        Stop the hashing pool.
+        Should be called during application shutdown.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def _run(self, fn, *args):
+        """
+        Run a hashing call on the pool.
+
+        Raises:
+            HTTPException 429: If PASSWORD_HASH_MAX_PENDING hashes are
+                already running or queued
+        """
+        if self._pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many sign-in requests in progress. Please try again shortly.",
+                headers={"Retry-After": str(PASSWORD_RETRY_AFTER_SECONDS)}
+            )
+
+        self._pending += 1
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(
+                self._get_executor(), partial(fn, *args)
+            )
+        finally:
+            self._pending -= 1
+        self.completed += 1
+        return result
+
+    async def hash(self, password: str) -> str:
+        """Hash a password with the configured Argon2 parameters."""
+        return await self._run(self.context.hash, password)
+
+    async def verify(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """
+        Check a password against its stored hash.
+
+        Returns:
+            (valid, new_hash) where new_hash is set when the stored hash
+            uses outdated parameters and should replace it
+        """
+        valid, new_hash = await self._run(self.context.verify_and_update, password, hashed)
+        if new_hash:
+            self.rehashed += 1
+        return valid, new_hash
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "rehashed": self.rehashed,
+        }
+
+
+# Create singleton instance
+password_service = PasswordService(
+    time_cost=settings.PASSWORD_HASH_TIME_COST,
+    memory_cost=settings.PASSWORD_HASH_MEMORY_COST,
+    parallelism=settings.PASSWORD_HASH_PARALLELISM,
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING
+)
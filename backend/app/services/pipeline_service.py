@@ -0,0 +1,148 @@
+"""
+Pipeline Service for SPINEVISION-AI.
+Runs the analysis -> report pipeline for a stored upload and records the
+outcome on the Upload/Result rows. Invoked by the background job queue.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import select
+
+from app.config import get_settings
+from app.database import SessionLocal, AsyncSessionLocal, User, Upload, Result, Finding, UploadStatus
+from app.services.ml_service import ml_service
+from app.services.report_service import report_service
+from app.services.storage_service import storage_service
+from app.services.job_queue import job_queue
+from app.services.result_cache import result_cache
+from app.services.event_bus import event_bus
+from app.services.stats_service import stats_service
+
+settings = get_settings()
+
+
+class PipelineService:
+    """
+    Drives an upload through PROCESSING -> DONE/FAILED.
+
+    Each job opens its own async database session since it runs outside
+    the request that created the upload, so database I/O never blocks the
+    event loop. No transaction is held open while the image is analyzed.
+    """
+
+    async def process_upload(self, upload_id: str):
+        """
+        Run AI analysis and report generation for an upload.
+
+        Args:
+            upload_id: ID of an upload in UPLOADED (or interrupted PROCESSING) state
+        """
+        async with AsyncSessionLocal() as db:
+            upload = await db.scalar(select(Upload).where(Upload.id == upload_id))
+            if not upload or upload.status == UploadStatus.DONE:
+                return
+            user = await db.scalar(select(User).where(User.id == upload.user_id))
+
+            old_status = upload.status
+            upload.status = UploadStatus.PROCESSING
+            await db.run_sync(stats_service.record_status_change, upload, old_status)
+            await db.commit()
+            user_id = upload.user_id
+            event_bus.publish_stage(user_id, upload_id, "processing")
+
+            def on_stage(stage: str):
+                event_bus.publish_stage(user_id, upload_id, stage)
+
+            try:
+                # Re-uploads of an identical image reuse the earlier analysis
+                image = None
+                analysis_result = await result_cache.get(upload.content_hash, ml_service.model_version)
+
+                if analysis_result is not None:
+                    analysis_result["processed_at"] = datetime.utcnow().isoformat()
+                else:
+                    # Decode once; the same image feeds analysis and the report
+                    on_stage("preprocess")
+                    image = await ml_service.decode_image(
+                        await storage_service.get_image_source(upload.file_path)
+                    )
+
+                    # Run AI analysis
+                    analysis_result = await ml_service.analyze_xray(image, upload.id, on_stage=on_stage)
+
+                    if "error" not in analysis_result:
+                        result_cache.put(upload.content_hash, ml_service.model_version, analysis_result)
+
+                # Generate PDF report, unless it is built on first download
+                report_path = None
+                if not settings.LAZY_REPORTS:
+                    on_stage("report")
+                    report_path = await report_service.generate_report(
+                        analysis_result,
+                        upload.id,
+                        {"doctor_name": user.full_name if user else None},
+                        image=image
+                    )
+
+                # Create result record
+                result = Result(
+                    upload_id=upload.id,
+                    model_version=analysis_result["model_version"],
+                    overall_classification=analysis_result["overall"],
+                    predictions=analysis_result["predictions"],
+                    confidence_score=float(analysis_result["confidence_score"]),
+                    heatmap_path=analysis_result.get("heatmap_path", ""),
+                    thumbnail_path=analysis_result.get("thumbnail_path", ""),
+                    heatmap_thumbnail_path=analysis_result.get("heatmap_thumbnail_path", ""),
+                    report_path=report_path,
+                    findings=Finding.from_predictions(analysis_result["predictions"])
+                )
+
+                db.add(result)
+                upload.status = UploadStatus.DONE
+                await db.run_sync(
+                    stats_service.record_status_change, upload, UploadStatus.PROCESSING, result=result
+                )
+                await db.commit()
+                on_stage("done")
+
+            except Exception as e:
+                await db.rollback()
+                upload.status = UploadStatus.FAILED
+                await db.run_sync(stats_service.record_status_change, upload, UploadStatus.PROCESSING)
+                await db.commit()
+                event_bus.publish_stage(user_id, upload_id, "failed", error=str(e))
+                raise
+
+    def recover_pending(self) -> int:
+        """
+        Re-enqueue uploads left in UPLOADED/PROCESSING by a previous run.
+        Should be called once the job queue has started.
+
+        Returns:
+            Number of uploads re-enqueued
+        """
+        db = SessionLocal()
+        try:
+            pending = db.query(Upload.id).filter(
+                Upload.status.in_([UploadStatus.UPLOADED, UploadStatus.PROCESSING])
+            ).order_by(Upload.created_at).all()
+        finally:
+            db.close()
+
+        count = 0
+        for (upload_id,) in pending:
+            try:
+                if job_queue.enqueue(upload_id):
+                    count += 1
+            except Exception:
+                # Queue full; remaining uploads are picked up on the next restart
+                break
+
+        if count:
+            print(f"✓ Re-enqueued {count} pending upload(s)")
+        return count
+
+
+# Create singleton instance
+pipeline_service = PipelineService()
@@ -3,10 +3,14 @@ Report Service for SPINEVISION-AI.
 Generates PDF diagnostic reports from analysis results.
 """
 
+import asyncio
+import copy
 import io
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple, Union
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -16,22 +20,328 @@ from reportlab.platypus import (
     Image as RLImage, PageBreak, HRFlowable
 )
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+from PIL import Image
 
 from app.config import get_settings
+from app.services.ml_service import DecodedImage, Histogram
+from app.services.storage_service import storage_service
 
 settings = get_settings()
 
 
+# Classification box colour per tier
+CLASSIFICATION_COLORS = {
+    "normal": '#48bb78',    # Green
+    "high": '#e53e3e',      # Red
+    "moderate": '#ed8936',  # Orange
+    "other": '#4299e1',     # Blue
+}
+
+# Finding severity bands: (minimum probability, label, colour)
+SEVERITY_BANDS = [
+    (0.7, "High", '#e53e3e'),
+    (0.5, "Moderate", '#ed8936'),
+    (0.3, "Low", '#ecc94b'),
+    (0.0, "Very Low", '#48bb78'),
+]
+
+# Recommendations per classification tier
+RECOMMENDATIONS = {
+    "high": [
+        "Immediate consultation with an orthopedic specialist or spine surgeon is recommended.",
+        "Additional imaging studies (MRI, CT) may be warranted for detailed assessment.",
+        "Clinical correlation with patient symptoms and physical examination is essential.",
+        "Consider referral for comprehensive spine evaluation."
+    ],
+    "moderate": [
+        "Follow-up consultation with the treating physician is recommended.",
+        "Consider additional imaging if symptoms persist or worsen.",
+        "Monitor patient for any progression of symptoms.",
+        "Physical therapy evaluation may be beneficial."
+    ],
+    "routine": [
+        "Routine follow-up as clinically indicated.",
+        "No immediate intervention appears necessary based on this analysis.",
+        "Continue standard care protocols.",
+        "Patient education on spine health and posture is recommended."
+    ],
+}
+
+DISCLAIMER = (
+    "<b>IMPORTANT DISCLAIMER:</b> This report is generated by an AI-assisted diagnostic tool "
+    "and is intended for clinical decision support only. It should not be used as the sole "
+    "basis for diagnosis or treatment. All findings must be reviewed and confirmed by a "
+    "qualified medical professional. The AI model's predictions are probabilistic in nature "
+    "and may not capture all pathological conditions. Clinical correlation is mandatory."
+)
+
+
+def _classification_tier(classification: str) -> str:
+    """Map an overall classification to normal, high, moderate or other."""
+    if 'Normal' in classification:
+        return "normal"
+    if 'High' in classification:
+        return "high"
+    if 'Moderate' in classification or 'Possibly' in classification:
+        return "moderate"
+    return "other"
+
+
+def _severity(probability: float):
+    """Return the (label, hex colour) severity band for a finding probability."""
+    for minimum, label, color in SEVERITY_BANDS:
+        if probability >= minimum:
+            return label, color
+    return SEVERITY_BANDS[-1][1:]
+
+
+class ReportTemplate:
+    """
+    Styles and static flowables shared by every report.
+    
+    Built once per process, so a report build only parses the paragraphs
+    that carry per-result data (metadata lines, classification box,
+    findings table, heatmap). Static flowables are placed through fresh(),
+    never directly.
+    """
+    
+    def __init__(self, styles):
+        # Inline styles
+        self.classification_text_style = ParagraphStyle(
+            name='ClassText', fontSize=16, alignment=TA_CENTER, textColor=colors.white
+        )
+        self.confidence_text_style = ParagraphStyle(
+            name='ConfText', fontSize=11, alignment=TA_CENTER, textColor=colors.white
+        )
+        self.footer_style = ParagraphStyle(
+            name='Footer', fontSize=9, alignment=TA_CENTER,
+            textColor=colors.HexColor('#718096')
+        )
+        
+        self.spacer = Spacer(1, 20)
+        
+        # Header
+        self.header = [
+            Paragraph("SPINEVISION-AI", styles['ReportTitle']),
+            Paragraph("AI-Assisted Spine Disease Detection Report", styles['ReportSubtitle']),
+            HRFlowable(
+                width="100%",
+                thickness=2,
+                color=colors.HexColor('#3182ce'),
+                spaceBefore=10,
+                spaceAfter=20
+            ),
+        ]
+        
+        self.section_headers = {
+            title: Paragraph(title, styles['SectionHeader'])
+            for title in (
+                "Overall Classification",
+                "Detected Conditions",
+                "Finding Descriptions",
+                "Region of Interest Visualization",
+                "Recommendations",
+            )
+        }
+        
+        # Classification box, one table style per colour
+        self.classification_table_styles = {
+            tier: TableStyle([
+                ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor(color)),
+                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+                ('TOPPADDING', (0, 0), (-1, -1), 15),
+                ('BOTTOMPADDING', (0, 0), (-1, -1), 15),
+                ('LEFTPADDING', (0, 0), (-1, -1), 20),
+                ('RIGHTPADDING', (0, 0), (-1, -1), 20),
+                ('ROUNDEDCORNERS', [5, 5, 5, 5]),
+            ])
+            for tier, color in CLASSIFICATION_COLORS.items()
+        }
+        
+        # Findings
+        self.no_findings = Paragraph(
+            "No significant abnormalities detected.",
+            styles['Finding']
+        )
+        self.findings_header_row = [
+            Paragraph("<b>Condition</b>", styles['Normal']),
+            Paragraph("<b>Probability</b>", styles['Normal']),
+            Paragraph("<b>Severity</b>", styles['Normal'])
+        ]
+        self.findings_table_style = TableStyle([
+            # Header styling
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#edf2f7')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor('#2d3748')),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            
+            # Cell styling
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('ALIGN', (1, 0), (2, -1), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('TOPPADDING', (0, 0), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+            ('LEFTPADDING', (0, 0), (-1, -1), 10),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 10),
+            
+            # Grid
+            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e2e8f0')),
+            ('LINEBELOW', (0, 0), (-1, 0), 2, colors.HexColor('#3182ce')),
+            
+            # Alternating row colors
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f7fafc')])
+        ])
+        
+        # Heatmap
+        self.heatmap_intro = [
+            self.section_headers["Region of Interest Visualization"],
+            Paragraph(
+                "The highlighted regions indicate areas where the AI model detected potential abnormalities. "
+                "Warmer colors (red/orange) indicate higher attention from the model.",
+                styles['Normal']
+            ),
+            Spacer(1, 10),
+        ]
+        
+        # Numbered recommendations; "normal" and "other" share the routine list
+        routine = [
+            Paragraph(f"{i}. {rec}", styles['Finding'])
+            for i, rec in enumerate(RECOMMENDATIONS["routine"], 1)
+        ]
+        self.recommendations = {
+            "normal": routine,
+            "other": routine,
+            **{
+                tier: [
+                    Paragraph(f"{i}. {rec}", styles['Finding'])
+                    for i, rec in enumerate(RECOMMENDATIONS[tier], 1)
+                ]
+                for tier in ("high", "moderate")
+            },
+        }
+        
+        # Footer
+        self.footer_rule = [
+            Spacer(1, 30),
+            HRFlowable(
+                width="100%",
+                thickness=1,
+                color=colors.HexColor('#cbd5e0'),
+                spaceBefore=10,
+                spaceAfter=10
+            ),
+        ]
+        self.disclaimer = [
+            Paragraph(DISCLAIMER, styles['Disclaimer']),
+            Paragraph(
+                "© 2024 SPINEVISION-AI | Confidential Medical Information",
+                ParagraphStyle(name='Copyright', fontSize=8, alignment=TA_CENTER,
+                              textColor=colors.HexColor('#a0aec0'), spaceBefore=15)
+            ),
+        ]
+    
+    @staticmethod
+    def fresh(*flowables) -> list:
+        """
+        Shallow copies of prebuilt flowables for one document.
+        
+        Copies share the parsed paragraph text but get their own layout
+        state. ReportLab marks a flowable pushed to the next page with
+        _postponed and never clears it, so placing the same instance in
+        another build could fail with a LayoutError.
+        """
+        return [copy.copy(flowable) for flowable in flowables]
+
+
+# Printed width and height of the heatmap in the report
+HEATMAP_PRINT_INCHES = 4
+
+
+class HeatmapProfile:
+    """
+    How the heatmap is encoded before it is embedded in a report.
+    
+    The 512x512 lossless heatmap is scaled down to the pixel size needed
+    for the target print DPI (never up) and re-encoded in memory:
+    
+    - jpeg: baseline JPEG, embedded by ReportLab as-is (smallest, fastest)
+    - png: lossless RGB PNG
+    - indexed: 256-colour palette PNG
+    
+    The full-resolution heatmap served by the API is not affected.
+    """
+    
+    FORMATS = ("jpeg", "png", "indexed")
+    
+    def __init__(self, dpi: int, image_format: str, quality: int):
+        if image_format not in self.FORMATS:
+            raise ValueError(
+                f"Unknown heatmap format '{image_format}', expected one of {', '.join(self.FORMATS)}"
+            )
+        self.dpi = dpi
+        self.format = image_format
+        self.quality = quality
+    
+    @property
+    def pixel_size(self) -> int:
+        return max(1, round(HEATMAP_PRINT_INCHES * self.dpi))
+    
+    def encode(self, source: Union[bytes, str]) -> io.BytesIO:
+        """
+        Encode a heatmap PNG (bytes or file path) for embedding.
+        
+        Returns:
+            In-memory image file ready for ReportLab
+        """
+        with Image.open(io.BytesIO(source) if isinstance(source, bytes) else source) as img:
+            img = img.convert("RGB")
+            
+            size = self.pixel_size
+            if max(img.size) > size:
+                img = img.resize((size, size), Image.LANCZOS)
+            
+            buffer = io.BytesIO()
+            if self.format == "jpeg":
+                img.save(buffer, format="JPEG", quality=self.quality, optimize=True)
+            elif self.format == "indexed":
+                img.quantize(colors=256).save(buffer, format="PNG", optimize=True)
+            else:
+                img.save(buffer, format="PNG")
+        
+        buffer.seek(0)
+        return buffer
+    
+    def describe(self) -> Dict[str, Any]:
+        profile = {"dpi": self.dpi, "format": self.format, "pixel_size": self.pixel_size}
+        if self.format == "jpeg":
+            profile["quality"] = self.quality
+        return profile
+
+
 class ReportService:
     """
     Service for generating PDF diagnostic reports.
     Creates professional medical-style reports with analysis results.
+    
+    PDFs are built in a separate process pool so ReportLab never blocks
+    the event loop. Reports can also be built lazily on first download;
+    concurrent requests for the same report share a single build.
     """
     
     def __init__(self):
-        """Initialize report styles."""
+        """Initialize report styles and the prebuilt report template."""
         self.styles = getSampleStyleSheet()
         self._setup_custom_styles()
+        self.template = ReportTemplate(self.styles)
+        self.heatmap_profile = HeatmapProfile(
+            settings.REPORT_HEATMAP_DPI,
+            settings.REPORT_HEATMAP_FORMAT,
+            settings.REPORT_HEATMAP_QUALITY
+        )
+        self.build_time_histogram = Histogram([50, 100, 250, 500, 1000, 2500])
+        self.size_histogram = Histogram([64, 128, 256, 512, 1024, 2048])
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._builds: Dict[str, asyncio.Future] = {}
     
     def _setup_custom_styles(self):
         """Define custom paragraph styles for the report."""
@@ -90,25 +400,8 @@ class ReportService:
     def _create_header(self, elements: list, patient_info: Optional[Dict] = None):
         """Create the report header section."""
         
-        # Main title
-        elements.append(Paragraph(
-            "SPINEVISION-AI",
-            self.styles['ReportTitle']
-        ))
-        
-        elements.append(Paragraph(
-            "AI-Assisted Spine Disease Detection Report",
-            self.styles['ReportSubtitle']
-        ))
-        
-        # Horizontal line
-        elements.append(HRFlowable(
-            width="100%",
-            thickness=2,
-            color=colors.HexColor('#3182ce'),
-            spaceBefore=10,
-            spaceAfter=20
-        ))
+        # Title, subtitle and rule are prebuilt
+        elements.extend(self.template.fresh(*self.template.header))
         
         # Report metadata
         report_date = datetime.now().strftime("%B %d, %Y at %H:%M")
@@ -129,137 +422,66 @@ class ReportService:
                     self.styles['Normal']
                 ))
         
-        elements.append(Spacer(1, 20))
+        elements.extend(self.template.fresh(self.template.spacer))
     
     def _create_classification_section(self, elements: list, result: Dict):
         """Create the overall classification section."""
         
-        elements.append(Paragraph(
-            "Overall Classification",
-            self.styles['SectionHeader']
-        ))
+        template = self.template
+        elements.extend(template.fresh(template.section_headers["Overall Classification"]))
         
         # Classification box
         classification = result.get('overall', 'Unknown')
         confidence = result.get('confidence_score', 0)
         
-        # Determine color based on classification
-        if 'Normal' in classification:
-            box_color = colors.HexColor('#48bb78')  # Green
-        elif 'High' in classification:
-            box_color = colors.HexColor('#e53e3e')  # Red
-        elif 'Moderate' in classification or 'Possibly' in classification:
-            box_color = colors.HexColor('#ed8936')  # Orange
-        else:
-            box_color = colors.HexColor('#4299e1')  # Blue
-        
-        # Create classification table
+        # Create classification table, coloured by classification tier
         classification_data = [
-            [Paragraph(f"<b>{classification}</b>", 
-                      ParagraphStyle(name='ClassText', fontSize=16, 
-                                   alignment=TA_CENTER, textColor=colors.white))],
-            [Paragraph(f"Confidence: {confidence:.0%}", 
-                      ParagraphStyle(name='ConfText', fontSize=11, 
-                                   alignment=TA_CENTER, textColor=colors.white))]
+            [Paragraph(f"<b>{classification}</b>", template.classification_text_style)],
+            [Paragraph(f"Confidence: {confidence:.0%}", template.confidence_text_style)]
         ]
         
         classification_table = Table(classification_data, colWidths=[4*inch])
-        classification_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, -1), box_color),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('TOPPADDING', (0, 0), (-1, -1), 15),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 15),
-            ('LEFTPADDING', (0, 0), (-1, -1), 20),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 20),
-            ('ROUNDEDCORNERS', [5, 5, 5, 5]),
-        ]))
+        classification_table.setStyle(
+            template.classification_table_styles[_classification_tier(classification)]
+        )
         
         elements.append(classification_table)
-        elements.append(Spacer(1, 20))
+        elements.extend(template.fresh(template.spacer))
     
     def _create_findings_section(self, elements: list, predictions: list):
         """Create the detailed findings section."""
         
-        elements.append(Paragraph(
-            "Detected Conditions",
-            self.styles['SectionHeader']
-        ))
+        template = self.template
+        elements.extend(template.fresh(template.section_headers["Detected Conditions"]))
         
         if not predictions:
-            elements.append(Paragraph(
-                "No significant abnormalities detected.",
-                self.styles['Finding']
-            ))
+            elements.extend(template.fresh(template.no_findings))
             return
         
         # Create findings table
-        table_data = [
-            [
-                Paragraph("<b>Condition</b>", self.styles['Normal']),
-                Paragraph("<b>Probability</b>", self.styles['Normal']),
-                Paragraph("<b>Severity</b>", self.styles['Normal'])
-            ]
-        ]
+        table_data = [template.fresh(*template.findings_header_row)]
         
         for pred in predictions:
             prob = pred.get('probability', 0)
-            
-            # Determine severity level
-            if prob >= 0.7:
-                severity = "High"
-                severity_color = colors.HexColor('#e53e3e')
-            elif prob >= 0.5:
-                severity = "Moderate"
-                severity_color = colors.HexColor('#ed8936')
-            elif prob >= 0.3:
-                severity = "Low"
-                severity_color = colors.HexColor('#ecc94b')
-            else:
-                severity = "Very Low"
-                severity_color = colors.HexColor('#48bb78')
+            severity, severity_color = _severity(prob)
             
             table_data.append([
                 Paragraph(pred.get('label', 'Unknown'), self.styles['Normal']),
                 Paragraph(f"{prob:.0%}", self.styles['Normal']),
-                Paragraph(f"<font color='{severity_color.hexval()}'><b>{severity}</b></font>", 
+                Paragraph(f"<font color='{severity_color}'><b>{severity}</b></font>", 
                          self.styles['Normal'])
             ])
         
         findings_table = Table(table_data, colWidths=[3*inch, 1.5*inch, 1.5*inch])
-        findings_table.setStyle(TableStyle([
-            # Header styling
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#edf2f7')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor('#2d3748')),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            
-            # Cell styling
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('ALIGN', (1, 0), (2, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('TOPPADDING', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-            ('LEFTPADDING', (0, 0), (-1, -1), 10),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 10),
-            
-            # Grid
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e2e8f0')),
-            ('LINEBELOW', (0, 0), (-1, 0), 2, colors.HexColor('#3182ce')),
-            
-            # Alternating row colors
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f7fafc')])
-        ]))
+        findings_table.setStyle(template.findings_table_style)
         
         elements.append(findings_table)
-        elements.append(Spacer(1, 20))
+        elements.extend(template.fresh(template.spacer))
         
         # Add descriptions for significant findings
         significant_findings = [p for p in predictions if p.get('probability', 0) >= 0.5]
         if significant_findings:
-            elements.append(Paragraph(
-                "Finding Descriptions",
-                self.styles['SectionHeader']
-            ))
+            elements.extend(template.fresh(template.section_headers["Finding Descriptions"]))
             
             for finding in significant_findings:
                 desc = finding.get('description', 'No description available.')
@@ -268,27 +490,24 @@ class ReportService:
                     self.styles['Finding']
                 ))
     
-    def _create_heatmap_section(self, elements: list, heatmap_path: str):
-        """Include the heatmap visualization in the report."""
-        
-        if not heatmap_path or not Path(heatmap_path).exists():
+    def _create_heatmap_section(self, elements: list, heatmap_png: Optional[bytes] = None):
+        """
+        Include the heatmap visualization in the report, re-encoded with
+        the configured heatmap profile. Skipped when there is no heatmap.
+        """
+        if not heatmap_png:
             return
         
-        elements.append(Paragraph(
-            "Region of Interest Visualization",
-            self.styles['SectionHeader']
-        ))
-        
-        elements.append(Paragraph(
-            "The highlighted regions indicate areas where the AI model detected potential abnormalities. "
-            "Warmer colors (red/orange) indicate higher attention from the model.",
-            self.styles['Normal']
-        ))
-        elements.append(Spacer(1, 10))
+        # Section header and explanation are prebuilt
+        elements.extend(self.template.fresh(*self.template.heatmap_intro))
         
         try:
             # Add heatmap image
-            img = RLImage(heatmap_path, width=4*inch, height=4*inch)
+            img = RLImage(
+                self.heatmap_profile.encode(heatmap_png),
+                width=HEATMAP_PRINT_INCHES*inch,
+                height=HEATMAP_PRINT_INCHES*inch
+            )
             elements.append(img)
         except Exception as e:
             elements.append(Paragraph(
@@ -296,110 +515,55 @@ class ReportService:
                 self.styles['Normal']
             ))
         
-        elements.append(Spacer(1, 20))
+        elements.extend(self.template.fresh(self.template.spacer))
     
     def _create_recommendations_section(self, elements: list, result: Dict):
         """Create recommendations based on the analysis."""
         
-        elements.append(Paragraph(
-            "Recommendations",
-            self.styles['SectionHeader']
-        ))
+        template = self.template
+        elements.extend(template.fresh(template.section_headers["Recommendations"]))
         
-        classification = result.get('overall', '')
-        
-        recommendations = []
-        
-        if 'High' in classification:
-            recommendations = [
-                "Immediate consultation with an orthopedic specialist or spine surgeon is recommended.",
-                "Additional imaging studies (MRI, CT) may be warranted for detailed assessment.",
-                "Clinical correlation with patient symptoms and physical examination is essential.",
-                "Consider referral for comprehensive spine evaluation."
-            ]
-        elif 'Moderate' in classification or 'Possibly' in classification:
-            recommendations = [
-                "Follow-up consultation with the treating physician is recommended.",
-                "Consider additional imaging if symptoms persist or worsen.",
-                "Monitor patient for any progression of symptoms.",
-                "Physical therapy evaluation may be beneficial."
-            ]
-        else:
-            recommendations = [
-                "Routine follow-up as clinically indicated.",
-                "No immediate intervention appears necessary based on this analysis.",
-                "Continue standard care protocols.",
-                "Patient education on spine health and posture is recommended."
-            ]
-        
-        for i, rec in enumerate(recommendations, 1):
-            elements.append(Paragraph(
-                f"{i}. {rec}",
-                self.styles['Finding']
-            ))
+        tier = _classification_tier(result.get('overall', ''))
+        elements.extend(template.fresh(*template.recommendations[tier]))
     
     def _create_footer(self, elements: list, result: Dict):
         """Create the report footer with disclaimers."""
         
-        elements.append(Spacer(1, 30))
-        elements.append(HRFlowable(
-            width="100%",
-            thickness=1,
-            color=colors.HexColor('#cbd5e0'),
-            spaceBefore=10,
-            spaceAfter=10
-        ))
+        template = self.template
+        elements.extend(template.fresh(*template.footer_rule))
         
         # Model information
         model_version = result.get('model_version', 'Unknown')
-        processed_at = result.get('processed_at', datetime.now().isoformat())
         
         elements.append(Paragraph(
             f"<b>Model Version:</b> {model_version} | <b>Analysis ID:</b> {result.get('id', 'N/A')}",
-            ParagraphStyle(name='Footer', fontSize=9, alignment=TA_CENTER, 
-                          textColor=colors.HexColor('#718096'))
-        ))
-        
-        # Disclaimer
-        elements.append(Paragraph(
-            "<b>IMPORTANT DISCLAIMER:</b> This report is generated by an AI-assisted diagnostic tool "
-            "and is intended for clinical decision support only. It should not be used as the sole "
-            "basis for diagnosis or treatment. All findings must be reviewed and confirmed by a "
-            "qualified medical professional. The AI model's predictions are probabilistic in nature "
-            "and may not capture all pathological conditions. Clinical correlation is mandatory.",
-            self.styles['Disclaimer']
+            template.footer_style
         ))
         
-        elements.append(Paragraph(
-            "© 2024 SPINEVISION-AI | Confidential Medical Information",
-            ParagraphStyle(name='Copyright', fontSize=8, alignment=TA_CENTER,
-                          textColor=colors.HexColor('#a0aec0'), spaceBefore=15)
-        ))
+        # Disclaimer and copyright are prebuilt
+        elements.extend(template.fresh(*template.disclaimer))
     
-    async def generate_report(
+    def _build_pdf(
         self,
         result: Dict[str, Any],
-        upload_id: str,
-        patient_info: Optional[Dict] = None
-    ) -> str:
+        patient_info: Optional[Dict] = None,
+        heatmap_png: Optional[bytes] = None
+    ) -> Tuple[bytes, Dict[str, float]]:
         """
-        Generate a PDF diagnostic report.
+        Render the report.
+        
+        CPU-bound; runs in the report process pool. The PDF is built in
+        memory and stored by the caller.
         
-        Args:
-            result: The analysis result dictionary
-            upload_id: The upload ID for naming the report
-            patient_info: Optional patient/doctor information
-            
         Returns:
-            Path to the generated PDF report
+            (PDF bytes, dictionary with build_ms and size_kb of the report)
         """
-        # Create report filename
-        report_filename = f"report_{upload_id}.pdf"
-        report_path = settings.REPORT_DIR / report_filename
+        started = time.perf_counter()
+        buffer = io.BytesIO()
         
         # Create the PDF document
         doc = SimpleDocTemplate(
-            str(report_path),
+            buffer,
             pagesize=letter,
             rightMargin=0.75*inch,
             leftMargin=0.75*inch,
@@ -414,15 +578,138 @@ class ReportService:
         self._create_header(elements, patient_info)
         self._create_classification_section(elements, result)
         self._create_findings_section(elements, result.get('predictions', []))
-        self._create_heatmap_section(elements, result.get('heatmap_path', ''))
+        self._create_heatmap_section(elements, heatmap_png)
         self._create_recommendations_section(elements, result)
         self._create_footer(elements, result)
         
         # Build the PDF
         doc.build(elements)
+        pdf = buffer.getvalue()
+        
+        return pdf, {
+            "build_ms": (time.perf_counter() - started) * 1000,
+            "size_kb": len(pdf) / 1024,
+        }
+    
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """
+        Return the report pool, creating it on first use.
+        Uses the spawn start method, as the ML process pool does.
+        """
+        if self._executor is None:
+            max_workers = max(1, settings.REPORT_PROCESS_WORKERS)
+            self._executor = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            print(f"✓ Report process pool started ({max_workers} workers)")
+        return self._executor
+    
+    def start(self):
+        """
+        Start the report process pool.
+        Should be called during application startup.
+        """
+        self._get_executor()
+    
+    def shutdown(self):
+        """
+        Stop the report process pool.
+        Should be called during application shutdown.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+    
+    async def generate_report(
+        self,
+        result: Dict[str, Any],
+        upload_id: str,
+        patient_info: Optional[Dict] = None,
+        image: Optional[DecodedImage] = None
+    ) -> str:
+        """
+        Generate a PDF diagnostic report.
         
-        return str(report_path)
+        Args:
+            result: The analysis result dictionary
+            upload_id: The upload ID for naming the report
+            patient_info: Optional patient/doctor information
+            image: Decoded image from the analysis, whose in-memory heatmap
+                is embedded instead of re-reading heatmap_path
+            
+        Returns:
+            Storage key of the generated PDF report
+        """
+        heatmap_png = image.heatmap_png if image else None
+        if heatmap_png is None and result.get('heatmap_path'):
+            heatmap_png = await storage_service.read_file(result['heatmap_path'])
+        
+        loop = asyncio.get_running_loop()
+        pdf, build_stats = await loop.run_in_executor(
+            self._get_executor(),
+            _build_report_in_worker,
+            result,
+            patient_info,
+            heatmap_png
+        )
+        self.build_time_histogram.observe(build_stats["build_ms"])
+        self.size_histogram.observe(build_stats["size_kb"])
+        
+        return await storage_service.save_report(pdf, upload_id)
+    
+    async def get_or_generate_report(
+        self,
+        result: Dict[str, Any],
+        upload_id: str,
+        patient_info: Optional[Dict] = None
+    ) -> str:
+        """
+        Return the report for an upload, building it if it is not stored yet.
+        
+        Concurrent calls for the same upload wait on one shared build. The
+        build is shielded so a client disconnecting does not cancel it for
+        the other waiters.
+        
+        Returns:
+            Storage key of the PDF report
+        """
+        report_key = storage_service.get_report_key(upload_id)
+        if await storage_service.file_exists(report_key):
+            return report_key
+        
+        build = self._builds.get(upload_id)
+        if build is None:
+            build = asyncio.ensure_future(
+                self.generate_report(result, upload_id, patient_info)
+            )
+            self._builds[upload_id] = build
+            build.add_done_callback(lambda _: self._builds.pop(upload_id, None))
+        
+        return await asyncio.shield(build)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Heatmap profile with report build time and size histograms."""
+        return {
+            "lazy_reports": settings.LAZY_REPORTS,
+            "heatmap_profile": self.heatmap_profile.describe(),
+            "build_time_ms": self.build_time_histogram.snapshot(),
+            "size_kb": self.size_histogram.snapshot(),
+        }
 
 
 # Create singleton instance
 report_service = ReportService()
+
+
+# -----------------------------------------------------------------------------
+# Process pool entry point
+# Must be a module-level function so it can be pickled by the executor.
+# -----------------------------------------------------------------------------
+
+def _build_report_in_worker(
+    result: Dict[str, Any],
+    patient_info: Optional[Dict] = None,
+    heatmap_png: Optional[bytes] = None
+) -> Tuple[bytes, Dict[str, float]]:
+    return report_service._build_pdf(result, patient_info, heatmap_png)
@@ -0,0 +1,105 @@
+"""
+Result Cache for SPINEVISION-AI.
+Reuses analysis results for byte-identical re-uploads of the same X-ray.
+"""
+
+import asyncio
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.config import get_settings
+from app.services.storage_service import storage_service
+
+settings = get_settings()
+
+# Stored files a cached entry hands out to new results
+ARTIFACT_KEYS = ("heatmap_path", "thumbnail_path", "heatmap_thumbnail_path")
+
+
+class ResultCache:
+    """
+    Bounded LRU cache of analysis results keyed by (image SHA-256, model version).
+
+    Entries store the predictions, classification, heatmap and thumbnail
+    paths of the first analysis of an image. All entries are dropped as soon as a lookup
+    or insert arrives for a different model version, so results from an old
+    model are never served after MODEL_VERSION changes.
+
+    Usage:
+        cached = await result_cache.get(content_hash, model_version)
+        result_cache.put(content_hash, model_version, analysis_result)
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._model_version: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+
+    def _check_model_version(self, model_version: str):
+        """Invalidate every entry when the model version changes."""
+        if model_version != self._model_version:
+            self._entries.clear()
+            self._model_version = model_version
+
+    async def get(self, content_hash: Optional[str], model_version: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached analysis.
+
+        Returns:
+            Copy of the cached analysis result, or None on a miss. Entries
+            with any stored file (heatmap or thumbnail) that no longer
+            exists are dropped and treated as misses.
+        """
+        self._check_model_version(model_version)
+
+        entry = self._entries.get(content_hash) if content_hash else None
+        if entry is not None:
+            file_paths = [entry[key] for key in ARTIFACT_KEYS if entry.get(key)]
+            found = await asyncio.gather(*(storage_service.file_exists(path) for path in file_paths))
+            if not all(found):
+                self._entries.pop(content_hash, None)
+                entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(content_hash)
+        self.hits += 1
+        return dict(entry)
+
+    def put(self, content_hash: Optional[str], model_version: str, analysis_result: Dict[str, Any]):
+        """Store a successful analysis, evicting the least recently used entry if full."""
+        if not content_hash or self.max_size <= 0:
+            return
+
+        self._check_model_version(model_version)
+
+        self._entries[content_hash] = {
+            "overall": analysis_result["overall"],
+            "model_version": analysis_result["model_version"],
+            "predictions": analysis_result["predictions"],
+            "confidence_score": analysis_result["confidence_score"],
+            "heatmap_path": analysis_result.get("heatmap_path", ""),
+            "thumbnail_path": analysis_result.get("thumbnail_path", ""),
+            "heatmap_thumbnail_path": analysis_result.get("heatmap_thumbnail_path", ""),
+        }
+        self._entries.move_to_end(content_hash)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "model_version": self._model_version,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# Create singleton instance
+result_cache = ResultCache(settings.RESULT_CACHE_SIZE)
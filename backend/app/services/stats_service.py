@@ -0,0 +1,213 @@
+"""
+Stats Service for SPINEVISION-AI.
+Maintains the StatCounter rollups read by the history and admin dashboards.
+"""
+
+from collections import Counter
+from datetime import date
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, joinedload
+
+from app.database import SessionLocal, Upload, Result, StatCounter, UploadStatus
+
+# Findings at or above this probability count towards condition:<label>
+CONDITION_THRESHOLD = 0.5
+
+GLOBAL_KEY = "all"
+PENDING_STATUSES = (UploadStatus.UPLOADED, UploadStatus.PROCESSING)
+
+# Uploads read per round trip while rebuilding
+REBUILD_YIELD_PER = 1000
+
+
+class StatsService:
+    """
+    Incrementally maintained global, per-user and per-day upload counters.
+
+    Every record_* call writes its deltas through the caller's session
+    without committing, so counters commit or roll back together with the
+    Upload/Result change that caused them. Each upload is counted under the
+    day it was uploaded. rebuild() recomputes everything from the tables.
+
+    Usage:
+        stats_service.record_upload_created(db, upload)
+        stats_service.record_status_change(db, upload, old_status, result=result)
+        counts = stats_service.get_counts(db, "user", user_id)
+    """
+
+    @staticmethod
+    def _contribution(upload_status: UploadStatus, result: Optional[Result] = None) -> Counter:
+        """Counters one upload adds in the given state."""
+        counts = Counter(total=1)
+        if upload_status in PENDING_STATUSES:
+            counts["pending"] += 1
+            return counts
+
+        counts["failed" if upload_status == UploadStatus.FAILED else "done"] += 1
+        if result is not None:
+            counts["normal" if result.is_normal else "abnormal"] += 1
+            for prediction in result.predictions or []:
+                if prediction.get("probability", 0) >= CONDITION_THRESHOLD:
+                    counts[f"condition:{prediction.get('label', 'Unknown')}"] += 1
+        return counts
+
+    @staticmethod
+    def _scopes(upload: Upload) -> List[tuple]:
+        return [
+            ("global", GLOBAL_KEY),
+            ("user", upload.user_id),
+            ("day", upload.created_at.date().isoformat()),
+        ]
+
+    def _apply(self, db: Session, upload: Upload, deltas: Dict[str, int]):
+        """Add deltas to the upload's global, user and day counters."""
+        # New uploads get created_at on flush
+        if upload.created_at is None:
+            db.flush()
+
+        self._increment(db, Counter({
+            (scope, key, name): delta
+            for scope, key in self._scopes(upload)
+            for name, delta in deltas.items()
+        }))
+
+    def _increment(self, db: Session, deltas: Counter):
+        """Add deltas keyed by (scope, key, name), creating missing counters."""
+        rows = [
+            {"scope": scope, "key": key, "name": name, "value": delta}
+            for (scope, key, name), delta in sorted(deltas.items())
+            if delta
+        ]
+        if not rows:
+            return
+
+        dialect = db.get_bind().dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            insert = sqlite_insert if dialect == "sqlite" else postgresql_insert
+            stmt = insert(StatCounter).values(rows)
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=[StatCounter.scope, StatCounter.key, StatCounter.name],
+                set_={"value": StatCounter.value + stmt.excluded.value}
+            ))
+            return
+
+        # Other databases: update, then insert counters that do not exist yet
+        for row in rows:
+            updated = db.query(StatCounter).filter_by(
+                scope=row["scope"], key=row["key"], name=row["name"]
+            ).update({StatCounter.value: StatCounter.value + row["value"]}, synchronize_session=False)
+            if not updated:
+                db.add(StatCounter(**row))
+        db.flush()
+
+    def record_upload_created(self, db: Session, upload: Upload):
+        """Count a new upload."""
+        self._apply(db, upload, self._contribution(upload.status))
+
+    def record_status_change(
+        self,
+        db: Session,
+        upload: Upload,
+        old_status: UploadStatus,
+        result: Optional[Result] = None
+    ):
+        """
+        Move an upload's counts from old_status to its current status.
+
+        Args:
+            result: Result created with this change, if any
+        """
+        deltas = self._contribution(upload.status, result)
+        deltas.subtract(self._contribution(old_status))
+        self._apply(db, upload, deltas)
+
+    def record_upload_deleted(self, db: Session, upload: Upload):
+        """Remove an upload (and its result) from the counters."""
+        deltas = Counter()
+        deltas.subtract(self._contribution(upload.status, upload.result))
+        self._apply(db, upload, deltas)
+
+    def record_user_deleted(self, db: Session, user_id: str):
+        """Remove all of a user's uploads from the counters, then the user's own counters."""
+        deltas: Counter = Counter()
+        uploads = db.query(Upload).options(joinedload(Upload.result)).filter(Upload.user_id == user_id)
+        for upload in uploads:
+            for name, value in self._contribution(upload.status, upload.result).items():
+                for scope, key in self._scopes(upload):
+                    if scope != "user":
+                        deltas[(scope, key, name)] -= value
+
+        self._increment(db, deltas)
+        db.query(StatCounter).filter(
+            StatCounter.scope == "user",
+            StatCounter.key == user_id
+        ).delete(synchronize_session=False)
+
+    def get_counts(self, db: Session, scope: str, key: str = GLOBAL_KEY) -> Dict[str, int]:
+        """All counters of one scope/key, e.g. ("user", user_id)."""
+        rows = db.query(StatCounter.name, StatCounter.value).filter(
+            StatCounter.scope == scope,
+            StatCounter.key == key
+        ).all()
+        return dict(rows)
+
+    def get_daily_counts(self, db: Session, days: Iterable[date], name: str = "total") -> Dict[str, int]:
+        """One counter for several days, keyed by YYYY-MM-DD."""
+        keys = [day.isoformat() for day in days]
+        rows = db.query(StatCounter.key, StatCounter.value).filter(
+            StatCounter.scope == "day",
+            StatCounter.key.in_(keys),
+            StatCounter.name == name
+        ).all()
+        return dict(rows)
+
+    def rebuild(self, db: Session) -> int:
+        """
+        Recompute every counter from the uploads and results tables and commit.
+
+        Uploads changing while the rebuild runs may be miscounted; run it
+        while the system is idle, or run it again afterwards.
+
+        Returns:
+            Number of counter rows written
+        """
+        totals: Counter = Counter()
+        query = db.query(Upload, Result).outerjoin(Result, Result.upload_id == Upload.id)
+
+        for upload, result in query.yield_per(REBUILD_YIELD_PER):
+            for name, value in self._contribution(upload.status, result).items():
+                for scope, key in self._scopes(upload):
+                    totals[(scope, key, name)] += value
+            db.expunge(upload)
+            if result is not None:
+                db.expunge(result)
+
+        db.query(StatCounter).delete(synchronize_session=False)
+        db.bulk_insert_mappings(StatCounter, [
+            {"scope": scope, "key": key, "name": name, "value": value}
+            for (scope, key, name), value in totals.items()
+            if value
+        ])
+        db.commit()
+        return len(totals)
+
+    def initialize(self):
+        """
+        Build the counters for a database that has uploads but no counters
+        yet (e.g. the first start after upgrading).
+        Should be called during application startup, after init_db().
+        """
+        db = SessionLocal()
+        try:
+            if db.query(StatCounter.scope).first() is None and db.query(Upload.id).first() is not None:
+                count = self.rebuild(db)
+                print(f"✓ Statistics counters built ({count} counters)")
+        finally:
+            db.close()
+
+
+# Create singleton instance
+stats_service = StatsService()
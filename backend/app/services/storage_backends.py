@@ -0,0 +1,288 @@
+"""
+Storage Backends for SPINEVISION-AI.
+Where uploads, heatmaps and reports are kept: the local disk or an
+S3-compatible object store, selected with STORAGE_BACKEND.
+
+Files are addressed by keys relative to the storage root, e.g.
+"reports/report_<upload_id>.pdf"; the same key names a file under
+STORAGE_DIR or an object in the bucket. Every operation blocks, so
+async code calls them through StorageService, which runs them in worker
+threads.
+"""
+
+import os
+import uuid
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional
+
+from app.config import get_settings
+
+settings = get_settings()
+
+# Chunk size used by stream()
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+
+class StorageBackend(ABC):
+    """
+    Interface implemented by every storage driver.
+
+    Usage:
+        storage_backend.put("heatmaps/heatmap_1.png", png, "image/png")
+        data = storage_backend.get("heatmaps/heatmap_1.png")
+        url = storage_backend.get_url("heatmaps/heatmap_1.png")
+    """
+
+    name = ""
+
+    @abstractmethod
+    def put(self, key: str, data: bytes, content_type: Optional[str] = None):
+        """Store data under key, replacing any existing file."""
+
+    @abstractmethod
+    def put_file(self, key: str, source: Path, content_type: Optional[str] = None):
+        """
+        Store a local file under key.
+        The source file is consumed: it is moved into place or removed
+        once uploaded.
+        """
+
+    @abstractmethod
+    def open(self, key: str) -> BinaryIO:
+        """
+        Open a stored file for reading.
+
+        Raises:
+            FileNotFoundError: If key does not exist
+        """
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        """Whether key exists."""
+
+    @abstractmethod
+    def delete(self, key: str):
+        """Delete key; missing keys are ignored."""
+
+    @abstractmethod
+    def get_url(self, key: str, download_name: Optional[str] = None) -> str:
+        """
+        URL clients can fetch the file from without going through the API.
+
+        Args:
+            download_name: File name offered to browsers saving the file
+        """
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Contents of key, or None if it does not exist."""
+        try:
+            with self.open(key) as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def stream(self, key: str, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+        """Contents of key in chunks, without loading the whole file."""
+        with self.open(key) as f:
+            while chunk := f.read(chunk_size):
+                yield chunk
+
+    def get_local_path(self, key: str) -> Optional[Path]:
+        """Path of key on the local disk, or None for remote backends."""
+        return None
+
+
+class LocalStorageBackend(StorageBackend):
+    """
+    Files under a local directory, served by the /storage static mount.
+    Only suitable for a single API instance with a persistent disk.
+    """
+
+    name = "local"
+
+    def __init__(self, root: Path, url_prefix: str = "/storage"):
+        self.root = root
+        self.url_prefix = url_prefix
+
+    def _path(self, key: str) -> Path:
+        return self.root / key
+
+    def put(self, key: str, data: bytes, content_type: Optional[str] = None):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Written aside and moved into place so readers never see a partial file
+        tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+        try:
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+    def put_file(self, key: str, source: Path, content_type: Optional[str] = None):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(source, path)
+
+    def open(self, key: str) -> BinaryIO:
+        return open(self._path(key), "rb")
+
+    def exists(self, key: str) -> bool:
+        return self._path(key).exists()
+
+    def delete(self, key: str):
+        self._path(key).unlink(missing_ok=True)
+
+    def get_url(self, key: str, download_name: Optional[str] = None) -> str:
+        return f"{self.url_prefix}/{key}"
+
+    def get_local_path(self, key: str) -> Optional[Path]:
+        return self._path(key)
+
+
+class S3StorageBackend(StorageBackend):
+    """
+    Objects in an S3-compatible bucket (AWS S3, MinIO, Ceph, moto_server),
+    shared by every API instance. Clients download through presigned URLs
+    instead of having the API proxy the bytes.
+
+    One client is shared by the whole process; it is thread-safe and keeps
+    up to max_connections HTTP connections open for reuse. Files above
+    multipart_threshold are uploaded in parallel parts of
+    multipart_chunk_size, streamed from disk.
+
+    Requires boto3.
+    """
+
+    name = "s3"
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = "",
+        endpoint_url: Optional[str] = None,
+        region: Optional[str] = None,
+        access_key_id: Optional[str] = None,
+        secret_access_key: Optional[str] = None,
+        addressing_style: str = "auto",
+        max_connections: int = 32,
+        multipart_threshold: int = 8 * 1024 * 1024,
+        multipart_chunk_size: int = 8 * 1024 * 1024,
+        url_expire_seconds: int = 900
+    ):
+        try:
+            import boto3
+            from boto3.s3.transfer import TransferConfig
+            from botocore.config import Config
+            from botocore.exceptions import ClientError
+        except ImportError as e:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires boto3 (pip install boto3)") from e
+
+        if not bucket:
+            raise ValueError("STORAGE_S3_BUCKET must be set when STORAGE_BACKEND=s3")
+
+        self.bucket = bucket
+        self.prefix = f"{prefix.strip('/')}/" if prefix.strip("/") else ""
+        self.url_expire_seconds = url_expire_seconds
+        self._client_error = ClientError
+
+        self.client = boto3.session.Session().client(
+            "s3",
+            endpoint_url=endpoint_url or None,
+            region_name=region or None,
+            aws_access_key_id=access_key_id or None,
+            aws_secret_access_key=secret_access_key or None,
+            config=Config(
+                signature_version="s3v4",
+                s3={"addressing_style": addressing_style},
+                max_pool_connections=max_connections,
+                retries={"max_attempts": 3, "mode": "standard"},
+            ),
+        )
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold,
+            multipart_chunksize=multipart_chunk_size,
+        )
+
+    def _object_key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    def _is_not_found(self, error: Exception) -> bool:
+        return error.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound")
+
+    def put(self, key: str, data: bytes, content_type: Optional[str] = None):
+        extra = {"ContentType": content_type} if content_type else {}
+        self.client.put_object(Bucket=self.bucket, Key=self._object_key(key), Body=data, **extra)
+
+    def put_file(self, key: str, source: Path, content_type: Optional[str] = None):
+        try:
+            self.client.upload_file(
+                str(source),
+                self.bucket,
+                self._object_key(key),
+                ExtraArgs={"ContentType": content_type} if content_type else None,
+                Config=self.transfer_config
+            )
+        finally:
+            source.unlink(missing_ok=True)
+
+    def open(self, key: str) -> BinaryIO:
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self._object_key(key))
+        except self._client_error as e:
+            if self._is_not_found(e):
+                raise FileNotFoundError(key) from e
+            raise
+        return response["Body"]
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+        except self._client_error as e:
+            if self._is_not_found(e):
+                return False
+            raise
+        return True
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self._object_key(key))
+
+    def get_url(self, key: str, download_name: Optional[str] = None) -> str:
+        """Presigned GET URL, valid for url_expire_seconds."""
+        params = {"Bucket": self.bucket, "Key": self._object_key(key)}
+        if download_name:
+            params["ResponseContentDisposition"] = f'attachment; filename="{download_name}"'
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params=params,
+            ExpiresIn=self.url_expire_seconds
+        )
+
+
+def create_storage_backend() -> StorageBackend:
+    """Build the backend selected by STORAGE_BACKEND."""
+    if settings.STORAGE_BACKEND == "local":
+        return LocalStorageBackend(settings.STORAGE_DIR)
+
+    if settings.STORAGE_BACKEND == "s3":
+        return S3StorageBackend(
+            bucket=settings.STORAGE_S3_BUCKET,
+            prefix=settings.STORAGE_S3_PREFIX,
+            endpoint_url=settings.STORAGE_S3_ENDPOINT_URL,
+            region=settings.STORAGE_S3_REGION,
+            access_key_id=settings.STORAGE_S3_ACCESS_KEY_ID,
+            secret_access_key=settings.STORAGE_S3_SECRET_ACCESS_KEY,
+            addressing_style=settings.STORAGE_S3_ADDRESSING_STYLE,
+            max_connections=settings.STORAGE_S3_MAX_CONNECTIONS,
+            multipart_threshold=settings.STORAGE_S3_MULTIPART_THRESHOLD,
+            multipart_chunk_size=settings.STORAGE_S3_MULTIPART_CHUNK_SIZE,
+            url_expire_seconds=settings.STORAGE_URL_EXPIRE_SECONDS
+        )
+
+    raise ValueError(f"Unknown STORAGE_BACKEND '{settings.STORAGE_BACKEND}' (expected local or s3)")
+
+
+# Create singleton instance
+storage_backend = create_storage_backend()
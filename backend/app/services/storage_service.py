@@ -1,24 +1,81 @@
 """
 Storage Service for SPINEVISION-AI.
 Handles file upload, storage, and retrieval operations.
+
+Files are kept by the configured storage backend (local disk or an
+S3-compatible bucket) under keys relative to the storage root; see
+storage_backends.py. Rows written by earlier versions hold absolute local
+paths, which are mapped to the same keys.
+
+Uploaded images are stored once per content in a content-addressed blob
+store: uploads/blobs/<h[0:2]>/<h[2:4]>/<sha256>.<ext>. Every Upload row
+of the same image points at the same blob, and the blob is removed when
+the last of those rows is deleted.
+
+Uploads claim their blob in the database (BlobClaim) before storing it
+and release the claim once their Upload row is committed; deletes lock
+the same claim row and keep blobs that are claimed or referenced. This
+holds across every API instance sharing the database and backend. An
+instance that dies between claiming and committing leaves its claim
+behind, so that blob is kept (never deleted under a row) until the
+claim is cleared by hand.
+
+Chunks of resumable uploads are stored through the backend too, one
+object per chunk recorded in an UploadChunk row, and a session's
+received offset lives in the database. Any instance can take the next
+chunk or complete the upload; only in-flight request bodies are staged
+on the receiving instance's disk.
 """
 
-import os
+import asyncio
+import hashlib
+import time
 import uuid
 import shutil
-from pathlib import Path
-from datetime import datetime
-from typing import Optional, Tuple
+from datetime import datetime, timedelta
+from pathlib import Path, PurePosixPath
+from typing import BinaryIO, List, Optional, Tuple, Union
+import aiofiles
 from fastapi import UploadFile, HTTPException, status
+from fastapi.responses import FileResponse, RedirectResponse
+from sqlalchemy import delete, func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 from app.config import get_settings
+from app.database import AsyncSessionLocal, Upload, Result, UploadSession, UploadChunk, BlobClaim
+from app.services.storage_backends import storage_backend
 
 settings = get_settings()
 
+# Read uploads in 1 MB chunks rather than buffering the whole file
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Key prefixes, matching the local storage directories
+UPLOAD_PREFIX = settings.UPLOAD_DIR.relative_to(settings.STORAGE_DIR).as_posix()
+CHUNK_PREFIX = f"{UPLOAD_PREFIX}/sessions"
+BLOB_PREFIX = settings.BLOB_DIR.relative_to(settings.STORAGE_DIR).as_posix()
+HEATMAP_PREFIX = settings.HEATMAP_DIR.relative_to(settings.STORAGE_DIR).as_posix()
+REPORT_PREFIX = settings.REPORT_DIR.relative_to(settings.STORAGE_DIR).as_posix()
+THUMBNAIL_PREFIX = settings.THUMBNAIL_DIR.relative_to(settings.STORAGE_DIR).as_posix()
+
+# Thumbnail image format -> (file extension, content type)
+THUMBNAIL_TYPES = {
+    "webp": ("webp", "image/webp"),
+    "jpeg": ("jpg", "image/jpeg"),
+}
+
+# Attempts at a claim transaction that races another instance creating the row
+BLOB_CLAIM_ATTEMPTS = 3
+
 
 class StorageService:
     """
     Service class for managing file storage operations.
     Handles uploads, heatmaps, and reports.
+    
+    Uploads and resumable upload chunks in flight are staged on the local
+    disk (storage/uploads/.partial) before they are handed to the backend.
     """
     
     @staticmethod
@@ -27,31 +84,183 @@ class StorageService:
         return filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
     
     @staticmethod
-    def _generate_unique_filename(original_filename: str) -> str:
+    def get_key(file_path: str) -> str:
         """
-        Generate a unique filename to prevent collisions.
-        Format: timestamp_uuid_originalname.ext
+        Storage key of a stored file.
+        Maps absolute paths under STORAGE_DIR, as stored by earlier
+        versions, to their key; keys are returned unchanged.
         """
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        unique_id = str(uuid.uuid4())[:8]
-        extension = StorageService._get_file_extension(original_filename)
+        path = Path(file_path)
+        if path.is_absolute():
+            try:
+                return path.relative_to(settings.STORAGE_DIR).as_posix()
+            except ValueError:
+                pass
+        return file_path
+    
+    # ------------------------------------------------------------------
+    # Content-addressed blob store
+    # ------------------------------------------------------------------
+    
+    @staticmethod
+    def _get_blob_key(content_hash: str, extension: str) -> str:
+        """Sharded key of a blob, e.g. uploads/blobs/ab/cd/abcd...ef.png"""
+        filename = f"{content_hash}.{extension}" if extension else content_hash
+        return f"{BLOB_PREFIX}/{content_hash[:2]}/{content_hash[2:4]}/{filename}"
+    
+    @staticmethod
+    def _is_blob(key: str) -> bool:
+        return key.startswith(f"{BLOB_PREFIX}/")
+    
+    @staticmethod
+    async def _lock_blob_claim(db: AsyncSession, key: str, delta: int = 0) -> int:
+        """
+        Add delta to a blob's claims, creating its BlobClaim row, and
+        return the new count. The row stays locked until db commits or
+        rolls back, so claims and deletes of the blob never interleave.
         
-        # Clean the original filename
-        clean_name = "".join(c for c in original_filename if c.isalnum() or c in "._-")
-        clean_name = clean_name[:50]  # Limit length
+        Raises:
+            IntegrityError: If another instance created the row meanwhile;
+                run the transaction again
+        """
+        now = datetime.utcnow()
+        updated = await db.execute(update(BlobClaim).where(BlobClaim.key == key).values(
+            claims=BlobClaim.claims + delta,
+            updated_at=now
+        ))
+        if updated.rowcount == 0:
+            db.add(BlobClaim(key=key, claims=delta, updated_at=now))
+            await db.flush()
+            return delta
+        return await db.scalar(select(BlobClaim.claims).where(BlobClaim.key == key))
+    
+    @staticmethod
+    async def _run_claim_transaction(fn):
+        """Run fn(db) in a new session, again if a claim row creation raced."""
+        for attempt in range(BLOB_CLAIM_ATTEMPTS):
+            try:
+                async with AsyncSessionLocal() as db:
+                    return await fn(db)
+            except IntegrityError:
+                if attempt == BLOB_CLAIM_ATTEMPTS - 1:
+                    raise
+    
+    @staticmethod
+    async def _store_blob(source: Path, content_hash: str, extension: str, content_type: Optional[str]) -> str:
+        """
+        Hand a fully written local file to the blob store.
+        
+        The blob is claimed first, so no instance deletes it from then on.
+        If the content is already stored, the source file is dropped and
+        the existing blob is reused. The claim is held until
+        release_pending() is called for it.
+        
+        Returns:
+            Key of the blob
+        """
+        key = StorageService._get_blob_key(content_hash, extension)
+        
+        async def claim(db: AsyncSession):
+            await StorageService._lock_blob_claim(db, key, 1)
+            await db.commit()
+        
+        await StorageService._run_claim_transaction(claim)
+        try:
+            if await asyncio.to_thread(storage_backend.exists, key):
+                source.unlink()
+            else:
+                await asyncio.to_thread(storage_backend.put_file, key, source, content_type)
+        except BaseException:
+            await StorageService.release_pending(key)
+            raise
+        return key
+    
+    @staticmethod
+    async def release_pending(file_path: str):
+        """
+        Release the claim of a stored upload once it is recorded (its
+        Upload row is committed) or abandoned. Must be called once per
+        save_upload / finalize_partial_upload result.
+        """
+        async def release(db: AsyncSession):
+            if await StorageService._lock_blob_claim(db, file_path, -1) <= 0:
+                await db.execute(delete(BlobClaim).where(BlobClaim.key == file_path))
+            await db.commit()
         
-        return f"{timestamp}_{unique_id}_{clean_name}"
+        await StorageService._run_claim_transaction(release)
+    
+    @staticmethod
+    async def _count_blob_references(db: AsyncSession, key: str) -> int:
+        """Number of Upload rows pointing at a blob, by key or legacy absolute path."""
+        return await db.scalar(select(func.count()).select_from(Upload).where(
+            Upload.content_hash == PurePosixPath(key).stem,
+            Upload.file_path.in_([key, str(settings.STORAGE_DIR / key)])
+        ))
+    
+    @staticmethod
+    async def _count_result_references(key: str) -> int:
+        """
+        Number of Result rows pointing at a heatmap or thumbnail, which
+        re-uploads of the same image share through the result cache.
+        """
+        file_paths = [key, str(settings.STORAGE_DIR / key)]
+        async with AsyncSessionLocal() as db:
+            return await db.scalar(select(func.count()).select_from(Result).where(or_(
+                Result.heatmap_path.in_(file_paths),
+                Result.thumbnail_path.in_(file_paths),
+                Result.heatmap_thumbnail_path.in_(file_paths)
+            )))
+    
+    @staticmethod
+    def get_user_file_paths(db: Session, user_id: str) -> List[str]:
+        """
+        Every stored file of a user's uploads and results: upload blobs,
+        heatmaps, thumbnails and reports, and the chunks of their
+        unfinished resumable uploads.
+        
+        Collect them before deleting the rows and pass each to
+        delete_file() once the deletion is committed; files still shared
+        with other users' uploads are kept.
+        """
+        rows = db.query(
+            Upload.file_path,
+            Result.heatmap_path,
+            Result.thumbnail_path,
+            Result.heatmap_thumbnail_path,
+            Result.report_path
+        ).outerjoin(Result, Result.upload_id == Upload.id).filter(Upload.user_id == user_id).all()
+        chunk_keys = db.query(UploadChunk.key).join(
+            UploadSession, UploadChunk.session_id == UploadSession.id
+        ).filter(UploadSession.user_id == user_id).all()
+        return sorted({file_path for row in rows + chunk_keys for file_path in row if file_path})
+    
+    @staticmethod
+    async def discard_upload(file_path: str):
+        """Remove a stored upload that was never recorded in an Upload row."""
+        await StorageService.release_pending(file_path)
+        await StorageService.delete_file(file_path)
     
     @staticmethod
     def validate_file(file: UploadFile) -> Tuple[bool, str]:
         """
         Validate uploaded file type and size.
         
+        Returns:
+            Tuple of (is_valid, error_message)
+        """
+        return StorageService.validate_file_info(file.filename or "", file.content_type)
+    
+    @staticmethod
+    def validate_file_info(filename: str, content_type: Optional[str]) -> Tuple[bool, str]:
+        """
+        Validate a file name and declared content type.
+        Shared by direct and resumable uploads.
+        
         Returns:
             Tuple of (is_valid, error_message)
         """
         # Check file extension
-        extension = StorageService._get_file_extension(file.filename or "")
+        extension = StorageService._get_file_extension(filename)
         if extension not in settings.ALLOWED_EXTENSIONS:
             return False, f"File type '{extension}' not allowed. Allowed types: {settings.ALLOWED_EXTENSIONS}"
         
@@ -60,24 +269,40 @@ class StorageService:
             "image/png", "image/jpeg", "image/jpg",
             "application/dicom", "application/octet-stream"
         }
-        if file.content_type and file.content_type not in allowed_content_types:
+        if content_type and content_type not in allowed_content_types:
             # Allow it anyway for DICOM files which might have unusual content types
             if extension not in {"dcm", "dicom"}:
-                return False, f"Content type '{file.content_type}' not allowed"
+                return False, f"Content type '{content_type}' not allowed"
         
         return True, ""
     
     @staticmethod
-    async def save_upload(file: UploadFile, user_id: str) -> dict:
+    def file_too_large_error() -> HTTPException:
+        """Build the 413 error raised once an upload exceeds MAX_FILE_SIZE."""
+        return HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File exceeds the maximum size of {settings.MAX_FILE_SIZE / (1024 * 1024):.4g} MB"
+        )
+    
+    @staticmethod
+    async def save_upload(file: UploadFile) -> dict:
         """
-        Save an uploaded X-ray image to storage.
+        Save an uploaded X-ray image to the blob store.
+        
+        The file is streamed to a temporary file while it is hashed, then
+        handed to the storage backend, or dropped if the same image is
+        already stored. Await release_pending() with the returned file_path
+        once the Upload row is committed, or discard_upload() to abandon it.
         
         Args:
             file: The uploaded file
-            user_id: ID of the user uploading the file
             
         Returns:
-            Dictionary with file info (path, name, size, type)
+            Dictionary with file info (key, name, size, type, SHA-256 hash)
+            
+        Raises:
+            HTTPException 413: If the file exceeds MAX_FILE_SIZE; the partial
+                file is removed as soon as the limit is crossed
         """
         # Validate file
         is_valid, error_msg = StorageService.validate_file(file)
@@ -87,30 +312,46 @@ class StorageService:
                 detail=error_msg
             )
         
-        # Generate unique filename
-        unique_filename = StorageService._generate_unique_filename(file.filename or "upload")
+        # Reject early when the client declared a size over the limit
+        if file.size is not None and file.size > settings.MAX_FILE_SIZE:
+            raise StorageService.file_too_large_error()
         
-        # Create user-specific subdirectory
-        user_upload_dir = settings.UPLOAD_DIR / user_id
-        user_upload_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Full path for the file
-        file_path = user_upload_dir / unique_filename
+        # Written under .partial until the content hash is known
+        file_path = settings.UPLOAD_DIR / ".partial" / f"{uuid.uuid4()}.upload"
+        file_path.parent.mkdir(parents=True, exist_ok=True)
         
         try:
-            # Save file to disk
-            with open(file_path, "wb") as buffer:
-                content = await file.read()
-                buffer.write(content)
-                file_size = len(content)
+            # Stream to disk in chunks, enforcing the size cap and hashing as we go
+            digest = hashlib.sha256()
+            file_size = 0
+            async with aiofiles.open(file_path, "wb") as buffer:
+                while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                    file_size += len(chunk)
+                    if file_size > settings.MAX_FILE_SIZE:
+                        raise StorageService.file_too_large_error()
+                    digest.update(chunk)
+                    await buffer.write(chunk)
+            
+            content_hash = digest.hexdigest()
+            blob_key = await StorageService._store_blob(
+                file_path,
+                content_hash,
+                StorageService._get_file_extension(file.filename or ""),
+                file.content_type
+            )
             
             return {
                 "file_name": file.filename,
-                "file_path": str(file_path),
-                "file_size": str(file_size),
+                "file_path": blob_key,
+                "file_size": file_size,
                 "file_type": file.content_type or "unknown",
+                "content_hash": content_hash,
             }
             
+        except HTTPException:
+            if file_path.exists():
+                file_path.unlink()
+            raise
         except Exception as e:
             # Clean up on error
             if file_path.exists():
@@ -120,8 +361,234 @@ class StorageService:
                 detail=f"Failed to save file: {str(e)}"
             )
     
+    # ------------------------------------------------------------------
+    # Resumable uploads
+    # Each chunk is staged locally while it streams in, then stored under
+    # uploads/sessions/<session_id>/ and recorded as an UploadChunk. The
+    # conditional update of UploadSession.received decides which of two
+    # writers at the same offset wins, on any instance.
+    # ------------------------------------------------------------------
+    
+    @staticmethod
+    def _get_chunk_key(session_id: str, offset: int) -> str:
+        # Unique per write, so a losing writer never overwrites the winner's data
+        return f"{CHUNK_PREFIX}/{session_id}/{offset:012d}-{uuid.uuid4().hex[:8]}.part"
+    
+    @staticmethod
+    async def _get_received(session_id: str) -> int:
+        """
+        Bytes received so far for a resumable upload.
+        
+        Raises:
+            HTTPException 404: If the session no longer exists
+        """
+        async with AsyncSessionLocal() as db:
+            received = await db.scalar(select(UploadSession.received).where(UploadSession.id == session_id))
+        if received is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Upload session not found"
+            )
+        return received
+    
+    @staticmethod
+    async def append_chunk(session: UploadSession, offset: int, chunks) -> int:
+        """
+        Append a chunk to a resumable upload.
+        
+        Args:
+            session: The upload session, as read at the start of the request
+            offset: Byte offset the client is writing at; must equal the
+                number of bytes already received
+            chunks: Async iterator of bytes (e.g. request.stream())
+            
+        Returns:
+            New received offset
+            
+        Raises:
+            HTTPException 409: If offset does not match the received offset,
+                also when another request wrote at the same offset first
+            HTTPException 413: If the chunk would exceed the declared size
+        """
+        def offset_mismatch(received: int) -> HTTPException:
+            return HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Offset mismatch: expected {received}, got {offset}"
+            )
+        
+        if offset != session.received:
+            raise offset_mismatch(session.received)
+        
+        staged_path = settings.UPLOAD_DIR / ".partial" / f"{uuid.uuid4()}.chunk"
+        staged_path.parent.mkdir(parents=True, exist_ok=True)
+        key = None
+        try:
+            written = offset
+            async with aiofiles.open(staged_path, "wb") as buffer:
+                async for chunk in chunks:
+                    written += len(chunk)
+                    if written > session.file_size:
+                        raise HTTPException(
+                            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail=f"Chunk exceeds the declared file size of {session.file_size} bytes"
+                        )
+                    await buffer.write(chunk)
+            if written == offset:
+                return offset
+            
+            key = StorageService._get_chunk_key(session.id, offset)
+            await asyncio.to_thread(storage_backend.put_file, key, staged_path)
+            
+            async with AsyncSessionLocal() as db:
+                advanced = await db.execute(update(UploadSession).where(
+                    UploadSession.id == session.id,
+                    UploadSession.received == offset
+                ).values(received=written))
+                if advanced.rowcount == 1:
+                    db.add(UploadChunk(session_id=session.id, offset=offset, size=written - offset, key=key))
+                    await db.commit()
+                    key = None
+                    return written
+            raise offset_mismatch(await StorageService._get_received(session.id))
+        finally:
+            # The client resends a rejected chunk from `offset`
+            staged_path.unlink(missing_ok=True)
+            if key:
+                await asyncio.to_thread(storage_backend.delete, key)
+    
     @staticmethod
-    def save_heatmap(image_data: bytes, upload_id: str) -> str:
+    def _assemble_chunks(keys: List[str], target: Path) -> str:
+        """Concatenate stored chunks into a local file; returns its SHA-256."""
+        digest = hashlib.sha256()
+        with open(target, "wb") as out:
+            for key in keys:
+                with storage_backend.open(key) as source:
+                    while data := source.read(UPLOAD_CHUNK_SIZE):
+                        digest.update(data)
+                        out.write(data)
+        return digest.hexdigest()
+    
+    @staticmethod
+    async def finalize_partial_upload(session: UploadSession) -> dict:
+        """
+        Assemble a completed resumable upload and move it into the blob
+        store. The chunks are read back in a worker thread and hashed as
+        they are joined. The result is pending, as with save_upload; the
+        session and its chunks are left for discard_partial_upload().
+        
+        Returns:
+            Dictionary with file info, same shape as save_upload
+            
+        Raises:
+            HTTPException 409: If the received chunks do not add up to the
+                declared file size
+        """
+        async with AsyncSessionLocal() as db:
+            chunks = (await db.scalars(select(UploadChunk).where(
+                UploadChunk.session_id == session.id
+            ).order_by(UploadChunk.offset))).all()
+        
+        received = 0
+        for chunk in chunks:
+            if chunk.offset != received:
+                break
+            received += chunk.size
+        if received != session.file_size:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Upload incomplete: received {received} of {session.file_size} bytes"
+            )
+        
+        assembled_path = settings.UPLOAD_DIR / ".partial" / f"{uuid.uuid4()}.upload"
+        assembled_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            content_hash = await asyncio.to_thread(
+                StorageService._assemble_chunks,
+                [chunk.key for chunk in chunks],
+                assembled_path
+            )
+            blob_key = await StorageService._store_blob(
+                assembled_path,
+                content_hash,
+                StorageService._get_file_extension(session.file_name),
+                session.file_type
+            )
+        finally:
+            assembled_path.unlink(missing_ok=True)
+        
+        return {
+            "file_name": session.file_name,
+            "file_path": blob_key,
+            "file_size": received,
+            "file_type": session.file_type or "unknown",
+            "content_hash": content_hash,
+        }
+    
+    @staticmethod
+    async def discard_partial_upload(db: AsyncSession, session_id: str) -> bool:
+        """
+        Delete a resumable upload session, then its stored chunks.
+        
+        Returns:
+            Whether this call deleted the session; False if another
+            request completed or discarded it first
+        """
+        keys = (await db.scalars(select(UploadChunk.key).where(UploadChunk.session_id == session_id))).all()
+        await db.execute(delete(UploadChunk).where(UploadChunk.session_id == session_id))
+        deleted = await db.execute(delete(UploadSession).where(UploadSession.id == session_id))
+        await db.commit()
+        
+        for key in keys:
+            await asyncio.to_thread(storage_backend.delete, key)
+        return deleted.rowcount == 1
+    
+    @staticmethod
+    async def expire_partial_uploads() -> int:
+        """
+        Discard resumable upload sessions older than
+        RESUMABLE_SESSION_TTL_HOURS, with their stored chunks.
+        
+        Files left in this instance's staging directory by interrupted
+        requests are removed once they are as old.
+        
+        Returns:
+            Number of sessions discarded
+        """
+        ttl = timedelta(hours=settings.RESUMABLE_SESSION_TTL_HOURS)
+        async with AsyncSessionLocal() as db:
+            expired = (await db.scalars(select(UploadSession.id).where(
+                UploadSession.created_at < datetime.utcnow() - ttl
+            ))).all()
+            for session_id in expired:
+                await StorageService.discard_partial_upload(db, session_id)
+        
+        partial_dir = settings.UPLOAD_DIR / ".partial"
+        cutoff = time.time() - ttl.total_seconds()
+        for staged_path in partial_dir.iterdir() if partial_dir.exists() else []:
+            if staged_path.is_file() and staged_path.stat().st_mtime < cutoff:
+                staged_path.unlink(missing_ok=True)
+        
+        return len(expired)
+    
+    @staticmethod
+    def _hash_file(file_path: Path) -> str:
+        """SHA-256 hex digest of a file, read in chunks."""
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            while chunk := f.read(UPLOAD_CHUNK_SIZE):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
+    @staticmethod
+    def get_heatmap_key(upload_id: str) -> str:
+        return f"{HEATMAP_PREFIX}/heatmap_{upload_id}.png"
+    
+    @staticmethod
+    def get_report_key(upload_id: str) -> str:
+        return f"{REPORT_PREFIX}/report_{upload_id}.pdf"
+    
+    @staticmethod
+    async def save_heatmap(image_data: bytes, upload_id: str) -> str:
         """
         Save a generated heatmap image.
         
@@ -130,18 +597,14 @@ class StorageService:
             upload_id: Associated upload ID
             
         Returns:
-            Path to saved heatmap
+            Key of the saved heatmap
         """
-        filename = f"heatmap_{upload_id}.png"
-        file_path = settings.HEATMAP_DIR / filename
-        
-        with open(file_path, "wb") as f:
-            f.write(image_data)
-        
-        return str(file_path)
+        key = StorageService.get_heatmap_key(upload_id)
+        await asyncio.to_thread(storage_backend.put, key, image_data, "image/png")
+        return key
     
     @staticmethod
-    def save_report(report_data: bytes, upload_id: str) -> str:
+    async def save_report(report_data: bytes, upload_id: str) -> str:
         """
         Save a generated PDF report.
         
@@ -150,62 +613,135 @@ class StorageService:
             upload_id: Associated upload ID
             
         Returns:
-            Path to saved report
+            Key of the saved report
         """
-        filename = f"report_{upload_id}.pdf"
-        file_path = settings.REPORT_DIR / filename
-        
-        with open(file_path, "wb") as f:
-            f.write(report_data)
+        key = StorageService.get_report_key(upload_id)
+        await asyncio.to_thread(storage_backend.put, key, report_data, "application/pdf")
+        return key
+    
+    @staticmethod
+    async def save_thumbnail(image_data: bytes, name: str, image_format: str) -> str:
+        """
+        Save a preview image.
         
-        return str(file_path)
+        Args:
+            image_data: Encoded image data
+            name: File name without extension, e.g. upload_<upload_id>
+            image_format: webp or jpeg
+            
+        Returns:
+            Key of the saved thumbnail
+        """
+        extension, content_type = THUMBNAIL_TYPES[image_format]
+        key = f"{THUMBNAIL_PREFIX}/{name}.{extension}"
+        await asyncio.to_thread(storage_backend.put, key, image_data, content_type)
+        return key
     
     @staticmethod
-    def get_file(file_path: str) -> Optional[bytes]:
+    async def read_file(file_path: str) -> Optional[bytes]:
         """
         Retrieve a file from storage.
         
         Args:
-            file_path: Path to the file
+            file_path: Key (or legacy path) of the file
             
         Returns:
             File contents as bytes, or None if not found
         """
-        path = Path(file_path)
-        if path.exists():
-            with open(path, "rb") as f:
-                return f.read()
-        return None
+        return await asyncio.to_thread(storage_backend.get, StorageService.get_key(file_path))
+    
+    @staticmethod
+    async def get_image_source(file_path: str) -> Union[str, bytes, None]:
+        """
+        An upload in the form the image decoder takes: its local path when
+        the backend is the local disk (read in place), otherwise its bytes.
+        """
+        local_path = storage_backend.get_local_path(StorageService.get_key(file_path))
+        if local_path is not None:
+            return str(local_path)
+        return await StorageService.read_file(file_path)
+    
+    @staticmethod
+    async def file_exists(file_path: str) -> bool:
+        return await asyncio.to_thread(storage_backend.exists, StorageService.get_key(file_path))
+    
+    @staticmethod
+    def exists(file_path: str) -> bool:
+        """Blocking variant of file_exists, for code running in worker threads."""
+        return storage_backend.exists(StorageService.get_key(file_path))
+    
+    @staticmethod
+    def open_file(file_path: str) -> BinaryIO:
+        """
+        Open a stored file for reading; blocking, for code running in
+        worker threads (e.g. streamed exports).
+        
+        Raises:
+            FileNotFoundError: If the file does not exist
+        """
+        return storage_backend.open(StorageService.get_key(file_path))
     
     @staticmethod
-    def delete_file(file_path: str) -> bool:
+    async def delete_file(file_path: str) -> bool:
         """
         Delete a file from storage.
         
+        Upload blobs are shared by every Upload row with the same content
+        and are only removed once no row references them and no upload on
+        any instance has claimed them; heatmaps and thumbnails are kept while any Result row still
+        references them. Call this after the row deletion is committed.
+        
         Args:
-            file_path: Path to the file
+            file_path: Key (or legacy path) of the file
             
         Returns:
-            True if deleted, False if not found
+            False if the file was kept because it is still referenced
         """
-        path = Path(file_path)
-        if path.exists():
-            path.unlink()
-            return True
-        return False
+        key = StorageService.get_key(file_path)
+        if StorageService._is_blob(key):
+            # With the claim row locked no upload can claim the blob, and an
+            # upload releases its claim only after its row is committed, so
+            # an unclaimed blob without rows is safe to delete.
+            async def delete_blob(db: AsyncSession) -> bool:
+                if await StorageService._lock_blob_claim(db, key) > 0:
+                    return False
+                if await StorageService._count_blob_references(db, key):
+                    return False
+                await asyncio.to_thread(storage_backend.delete, key)
+                await db.execute(delete(BlobClaim).where(BlobClaim.key == key))
+                await db.commit()
+                return True
+            
+            return await StorageService._run_claim_transaction(delete_blob)
+        
+        if await StorageService._count_result_references(key):
+            return False
+        await asyncio.to_thread(storage_backend.delete, key)
+        return True
     
     @staticmethod
-    def get_file_url(file_path: str) -> str:
+    def get_file_url(file_path: str, download_name: Optional[str] = None) -> str:
         """
-        Convert a file path to a URL-friendly path.
-        Used for serving files via the API.
+        URL clients download a stored file from: a /storage path with the
+        local backend, a presigned URL with S3.
         """
-        # Return relative path from storage directory
-        try:
-            relative_path = Path(file_path).relative_to(settings.STORAGE_DIR)
-            return f"/storage/{relative_path}".replace("\\", "/")
-        except ValueError:
-            return file_path
+        return storage_backend.get_url(StorageService.get_key(file_path), download_name)
+    
+    @staticmethod
+    def file_response(file_path: str, media_type: str, filename: str):
+        """
+        Response for an API download of a stored file. Local files are
+        sent directly; remote files are redirected to a presigned URL so
+        the bytes do not pass through the API.
+        """
+        key = StorageService.get_key(file_path)
+        local_path = storage_backend.get_local_path(key)
+        if local_path is not None:
+            return FileResponse(path=str(local_path), media_type=media_type, filename=filename)
+        return RedirectResponse(
+            storage_backend.get_url(key, download_name=filename),
+            status_code=status.HTTP_307_TEMPORARY_REDIRECT
+        )
 
 
 # Create singleton instance
@@ -0,0 +1,120 @@
+"""
+User Cache for SPINEVISION-AI.
+Remembers verified access tokens so authenticated requests skip the JWT
+check and the users table lookup.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+from app.config import get_settings
+from app.database import User
+
+settings = get_settings()
+
+# User columns kept per token; the password hash is never cached
+SNAPSHOT_COLUMNS = ("id", "email", "full_name", "role", "created_at", "is_active")
+
+
+class UserCache:
+    """
+    Bounded TTL/LRU cache of verified access token -> user snapshot.
+
+    An entry lives for AUTH_CACHE_TTL_SECONDS or until its token expires,
+    whichever is sooner. Changes to a user's role or status, and deleting
+    the user, must call invalidate_user() so the next request reloads
+    the user. The cache is per process: with several server processes a
+    change made through one is seen by the others within the TTL.
+
+    Usage:
+        snapshot = user_cache.get(token)
+        user_cache.put(token, user, expires_at=payload["exp"])
+        user_cache.invalidate_user(user.id)
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._tokens_by_user: Dict[str, Set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a token.
+
+        Returns:
+            Snapshot of the token's user (SNAPSHOT_COLUMNS), or None on a
+            miss or an expired entry
+        """
+        entry = self._entries.get(token)
+        if entry is not None and entry[0] <= time.monotonic():
+            self._remove(token)
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(token)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, token: str, user: User, expires_at: Optional[float] = None):
+        """
+        Cache an active user for a verified token.
+
+        Args:
+            expires_at: The token's exp claim (UNIX time), if any
+        """
+        if self.max_size <= 0 or self.ttl_seconds <= 0:
+            return
+
+        lifetime = self.ttl_seconds
+        if expires_at is not None:
+            lifetime = min(lifetime, expires_at - time.time())
+        if lifetime <= 0:
+            return
+
+        self._remove(token)
+        snapshot = {column: getattr(user, column) for column in SNAPSHOT_COLUMNS}
+        self._entries[token] = (time.monotonic() + lifetime, snapshot)
+        self._tokens_by_user.setdefault(user.id, set()).add(token)
+
+        while len(self._entries) > self.max_size:
+            self._remove(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id: str):
+        """Drop every cached token of a user."""
+        for token in self._tokens_by_user.pop(user_id, ()):
+            self._entries.pop(token, None)
+
+    def clear(self):
+        self._entries.clear()
+        self._tokens_by_user.clear()
+
+    def _remove(self, token: str):
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        user_id = entry[1]["id"]
+        tokens = self._tokens_by_user.get(user_id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[user_id]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# Create singleton instance
+user_cache = UserCache(settings.AUTH_CACHE_SIZE, settings.AUTH_CACHE_TTL_SECONDS)
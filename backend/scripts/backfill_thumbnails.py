@@ -0,0 +1,85 @@
+"""
+Generate missing thumbnails for SPINEVISION-AI.
+
+Results processed before thumbnails existed have no previews, so history
+lists show a placeholder for them. This decodes each such upload and
+heatmap once and stores their thumbnails, the way the pipeline does for
+new uploads. Results that share a heatmap (re-uploads of the same image)
+share the thumbnails too.
+
+Safe to run again, also while the server is running.
+
+Run from the backend directory:
+    python scripts/backfill_thumbnails.py
+"""
+
+import asyncio
+import io
+import sys
+from pathlib import Path
+
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.database import SessionLocal, Result, init_db  # noqa: E402
+from app.services.ml_service import ml_service, THUMBNAIL_FORMAT  # noqa: E402
+from app.services.storage_service import storage_service  # noqa: E402
+
+
+async def backfill():
+    init_db()
+    db = SessionLocal()
+    created = 0
+    missing = 0
+    # Thumbnails already made in this run, by heatmap/upload key
+    done = {}
+    try:
+        results = db.query(Result).filter(
+            Result.thumbnail_path.is_(None) | (Result.thumbnail_path == "") |
+            Result.heatmap_thumbnail_path.is_(None) | (Result.heatmap_thumbnail_path == "")
+        ).all()
+        for result in results:
+            upload = result.upload
+
+            if not result.thumbnail_path and upload.file_path:
+                if upload.file_path not in done:
+                    image = ml_service._decode_image(await storage_service.get_image_source(upload.file_path))
+                    done[upload.file_path] = image and await storage_service.save_thumbnail(
+                        image.thumbnail, f"upload_{upload.id}", THUMBNAIL_FORMAT
+                    )
+                    created += bool(done[upload.file_path])
+                if done[upload.file_path]:
+                    result.thumbnail_path = done[upload.file_path]
+                else:
+                    missing += 1
+
+            if not result.heatmap_thumbnail_path and result.heatmap_path:
+                if result.heatmap_path not in done:
+                    heatmap = await storage_service.read_file(result.heatmap_path)
+                    done[result.heatmap_path] = heatmap and await storage_service.save_thumbnail(
+                        ml_service._encode_thumbnail(Image.open(io.BytesIO(heatmap))),
+                        f"heatmap_{upload.id}",
+                        THUMBNAIL_FORMAT
+                    )
+                    created += bool(done[result.heatmap_path])
+                if done[result.heatmap_path]:
+                    result.heatmap_thumbnail_path = done[result.heatmap_path]
+                else:
+                    missing += 1
+
+            db.commit()
+    finally:
+        db.close()
+
+    print(f"✓ Created {created} thumbnail(s) ({THUMBNAIL_FORMAT})")
+    if missing:
+        print(f"  {missing} thumbnail(s) skipped: source file not found or unreadable")
+
+
+def main():
+    asyncio.run(backfill())
+
+
+if __name__ == "__main__":
+    main()
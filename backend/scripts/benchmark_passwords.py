@@ -0,0 +1,77 @@
+"""
+Password hashing benchmark for SPINEVISION-AI.
+
+Verifies a password concurrently through the password service, the way
+simultaneous logins do, and prints logins per second overall and per
+core. The Argon2 parameters and pool size default to the PASSWORD_HASH_*
+settings and can be overridden to compare configurations.
+
+Run from the backend directory:
+    python scripts/benchmark_passwords.py [--count 64]
+    python scripts/benchmark_passwords.py --time-cost 2 --memory-cost 19456 --workers 4
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.config import get_settings  # noqa: E402
+from app.services.password_service import PasswordService  # noqa: E402
+
+settings = get_settings()
+
+
+async def run(service: PasswordService, count: int) -> float:
+    """Verify count logins concurrently; returns elapsed seconds."""
+    hashed = await service.hash("benchmark-password")
+    # Warm up every worker thread
+    await asyncio.gather(*(service.verify("benchmark-password", hashed) for _ in range(service.workers)))
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(service.verify("benchmark-password", hashed) for _ in range(count)))
+    elapsed = time.perf_counter() - start
+
+    assert all(valid for valid, _ in results)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=64, help="logins to verify")
+    parser.add_argument("--time-cost", type=int, default=settings.PASSWORD_HASH_TIME_COST)
+    parser.add_argument("--memory-cost", type=int, default=settings.PASSWORD_HASH_MEMORY_COST, help="KiB")
+    parser.add_argument("--parallelism", type=int, default=settings.PASSWORD_HASH_PARALLELISM)
+    parser.add_argument("--workers", type=int, default=settings.PASSWORD_HASH_WORKERS, help="0 = one per CPU core")
+    args = parser.parse_args()
+
+    service = PasswordService(
+        time_cost=args.time_cost,
+        memory_cost=args.memory_cost,
+        parallelism=args.parallelism,
+        workers=args.workers,
+        max_pending=args.count + args.workers + 1
+    )
+    try:
+        elapsed = asyncio.run(run(service, args.count))
+    finally:
+        service.shutdown()
+
+    cores = min(service.workers, os.cpu_count() or 1)
+    throughput = args.count / elapsed
+
+    print(f"argon2:           t={args.time_cost} m={args.memory_cost} KiB p={args.parallelism}")
+    print(f"workers:          {service.workers} ({os.cpu_count()} CPU cores)")
+    print(f"logins:           {args.count}")
+    print(f"per login:        {elapsed / args.count * 1000:.1f} ms (wall, concurrent)")
+    print(f"throughput:       {throughput:.1f} logins/s")
+    print(f"per core:         {throughput / cores:.1f} logins/s")
+    print(f"peak hash memory: {service.workers * args.memory_cost / 1024:.0f} MiB")
+
+
+if __name__ == "__main__":
+    main()
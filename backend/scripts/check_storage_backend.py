@@ -0,0 +1,122 @@
+"""
+Storage backend check for SPINEVISION-AI.
+
+Exercises put, multipart put_file, get, stream, exists, download URL and
+delete against the configured storage backend (STORAGE_BACKEND and
+STORAGE_S3_*), under a throwaway key prefix. Use it to validate a bucket
+and credentials before switching an installation to it.
+
+With --moto the S3 driver is checked against an in-process moto server,
+a local stand-in for S3 (pip install "moto[server]").
+
+Run from the backend directory:
+    python scripts/check_storage_backend.py
+    STORAGE_BACKEND=s3 STORAGE_S3_BUCKET=spinevision \
+        STORAGE_S3_ENDPOINT_URL=http://localhost:9000 python scripts/check_storage_backend.py
+    python scripts/check_storage_backend.py --moto
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import urllib.request
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def start_moto() -> str:
+    """Start a moto S3 server with a bucket and point the S3 settings at it."""
+    from moto.server import ThreadedMotoServer
+
+    server = ThreadedMotoServer(port=0)
+    server.start()
+    host, port = server.get_host_and_port()
+    endpoint_url = f"http://{host}:{port}"
+
+    os.environ.update({
+        "STORAGE_BACKEND": "s3",
+        "STORAGE_S3_BUCKET": "spinevision-check",
+        "STORAGE_S3_ENDPOINT_URL": endpoint_url,
+        "STORAGE_S3_ACCESS_KEY_ID": "testing",
+        "STORAGE_S3_SECRET_ACCESS_KEY": "testing",
+        "STORAGE_S3_ADDRESSING_STYLE": "path",
+        # Small parts so the multipart path is exercised
+        "STORAGE_S3_MULTIPART_THRESHOLD": str(5 * 1024 * 1024),
+        "STORAGE_S3_MULTIPART_CHUNK_SIZE": str(5 * 1024 * 1024),
+    })
+    return endpoint_url
+
+
+def fetch(url: str) -> bytes:
+    """Download a URL returned by get_url."""
+    with urllib.request.urlopen(url) as response:
+        return response.read()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--moto", action="store_true", help="check the S3 driver against a local moto server")
+    parser.add_argument("--size-mb", type=int, default=12, help="size of the multipart test file")
+    parser.add_argument("--base-url", default="", help="API URL for checking /storage links (local backend)")
+    args = parser.parse_args()
+
+    if args.moto:
+        print(f"moto server:  {start_moto()}")
+
+    from app.services.storage_backends import storage_backend
+
+    if args.moto:
+        storage_backend.client.create_bucket(Bucket="spinevision-check")
+
+    prefix = f"check/{uuid.uuid4().hex[:8]}"
+    small_key = f"{prefix}/small.bin"
+    large_key = f"{prefix}/large.bin"
+    small = os.urandom(1024)
+    large = os.urandom(args.size_mb * 1024 * 1024)
+
+    print(f"backend:      {storage_backend.name}")
+    try:
+        storage_backend.put(small_key, small, "application/octet-stream")
+        assert storage_backend.get(small_key) == small, "get returned different bytes"
+        assert storage_backend.exists(small_key), "exists is False after put"
+        print("put/get:      OK")
+
+        with tempfile.NamedTemporaryFile(dir=Path.cwd(), delete=False) as f:
+            f.write(large)
+        storage_backend.put_file(large_key, Path(f.name))
+        assert not Path(f.name).exists(), "put_file left the source file"
+        assert b"".join(storage_backend.stream(large_key)) == large, "stream returned different bytes"
+        print(f"put_file:     OK ({args.size_mb} MB, streamed back)")
+
+        url = storage_backend.get_url(small_key, download_name="small.bin")
+        if url.startswith("http"):
+            assert fetch(url) == small, "URL returned different bytes"
+            print("download URL: OK")
+        elif args.base_url:
+            assert fetch(args.base_url.rstrip("/") + url) == small, "URL returned different bytes"
+            print("download URL: OK")
+        else:
+            print(f"download URL: {url} (pass --base-url to fetch it)")
+
+        assert storage_backend.get(f"{prefix}/missing") is None, "get of a missing key did not return None"
+        print("missing key:  OK")
+    finally:
+        storage_backend.delete(small_key)
+        storage_backend.delete(large_key)
+
+    assert not storage_backend.exists(small_key) and not storage_backend.exists(large_key)
+    storage_backend.delete(small_key)  # Missing keys are ignored
+    print("delete:       OK")
+
+    local_dir = storage_backend.get_local_path(prefix)
+    if local_dir is not None:
+        local_dir.rmdir()
+        if not any(local_dir.parent.iterdir()):
+            local_dir.parent.rmdir()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Move files stored by earlier versions into the storage backend for SPINEVISION-AI.
+
+- Uploads stored before the blob store existed live in
+  storage/uploads/<user_id>/ with one copy per upload; each is moved to
+  its content-addressed blob, so identical images share one file.
+- Rows holding absolute local paths are rewritten to storage keys.
+- With STORAGE_BACKEND=s3, local files are uploaded to the bucket (and
+  removed locally) as their rows are migrated.
+
+Safe to run again; run it while the server is stopped.
+
+Run from the backend directory:
+    python scripts/migrate_storage.py
+"""
+
+import sys
+from pathlib import Path
+from typing import Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.database import SessionLocal, Upload, Result, init_db  # noqa: E402
+from app.services.storage_backends import storage_backend  # noqa: E402
+from app.services.storage_service import StorageService  # noqa: E402
+
+
+def migrate_file(file_path: str, key: str) -> Optional[str]:
+    """
+    Make sure a file recorded as file_path is stored under key.
+
+    Returns:
+        key, or None if neither the stored file nor the local file exists
+    """
+    source = Path(file_path)
+    if storage_backend.get_local_path(key) == source:
+        # Already in place on the local backend; only the row changes
+        return key if source.exists() else None
+
+    if storage_backend.exists(key):
+        source.unlink(missing_ok=True)
+        return key
+    if source.exists():
+        storage_backend.put_file(key, source)
+        return key
+    return None
+
+
+def main():
+    init_db()
+    db = SessionLocal()
+    migrated = 0
+    missing = 0
+    try:
+        uploads = db.query(Upload).order_by(Upload.created_at).all()
+        for upload in uploads:
+            if not upload.content_hash:
+                # Stored before uploads were hashed
+                if not Path(upload.file_path).exists():
+                    missing += 1
+                    continue
+                upload.content_hash = StorageService._hash_file(Path(upload.file_path))
+            key = StorageService._get_blob_key(
+                upload.content_hash, StorageService._get_file_extension(upload.file_name or "")
+            )
+            if upload.file_path == key:
+                continue
+            if migrate_file(upload.file_path, key) is None:
+                missing += 1
+                continue
+            upload.file_path = key
+            migrated += 1
+            # Commit per file so an interrupted run leaves rows and files consistent
+            db.commit()
+
+        results = db.query(Result).filter(
+            Result.heatmap_path.isnot(None) | Result.report_path.isnot(None)
+        ).all()
+        for result in results:
+            for column in ("heatmap_path", "report_path"):
+                file_path = getattr(result, column)
+                if not file_path or StorageService.get_key(file_path) == file_path:
+                    continue
+                key = migrate_file(file_path, StorageService.get_key(file_path))
+                if key is None:
+                    missing += 1
+                    continue
+                setattr(result, column, key)
+                migrated += 1
+                db.commit()
+    finally:
+        db.close()
+
+    print(f"✓ Migrated {migrated} file(s) to the {storage_backend.name} storage backend")
+    if missing:
+        print(f"  {missing} file(s) skipped: file not found")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""
+Rebuild the statistics rollup counters for SPINEVISION-AI.
+
+Recomputes every StatCounter row from the uploads and results tables.
+Run after restoring a backup, importing data, or whenever the dashboard
+counts look wrong. Best run while no uploads are being processed.
+
+Run from the backend directory:
+    python scripts/rebuild_stats.py
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.database import SessionLocal, init_db  # noqa: E402
+from app.services.stats_service import stats_service  # noqa: E402
+
+
+def main():
+    init_db()
+    db = SessionLocal()
+    try:
+        count = stats_service.rebuild(db)
+    finally:
+        db.close()
+    print(f"✓ Rebuilt {count} statistics counters")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Query count tests for the history and admin listings.
+
+Each listing must issue the same number of SQL statements however many
+rows it returns (no per-row lazy loads or lookups).
+
+Run from the backend directory:
+    python -m pytest tests
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# Isolated database; checked before app.config reads the environment
+_tmp_dir = tempfile.mkdtemp(prefix="spinevision-test-")
+os.environ["DATABASE_URL"] = f"sqlite:///{Path(_tmp_dir) / 'test.db'}"
+os.environ["AUTH_CACHE_SIZE"] = "0"  # Every request looks up its user
+os.environ["DEBUG"] = "false"
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app.main import app  # noqa: E402
+from app.api.auth import create_access_token  # noqa: E402
+from app.database import (  # noqa: E402
+    SessionLocal, engine, async_engine, init_db,
+    User, Upload, Result, Finding, UserRole, UploadStatus
+)
+
+LISTINGS = [
+    "/history",
+    "/admin/users",
+    "/admin/scans",
+    "/admin/findings?label=Scoliosis&limit=500",
+    "/admin/activity?limit=500",
+]
+
+PREDICTIONS = [
+    {"label": "Scoliosis", "probability": 0.8},
+    {"label": "Spinal Stenosis", "probability": 0.3},
+]
+
+
+class QueryCounter:
+    """Counts statements sent by the sync and async engines."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        for bind in (engine, async_engine.sync_engine):
+            event.listen(bind, "before_cursor_execute", self)
+        return self
+
+    def __exit__(self, *exc):
+        for bind in (engine, async_engine.sync_engine):
+            event.remove(bind, "before_cursor_execute", self)
+
+
+def add_rows(admin_id: str, n: int):
+    """Add n doctors with one analyzed upload each, and n uploads for the admin."""
+    db = SessionLocal()
+    try:
+        for _ in range(n):
+            doctor = User(email=f"{os.urandom(6).hex()}@test", hashed_password="-", full_name="Doctor")
+            db.add(doctor)
+            db.flush()
+            for user_id in (doctor.id, admin_id):
+                upload = Upload(
+                    user_id=user_id,
+                    file_name="xray.png",
+                    file_path="uploads/xray.png",
+                    file_type="image/png",
+                    file_size=1,
+                    status=UploadStatus.DONE
+                )
+                upload.result = Result(
+                    model_version="test",
+                    overall_classification="Abnormal - High Confidence",
+                    predictions=PREDICTIONS,
+                    confidence_score=0.8,
+                    heatmap_path="heatmaps/heatmap_test.png",
+                    findings=Finding.from_predictions(PREDICTIONS)
+                )
+                db.add(upload)
+        db.commit()
+    finally:
+        db.close()
+
+
+@pytest.fixture(scope="module")
+def client():
+    init_db()
+    db = SessionLocal()
+    admin = User(email="admin@test", hashed_password="-", full_name="Admin", role=UserRole.ADMIN)
+    db.add(admin)
+    db.commit()
+    admin_id = admin.id
+    db.close()
+
+    # No lifespan: the listings need neither the job queue nor the process pools
+    c = TestClient(app)
+    c.headers["Authorization"] = f"Bearer {create_access_token({'sub': admin_id})}"
+    c.admin_id = admin_id
+    return c
+
+
+def count_queries(client: TestClient, path: str) -> int:
+    with QueryCounter() as counter:
+        response = client.get(path)
+    assert response.status_code == 200, response.text
+    return counter.count
+
+
+@pytest.mark.parametrize("path", LISTINGS)
+def test_listing_query_count_is_constant(client, path):
+    add_rows(client.admin_id, 1)
+    few = count_queries(client, path)
+    rows_few = len(_items(client.get(path).json()))
+
+    add_rows(client.admin_id, 8)
+    many = count_queries(client, path)
+    rows_many = len(_items(client.get(path).json()))
+
+    assert rows_many > rows_few
+    assert many == few, f"{path}: {few} queries for {rows_few} rows, {many} for {rows_many}"
+
+
+def _items(body):
+    return body["items"] if isinstance(body, dict) else body
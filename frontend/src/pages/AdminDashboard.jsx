@@ -350,10 +350,10 @@ const AdminDashboard = () => {
                                             <td className="px-6 py-4">
                                                 <button
                                                     onClick={() => handleToggleUserStatus(u.id)}
-                                                    className={`px-3 py-1 rounded-full text-xs font-medium ${u.is_active === 'true' ? 'bg-green-100 text-green-700' : 'bg-red-100 text-red-700'
+                                                    className={`px-3 py-1 rounded-full text-xs font-medium ${u.is_active ? 'bg-green-100 text-green-700' : 'bg-red-100 text-red-700'
                                                         }`}
                                                 >
-                                                    {u.is_active === 'true' ? 'Active' : 'Inactive'}
+                                                    {u.is_active ? 'Active' : 'Inactive'}
                                                 </button>
                                             </td>
                                             <td className="px-6 py-4">
@@ -5,7 +5,7 @@
 
 import { useEffect, useState } from 'react';
 import { useNavigate, useLocation, useParams } from 'react-router-dom';
-import { getResult } from '../services/api';
+import { getResult, subscribeToUploadEvents } from '../services/api';
 import logo from '../assets/logo.png';
 
 const Processing = () => {
@@ -16,7 +16,7 @@ const Processing = () => {
     const [progress, setProgress] = useState(0);
 
     useEffect(() => {
-        // Simulate progress animation
+        // Simulate progress animation until the server reports real progress
         const progressInterval = setInterval(() => {
             setProgress((prev) => {
                 if (prev >= 90) return prev;
@@ -24,11 +24,16 @@ const Processing = () => {
             });
         }, 500);
 
+        let timeout;
+        let finished = false;
+
         // Check for result
         const checkResult = async () => {
+            if (finished) return;
             try {
                 const result = await getResult(uploadId);
                 if (result) {
+                    finished = true;
                     setProgress(100);
                     setTimeout(() => {
                         navigate(`/result/${uploadId}`, { state: { result } });
@@ -36,14 +41,29 @@ const Processing = () => {
                 }
             } catch (err) {
                 // Still processing, continue waiting
-                setTimeout(checkResult, 2000);
+                timeout = setTimeout(checkResult, 2000);
             }
         };
 
+        // Push updates from the server; polling above remains the fallback
+        const events = subscribeToUploadEvents(uploadId, (event) => {
+            clearInterval(progressInterval);
+            setProgress(event.progress);
+            if (event.status === 'done') {
+                clearTimeout(timeout);
+                checkResult();
+            } else if (event.status === 'failed') {
+                finished = true;
+                setStatus('failed');
+            }
+        });
+
         // Start checking after a brief delay
-        const timeout = setTimeout(checkResult, 2000);
+        timeout = setTimeout(checkResult, 2000);
 
         return () => {
+            finished = true;
+            events.close();
             clearInterval(progressInterval);
             clearTimeout(timeout);
         };
@@ -74,10 +94,12 @@ const Processing = () => {
 
                 {/* Status Text */}
                 <h2 className="text-2xl font-bold text-gray-800 mb-2">
-                    Analyzing X-ray...
+                    {status === 'failed' ? 'Analysis failed' : 'Analyzing X-ray...'}
                 </h2>
                 <p className="text-gray-500 mb-8 max-w-md mx-auto">
-                    Our AI model is processing your spine X-ray to detect potential abnormalities
+                    {status === 'failed'
+                        ? 'The image could not be analyzed. Please try uploading it again.'
+                        : 'Our AI model is processing your spine X-ray to detect potential abnormalities'}
                 </p>
 
                 {/* Progress Bar */}
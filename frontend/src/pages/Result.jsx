@@ -7,7 +7,7 @@ import { useState, useEffect } from 'react';
 import { useParams, useLocation, Link } from 'react-router-dom';
 import Navbar from '../components/Navbar';
 import Sidebar from '../components/Sidebar';
-import { getResult, downloadReport, API_BASE_URL } from '../services/api';
+import { getResult, downloadReport, assetUrl } from '../services/api';
 
 const Result = () => {
     const { uploadId } = useParams();
@@ -235,7 +235,7 @@ const Result = () => {
                                 <div className="bg-gray-900 rounded-xl overflow-hidden aspect-square">
                                     {resultData?.heatmap_url ? (
                                         <img
-                                            src={`${API_BASE_URL}${resultData.heatmap_url}`}
+                                            src={assetUrl(resultData.heatmap_url)}
                                             alt="Heatmap visualization"
                                             className="w-full h-full object-contain"
                                             onError={(e) => {
@@ -85,7 +85,7 @@ const Upload = () => {
                 setProgress(percent);
             });
 
-            navigate(`/result/${result.upload_id}`, { state: { result } });
+            navigate(`/processing/${result.upload_id}`);
         } catch (err) {
             setError(err.response?.data?.detail || 'Upload failed. Please try again.');
             setUploading(false);
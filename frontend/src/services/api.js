@@ -146,6 +146,26 @@ export const getUploadStatus = async (uploadId) => {
     return response.data;
 };
 
+/**
+ * Subscribe to server-sent processing events for an upload.
+ * Calls onEvent with { upload_id, status, stage, progress } for each update.
+ * Returns the EventSource; call .close() to unsubscribe.
+ */
+export const subscribeToUploadEvents = (uploadId, onEvent, onError) => {
+    const token = localStorage.getItem('token');
+    const params = new URLSearchParams({ upload_id: uploadId, token });
+    const source = new EventSource(`${API_BASE_URL}/upload/events?${params}`);
+
+    source.addEventListener('upload', (event) => {
+        onEvent(JSON.parse(event.data));
+    });
+    if (onError) {
+        source.onerror = onError;
+    }
+
+    return source;
+};
+
 // ============================================================================
 // Result APIs
 // ============================================================================
@@ -166,6 +186,16 @@ export const getHeatmapUrl = (uploadId) => {
     return `${API_BASE_URL}/result/${uploadId}/heatmap?token=${token}`;
 };
 
+/**
+ * Resolve a file URL returned by the API (heatmap_url, thumbnail_url, ...).
+ * Local storage returns paths relative to the API; object storage returns
+ * absolute presigned URLs, which are used as-is.
+ */
+export const assetUrl = (url) => {
+    if (!url) return null;
+    return /^https?:\/\//.test(url) ? url : `${API_BASE_URL}${url}`;
+};
+
 /**
  * Get report download URL
  */